@@ -0,0 +1,126 @@
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+import pitscout
+from bench_pitscout import synthetic_matches
+
+# Checks and times the parsed CSV cache (__scoutcache__) used by analyze_data
+# Run from this folder: python bench_csvcache.py --rows 100000
+# First checks that the cache is used only while the CSV and the columns read are unchanged,
+# then times parsing the CSV (cold) against loading it from the cache (warm), and parsing a wide
+# export in full against reading just the scoring.json columns (usecols)
+
+def parsed(path, usecols=None):
+    return pitscout.coerce_types(pd.read_csv(path, usecols=usecols))
+
+def cache_hit(path, usecols=None):
+    key = pitscout.csv_cache_key(os.stat(path), usecols)
+    return pitscout.load_cached_csv(pitscout.csv_cache_path(path), key) is not None
+
+def expect(condition, message):
+    if not condition:
+        raise SystemExit(f"cache check failed: {message}")
+
+def check_invalidation(folder):
+    path = os.path.join(folder, 'check.csv')
+    blue, _ = synthetic_matches(400, 2)
+    blue.to_csv(path, index=False)
+
+    expect(not cache_hit(path), "cache file before the first read")
+    expect(pitscout.read_scouting_csv(path).equals(parsed(path)), "first read differs from read_csv")
+    expect(cache_hit(path), "no cache file after the first read")
+    expect(pitscout.read_scouting_csv(path).equals(parsed(path)), "cached frame differs from read_csv")
+
+    # A match gets appended, new size and mtime
+    blue.iloc[:5].to_csv(path, mode='a', header=False, index=False)
+    expect(not cache_hit(path), "cache used after rows were appended")
+    data = pitscout.read_scouting_csv(path)
+    expect(len(data) == 205 and data.equals(parsed(path)), "appended rows missing")
+
+    # Same size, different contents, only the mtime changes
+    stat = os.stat(path)
+    with open(path, 'r+') as file:
+        text = file.read()
+        file.seek(0)
+        file.write(text.replace('Kathleen', 'Katie Ln', 1))
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    expect(os.stat(path).st_size == stat.st_size, "edit changed the file size")
+    expect(not cache_hit(path), "cache used after the file changed in place")
+    expect(pitscout.read_scouting_csv(path).equals(parsed(path)), "edited file read wrong")
+
+    # Reading other columns of the same file
+    usecols = ['Team Number', 'Tipped', 'Died']
+    expect(not cache_hit(path, usecols), "cache for all columns used for usecols")
+    expect(pitscout.read_scouting_csv(path, usecols).equals(parsed(path, usecols)), "usecols read wrong")
+    expect(cache_hit(path, usecols), "no cache file after the usecols read")
+
+    # A cache file cut short is ignored and rewritten
+    cache_path = pitscout.csv_cache_path(path)
+    with open(cache_path, 'r+b') as file:
+        file.truncate(os.path.getsize(cache_path) // 2)
+    expect(not cache_hit(path, usecols), "truncated cache file used")
+    expect(pitscout.read_scouting_csv(path, usecols).equals(parsed(path, usecols)), "truncated cache read wrong")
+    expect(cache_hit(path, usecols), "truncated cache file not rewritten")
+    print("cache invalidation checks passed")
+
+def timed(fn, *args, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Check and benchmark the parsed scouting CSV cache")
+    parser.add_argument('--rows', type=int, default=100000, help="match rows, split between blue and red")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--extra-columns', type=int, default=40, help="free text columns added to the wide export")
+    args = parser.parse_args()
+    if pitscout.pa is None:
+        raise SystemExit("pyarrow isn't installed, there is no cache to check")
+
+    with tempfile.TemporaryDirectory() as folder:
+        check_invalidation(folder)
+
+        blue, red = synthetic_matches(args.rows, 40)
+        blue_file = os.path.join(folder, 'blue.csv')
+        red_file = os.path.join(folder, 'red.csv')
+        blue.to_csv(blue_file, index=False)
+        red.to_csv(red_file, index=False)
+        size = os.path.getsize(blue_file) + os.path.getsize(red_file)
+        print(f"{args.rows} rows, {size / 1e6:.1f} MB of CSV")
+
+        def load(cache):
+            pitscout.read_scouting_csv(blue_file, cache=cache)
+            pitscout.read_scouting_csv(red_file, cache=cache)
+
+        cold = timed(load, False, repeat=args.repeat)
+        load(True)
+        warm = timed(load, True, repeat=args.repeat)
+        print(f"cold (read_csv)  {cold:.3f}s")
+        print(f"warm (cache)     {warm:.4f}s   {cold / warm:.0f}x")
+
+        # Forms that grow lots of free text questions
+        wide_file = os.path.join(folder, 'wide.csv')
+        wide = blue.copy()
+        for n in range(args.extra_columns):
+            wide[f'Question {n}'] = 'drove well, some defense, slow at the coral station'
+        wide.to_csv(wide_file, index=False)
+        columns = pitscout.match_columns(pitscout.load_scoring_schema(), list(wide.columns), wide_file)
+        usecols = list(dict.fromkeys(columns.values()))
+        full = timed(parsed, wide_file, repeat=args.repeat)
+        narrow = timed(parsed, wide_file, usecols, repeat=args.repeat)
+        full_memory = parsed(wide_file).memory_usage(deep=True).sum()
+        narrow_memory = parsed(wide_file, usecols).memory_usage(deep=True).sum()
+        print(f"{len(wide.columns)} column export, {os.path.getsize(wide_file) / 1e6:.1f} MB")
+        print(f"all columns      {full:.3f}s   {full_memory / 1e6:.1f} MB")
+        print(f"usecols          {narrow:.3f}s   {narrow_memory / 1e6:.1f} MB")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+import pitscout
+from bench_pitscout import synthetic_matches, synthetic_pit_csv
+
+# Benchmark for watch mode (pitscout.LiveAnalysis) late in a long event
+# Run from this folder: python bench_live.py --rows 200000 --matches 20
+# Starts from CSVs that already hold --rows match rows, then appends one match (3 rows per
+# alliance) at a time and times LiveAnalysis.update() against re-reading and re-analyzing
+# both files, checking after every match that the rankings are exactly the same
+
+def full_analysis(blue_file, red_file, weights):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return pitscout.analyze_data(pd.read_csv(blue_file), pd.read_csv(red_file), weights)
+
+def append(path, rows, partial=b''):
+    with open(path, 'ab') as file:
+        file.write(rows.to_csv(index=False, header=False).encode() + partial)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark watch mode against re-analyzing the whole event")
+    parser.add_argument('--rows', type=int, default=200000, help="match rows already in the files")
+    parser.add_argument('--matches', type=int, default=20, help="matches appended one at a time")
+    args = parser.parse_args()
+
+    blue, red = synthetic_matches(args.rows + 6 * args.matches, 40)
+    start = args.rows // 2
+    with tempfile.TemporaryDirectory() as folder:
+        blue_file = os.path.join(folder, 'blue.csv')
+        red_file = os.path.join(folder, 'red.csv')
+        pit_file = os.path.join(folder, 'pitscout.csv')
+        blue.iloc[:start].to_csv(blue_file, index=False)
+        red.iloc[:start].to_csv(red_file, index=False)
+        synthetic_pit_csv(pit_file, pd.concat([blue, red])['Team Number'].unique(), 2000)
+
+        live = pitscout.LiveAnalysis(blue_file, red_file, pit_file)
+        began = time.perf_counter()
+        live.update()
+        print(f"{args.rows} rows, first update {time.perf_counter() - began:.3f}s")
+        weights = live.subjective_weights
+
+        live_times = []
+        full_times = []
+        for match in range(args.matches):
+            rows = slice(start + 3 * match, start + 3 * match + 3)
+            # Half the time red's last row is only partly written when we look
+            partial = b'2025-03-22 10:00:00,Sam,Ev' if match % 2 else b''
+            append(blue_file, blue.iloc[rows])
+            append(red_file, red.iloc[rows], partial)
+
+            began = time.perf_counter()
+            ranked = live.update()
+            live_times.append(time.perf_counter() - began)
+            if partial:
+                # The update has to skip it, take it off again for the full analysis
+                with open(red_file, 'rb+') as file:
+                    file.truncate(os.path.getsize(red_file) - len(partial))
+            began = time.perf_counter()
+            expected = full_analysis(blue_file, red_file, weights)
+            full_times.append(time.perf_counter() - began)
+            if not ranked.equals(expected):
+                raise SystemExit(f"match {match}: live rankings differ from analyze_data")
+
+        # A rewritten file (a scout fixing an old row) is read again from the start
+        data = pd.read_csv(blue_file)
+        data.loc[0, 'Tipped'] = not data.loc[0, 'Tipped']
+        data.to_csv(blue_file, index=False)
+        os.utime(blue_file)
+        if not live.update().equals(full_analysis(blue_file, red_file, weights)):
+            raise SystemExit("live rankings wrong after the file was rewritten")
+
+        print("rankings match analyze_data after every match and after a rewrite")
+        print(f"full re-analysis per match   {sum(full_times) / len(full_times):.3f}s")
+        print(f"live update per match        {sum(live_times) / len(live_times):.4f}s   "
+              f"worst {max(live_times):.4f}s")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,233 @@
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import pitscout
+
+# Benchmark for pitscout.analyze_data on synthetic scouting data
+# Run from this folder: python bench_pitscout.py --rows 50000 --events 40 --pit-rows 5000
+# The legacy_* functions are the old per-team scoring (index.map / apply(axis=1) with a .loc
+# lookup per team) and the old iterrows pit scouting loader, kept here to time against and
+# to check the new code gives exactly the same results
+
+# The column layout scoring.json expects: coral is L1-L3 auto and teleop (#6-8, #12-14), algae
+# processor and net (#10-11, #16-17)
+MATCH_COLUMNS = [
+    'Timestamp', 'Scouter Name', 'Event', 'Match Number', 'Team Number', 'Leave',
+    'Auto Coral L1', 'Auto Coral L2', 'Auto Coral L3', 'Auto Coral L4',
+    'Auto Algae Processor', 'Auto Algae Net',
+    'Teleop Coral L1', 'Teleop Coral L2', 'Teleop Coral L3', 'Teleop Coral L4',
+    'Teleop Algae Processor', 'Teleop Algae Net',
+    'Endgame', 'Tipped', 'Died', 'Comments'
+]
+
+def synthetic_matches(rows, events, teams_per_event=40, seed=0):
+    """
+    Make a blue and a red alliance frame with rows/2 match rows each, spread over events
+    """
+    rng = np.random.default_rng(seed)
+    event = rng.integers(0, events, rows)
+    # Every event has its own set of teams, numbered like real ones
+    team = 100 + event * teams_per_event + rng.integers(0, teams_per_event, rows)
+    data = pd.DataFrame({
+        'Timestamp': pd.Timestamp('2025-03-20') + pd.to_timedelta(rng.integers(0, 86400 * 3, rows), unit='s'),
+        'Scouter Name': rng.choice(['Kathleen', 'Sam', 'Priya', 'Diego'], rows),
+        'Event': 'Event ' + pd.Series(event).astype(str),
+        'Match Number': rng.integers(1, 90, rows),
+        'Team Number': team,
+        'Leave': rng.random(rows) < 0.8,
+    })
+    for col in MATCH_COLUMNS[6:18]:
+        data[col] = rng.poisson(1.5, rows)
+    data['Endgame'] = rng.choice(['Deep Climb', 'Shallow Climb', 'Park', 'None'], rows)
+    data['Tipped'] = rng.random(rows) < 0.05
+    data['Died'] = rng.random(rows) < 0.08
+    data['Comments'] = ''
+    data = data[MATCH_COLUMNS]
+    half = rows // 2
+    return data.iloc[:half].reset_index(drop=True), data.iloc[half:].reset_index(drop=True)
+
+def synthetic_pit_csv(path, teams, rows, seed=0, text_weight=None):
+    """
+    Write a pit scouting export with `rows` responses about the given teams, in the form's
+    column layout, with free text team names and some questions left blank
+    text_weight goes in the first response's Weight, an answer like '52kg' makes pandas read
+    the whole column as strings, the way it does with the real export
+    """
+    rng = np.random.default_rng(seed)
+    team = rng.choice(teams, rows)
+    names = np.array(['{} Robotics', 'team {}', '{}, Highlanders ', 'Number {}'])
+    data = pd.DataFrame({
+        'Id': np.arange(1, rows + 1),
+        'Name': rng.choice(['Kathleen', 'Sam', 'Priya', 'Diego'], rows),
+        'Team': [pattern.format(number) for pattern, number in zip(rng.choice(names, rows), team)],
+        'Chassis dimensions': '26 x 26',
+        'Weight': rng.integers(90, 135, rows).astype(float),
+        'topHeavy': rng.integers(1, 6, rows),
+        'Where can they intake Coral?': 'Ground intake;Directly from Coral station;',
+        'coralConfident': rng.integers(1, 6, rows).astype(float),
+        'algaeConfident': rng.integers(1, 6, rows).astype(float),
+        'autoalignQuality': rng.integers(1, 6, rows).astype(float),
+        'Drivetrain': 'Swerve',
+        'Basic game strategy': 'Coral & some algae',
+    })
+    for col in ['Weight', 'coralConfident', 'algaeConfident', 'autoalignQuality']:
+        data.loc[rng.random(rows) < 0.1, col] = np.nan
+    if text_weight is not None:
+        data['Weight'] = data['Weight'].astype(object)
+        data.loc[0, 'Weight'] = text_weight
+    data.to_csv(path, index=False)
+
+def legacy_load_subjective_weights(csv_path):
+    df = pd.read_csv(csv_path)
+    team_weights = {}
+    for _, row in df.iterrows():
+        team_number = int(''.join(filter(str.isdigit, str(row['Team']))))
+        team_weights[team_number] = {
+            'Weight': row['Weight'] if pd.notna(row['Weight']) else 5,
+            'Top_Heavy': row['topHeavy'] if pd.notna(row['topHeavy']) else 2,
+            'Coral_Confidence': row['coralConfident'] if pd.notna(row['coralConfident']) else 3,
+            'Algae_Confidence': row['algaeConfident'] if pd.notna(row['algaeConfident']) else 2,
+            'Auto_Align': row['autoalignQuality'] if pd.notna(row['autoalignQuality']) else 3
+        }
+    return team_weights
+
+def legacy_subjective_score(team_number, team_stats, subjective_weights):
+    weights = subjective_weights.get(team_number, {
+        'Top_Heavy': -2,
+        'Coral_Confidence': 5,
+        'Algae_Confidence': 4,
+        'Auto_Align': 3
+    })
+    max_coral = team_stats['Coral_Score'].max()
+    max_algae = team_stats['Algae_Score'].max()
+    coral_score = (team_stats.loc[team_number, 'Coral_Score'] / max_coral * 10) if max_coral > 0 else 0
+    algae_score = (team_stats.loc[team_number, 'Algae_Score'] / max_algae * 10) if max_algae > 0 else 0
+    stability = team_stats.loc[team_number, 'Stability'] * 10
+    try:
+        return (
+            weights.get('Weight', 5) * 1 +
+            (10 - stability) * weights.get('Top_Heavy', 2) * -1 +
+            coral_score * weights.get('Coral_Confidence', 3) +
+            algae_score * weights.get('Algae_Confidence', 2) +
+            weights.get('Auto_Align', 3) * 3
+        )
+    except TypeError:
+        # A weight that's a string, the old code printed the exception and scored 0
+        return 0
+
+def legacy_total_weighted_score(team_number, team_stats, subjective_weights):
+    weights = subjective_weights.get(team_number, {
+        'Coral_Confidence': 5,
+        'Algae_Confidence': 4,
+    })
+    return (
+        team_stats.loc[team_number, 'Coral_Score'] * weights.get('Coral_Confidence', 5) +
+        team_stats.loc[team_number, 'Algae_Score'] * weights.get('Algae_Confidence', 4) +
+        team_stats.loc[team_number, 'Tipped'] * -2 +
+        team_stats.loc[team_number, 'Died'] * -5 +
+        team_stats.loc[team_number, 'Stability'] * 3
+    )
+
+def legacy_scores(team_stats, subjective_weights):
+    if isinstance(subjective_weights, pd.DataFrame):
+        subjective_weights = subjective_weights.to_dict('index')
+    team_stats = team_stats.drop(columns=['Predicted_Weights', 'Total_Weighted_Score'])
+    team_stats['Predicted_Weights'] = team_stats.index.map(
+        lambda x: legacy_subjective_score(x, team_stats, subjective_weights))
+    team_stats['Total_Weighted_Score'] = team_stats.apply(
+        lambda row: legacy_total_weighted_score(row.name, team_stats, subjective_weights), axis=1)
+    return team_stats
+
+def as_number(value):
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+def check_text_weights(blue, red, scouted, folder):
+    """
+    A pit export whose Weight column pandas reads as strings. The old loader kept '114.0' as
+    a string and the old scoring gave every such team 0, the new loader makes them numbers and
+    only the teams whose answer isn't a number ('52kg') get 0. Checks the new scores are exactly
+    the old scoring run on weights converted that way
+    """
+    pit_file = os.path.join(folder, 'pitscout_text.csv')
+    synthetic_pit_csv(pit_file, scouted, 500, seed=2, text_weight='52kg')
+    legacy_weights = legacy_load_subjective_weights(pit_file)
+    if not any(isinstance(w['Weight'], str) and w['Weight'] != '52kg' for w in legacy_weights.values()):
+        raise SystemExit("text weight check: the export's Weight column wasn't read as strings")
+    with contextlib.redirect_stdout(io.StringIO()):
+        team_stats = pitscout.analyze_data(blue, red, pitscout.load_subjective_weights(pit_file, False))
+    converted = {team: {key: as_number(value) for key, value in w.items()} for team, w in legacy_weights.items()}
+    expected = legacy_scores(team_stats, converted)
+    old = legacy_scores(team_stats, legacy_weights)
+    for col in ['Predicted_Weights', 'Total_Weighted_Score']:
+        mismatched = (expected[col] != team_stats[col]).sum()
+        if mismatched:
+            raise SystemExit(f"text weight check: {col} differs for {mismatched} teams")
+    rescored = ((old['Predicted_Weights'] == 0) & (team_stats['Predicted_Weights'] != 0)).sum()
+    zero = (team_stats['Predicted_Weights'] == 0).sum()
+    return f"text Weight column: {rescored} teams the old code scored 0 are scored now, {zero} non-numeric still 0"
+
+def timed(fn, *args, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pitscout.analyze_data on synthetic match data")
+    parser.add_argument('--rows', type=int, default=50000, help="match rows, split between blue and red")
+    parser.add_argument('--events', type=int, default=40)
+    parser.add_argument('--pit-rows', type=int, default=5000, help="pit scouting responses")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    blue, red = synthetic_matches(args.rows, args.events)
+    teams = pd.concat([blue, red])['Team Number'].unique()
+    # A season of pit scouting covers most of the teams, some of them more than once
+    scouted = np.random.default_rng(1).choice(teams, int(len(teams) * 0.7), replace=False)
+    with tempfile.TemporaryDirectory() as folder:
+        pit_file = os.path.join(folder, 'pitscout.csv')
+        synthetic_pit_csv(pit_file, scouted, args.pit_rows)
+        load_time, weights = timed(pitscout.load_subjective_weights, pit_file, False, repeat=args.repeat)
+        legacy_load_time, legacy_weights = timed(legacy_load_subjective_weights, pit_file, repeat=args.repeat)
+        text_weights = check_text_weights(blue, red, scouted, folder)
+    print(f"{args.rows} rows, {args.events} events, {len(teams)} teams, "
+          f"{args.pit_rows} pit responses about {len(weights)} teams")
+
+    legacy_weights = pd.DataFrame.from_dict(legacy_weights, orient='index').sort_index()
+    if not legacy_weights.astype('float64').equals(weights.sort_index().rename_axis(None)):
+        raise SystemExit("loaded pit weights differ from the iterrows loader")
+
+    analyze_time, team_stats = timed(pitscout.analyze_data, blue, red, weights, repeat=args.repeat)
+    legacy_time, legacy = timed(legacy_scores, team_stats, weights, repeat=args.repeat)
+    scoring_time, _ = timed(
+        lambda: (pitscout.calculate_subjective_scores(team_stats, pitscout.team_weights(team_stats, weights)),
+                 pitscout.calculate_total_weighted_scores(team_stats, pitscout.team_weights(team_stats, weights))),
+        repeat=args.repeat)
+
+    for col in ['Predicted_Weights', 'Total_Weighted_Score']:
+        mismatched = (legacy[col] != team_stats[col]).sum()
+        if mismatched:
+            raise SystemExit(f"{col}: {mismatched} teams differ from the per-team scoring")
+    print("pit weights and scores match the old code exactly")
+    print(text_weights)
+    print(f"iterrows pit loader    {legacy_load_time:.3f}s")
+    print(f"vectorized pit loader  {load_time:.4f}s   {legacy_load_time / load_time:.0f}x")
+    print(f"analyze_data total     {analyze_time:.3f}s")
+    print(f"per-team scoring       {legacy_time:.3f}s")
+    print(f"vectorized scoring     {scoring_time:.4f}s   {legacy_time / scoring_time:.0f}x")
+
+if __name__ == '__main__':
+    main()
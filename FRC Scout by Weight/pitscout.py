@@ -1,225 +1,547 @@
+import io
+import json
+import os
+import time
 import pandas as pd
 import tkinter as tk
 from tkinter import filedialog, messagebox
 from PIL import Image, ImageTk
 
-def read_csv_files(blue_file, red_file):
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:
+    # Without pyarrow the CSVs are parsed every time
+    pa = None
+
+# Parsed CSVs are cached as Arrow (feather) files in __scoutcache__ next to the CSV, so analyzing
+# again doesn't re-parse files that haven't changed. Each cache file remembers the size and
+# modification time of the CSV it came from and which columns were read, and is ignored and
+# rewritten when any of those change
+CACHE_FOLDER = '__scoutcache__'
+CACHE_VERSION = 1
+CACHE_KEY = b'pitscout_cache'
+
+def csv_cache_path(csv_path):
+    folder = os.path.join(os.path.dirname(os.path.abspath(csv_path)), CACHE_FOLDER)
+    return os.path.join(folder, os.path.basename(csv_path) + '.feather')
+
+def csv_cache_key(stat, usecols):
+    return json.dumps({
+        'version': CACHE_VERSION,
+        'size': stat.st_size,
+        'mtime': stat.st_mtime_ns,
+        'usecols': None if usecols is None else list(usecols)
+    }).encode()
+
+def load_cached_csv(cache_path, key):
+    """
+    The cached frame if the cache file was made with this key, otherwise None
+    """
+    try:
+        table = feather.read_table(cache_path)
+    except (OSError, ValueError):
+        # Missing, unreadable or corrupt
+        return None
+    if (table.schema.metadata or {}).get(CACHE_KEY) != key:
+        return None
+    return table.to_pandas()
+
+def store_cached_csv(cache_path, key, data):
+    # Written to a temp file and renamed so nothing ever reads half a cache file,
+    # a folder we can't write to just means no cache
+    temp = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        table = pa.Table.from_pandas(data, preserve_index=False)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), CACHE_KEY: key})
+        feather.write_feather(table, temp)
+        os.replace(temp, cache_path)
+    except (OSError, ValueError, pa.ArrowException):
+        try:
+            os.remove(temp)
+        except OSError:
+            pass
+
+def coerce_types(data):
+    """
+    Convert the columns the way analyze_data uses them: bools to ints,
+    and text that repeats a lot (events, scouters, endgame) to categoricals
+    """
+    for col in data.columns:
+        if data[col].dtype == bool:
+            data[col] = data[col].astype(int)
+        elif pd.api.types.is_string_dtype(data[col]) and data[col].nunique() <= len(data) // 2:
+            data[col] = data[col].astype('category')
+    return data
+
+def read_scouting_csv(csv_path, usecols=None, cache=True):
+    """
+    Read a scouting CSV with its types converted, from the cache when the file hasn't changed
+    """
+    if not cache or pa is None:
+        return coerce_types(pd.read_csv(csv_path, usecols=usecols))
+
+    # Stat before reading, a file written while we parse it gets a new key and is read again next time
+    key = csv_cache_key(os.stat(csv_path), usecols)
+    cache_path = csv_cache_path(csv_path)
+    data = load_cached_csv(cache_path, key)
+    if data is None:
+        data = coerce_types(pd.read_csv(csv_path, usecols=usecols))
+        store_cached_csv(cache_path, key, data)
+    return data
+
+def read_csv_files(blue_file, red_file, schema):
     try:
-        blue_data = pd.read_csv(blue_file)
-        red_data = pd.read_csv(red_file)
+        blue_data = read_match_csv(blue_file, schema)
+        red_data = read_match_csv(red_file, schema)
         print("Successfully read CSV files")
         return blue_data, red_data
     except Exception as e:
         print(f"Error reading CSV files: {e}")
         return None, None
 
-def load_subjective_weights(csv_path):
+# Which match CSV columns make up each score is set in scoring.json. Each component maps columns
+# to the weight the column is multiplied by, a component is the weighted sum of its columns in each
+# match row. "team" is the team number column. A column is either its name in the CSV header, which
+# keeps scoring right when the form adds or moves a question, or "#" and its position counting from 0
+# ("#6" is the seventh column) like the old iloc scoring. Only these columns are read from the CSVs
+# The shipped scoring.json uses the positions the Colorado export was scored by before the schema
+# (coral 6-8 and 12-14, algae 10-11 and 16-17) and the names the old code used for the rest
+SCORING_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scoring.json')
+
+# The per-team match averages the rankings are calculated from
+COMPONENTS = ['Coral_Score', 'Algae_Score', 'Tipped', 'Died']
+
+def schema_error(path, problem):
+    return ValueError(f"Scoring schema {path}: {problem}. Edit it to match your scouting form")
+
+def column_position(col):
     """
-    Load subjective weights from the pitscout.csv file
+    The position a "#6" style schema column stands for, None for a column name
+    """
+    if col.startswith('#') and col[1:].isdigit():
+        return int(col[1:])
+    return None
+
+def load_scoring_schema(path=SCORING_FILE):
+    """
+    Load and check the scoring schema, raises ValueError saying what's wrong with it
     """
     try:
-        # Read the CSV file
-        df = pd.read_csv(csv_path)
-        
-        # Create a dictionary to store team weights
-        team_weights = {}
-        
-        # Extract relevant columns
-        for _, row in df.iterrows():
-            # Extract team number, removing any non-numeric characters
-            team_number = int(''.join(filter(str.isdigit, str(row['Team']))))
-            
-            # Collect subjective weights
-            weights = {
-                'Weight': row['Weight'] if pd.notna(row['Weight']) else 5,
-                'Top_Heavy': row['topHeavy'] if pd.notna(row['topHeavy']) else 2,
-                'Coral_Confidence': row['coralConfident'] if pd.notna(row['coralConfident']) else 3,
-                'Algae_Confidence': row['algaeConfident'] if pd.notna(row['algaeConfident']) else 2,
-                'Auto_Align': row['autoalignQuality'] if pd.notna(row['autoalignQuality']) else 3
-            }
-            
-            team_weights[team_number] = weights
-        
-        return team_weights
-    
+        with open(path) as file:
+            schema = json.load(file)
+    except OSError as e:
+        raise schema_error(path, f"can't be read: {e.strerror}")
+    except json.JSONDecodeError as e:
+        raise schema_error(path, f"not valid JSON: {e}")
+
+    if not isinstance(schema, dict) or not isinstance(schema.get('team'), str):
+        raise schema_error(path, "needs \"team\", the name or #position of the team number column")
+    components = schema.get('components')
+    if not isinstance(components, dict) or sorted(components) != sorted(COMPONENTS):
+        raise schema_error(path, f"\"components\" must define exactly {', '.join(COMPONENTS)}")
+    for name, columns in components.items():
+        if not isinstance(columns, dict) or not columns:
+            raise schema_error(path, f"component {name} needs at least one column")
+        for col, weight in columns.items():
+            # bool is an int to python, but true as a weight is a mistake
+            if isinstance(weight, bool) or not isinstance(weight, (int, float)):
+                raise schema_error(path, f"weight of column {col!r} in {name} must be a number, not {weight!r}")
+    return schema
+
+def scoring_columns(schema):
+    """
+    The columns the schema uses, names and "#6" style positions as written in it
+    """
+    columns = [schema['team']]
+    for component in schema['components'].values():
+        columns += [col for col in component if col not in columns]
+    return columns
+
+def match_columns(schema, header, csv_path):
+    """
+    Map each column the schema uses to its name in a CSV's header, raises a ValueError listing
+    the ones the header doesn't have
+    """
+    columns = {}
+    missing = []
+    for col in scoring_columns(schema):
+        position = column_position(col)
+        if position is None and col in header:
+            columns[col] = col
+        elif position is not None and position < len(header):
+            columns[col] = header[position]
+        else:
+            missing.append(col)
+    if missing:
+        raise ValueError(f"{csv_path} has no column {', '.join(map(repr, missing))} from the scoring schema. "
+                         f"Edit scoring.json so its columns match this file's header: "
+                         f"{', '.join(f'#{i} {name!r}' for i, name in enumerate(header))}")
+    return columns
+
+def select_columns(data, columns):
+    """
+    The columns of a frame read with usecols, labelled the way the schema names them
+    """
+    return data[list(columns.values())].set_axis(list(columns), axis=1)
+
+def schema_column(data, col):
+    """
+    A schema column from a frame labelled by the schema, or a whole export where "#6" is a position
+    """
+    position = column_position(col)
+    if position is None or col in data.columns:
+        return data[col]
+    return data.iloc[:, position]
+
+def read_match_csv(csv_path, schema, cache=True):
+    """
+    Read the columns of a match CSV that the scoring schema uses, labelled the way the schema names them
+    """
+    header = list(pd.read_csv(csv_path, nrows=0).columns)
+    columns = match_columns(schema, header, csv_path)
+    usecols = list(dict.fromkeys(columns.values()))
+    return select_columns(read_scouting_csv(csv_path, usecols, cache), columns)
+
+# Pit scouting form columns and the weight each one becomes
+PIT_COLUMNS = {
+    'Weight': 'Weight',
+    'topHeavy': 'Top_Heavy',
+    'coralConfident': 'Coral_Confidence',
+    'algaeConfident': 'Algae_Confidence',
+    'autoalignQuality': 'Auto_Align'
+}
+
+# Used for questions left blank on a team's pit scouting response
+PIT_DEFAULTS = {
+    'Weight': 5,
+    'Top_Heavy': 2,
+    'Coral_Confidence': 3,
+    'Algae_Confidence': 2,
+    'Auto_Align': 3
+}
+
+def load_subjective_weights(csv_path, cache=True):
+    """
+    Load subjective weights from the pitscout.csv file into a DataFrame indexed by team number
+    """
+    try:
+        # Only read the columns we use
+        df = read_scouting_csv(csv_path, usecols=['Team', *PIT_COLUMNS], cache=cache)
+
+        # Team is free text ("4499 Highlanders", "alpine robotics 159"), the team number is its last number
+        teams = df['Team'].astype('str').str.extract(r'(\d+)\D*$', expand=False)
+        skipped = teams.isna()
+        if skipped.any():
+            print(f"Skipping {skipped.sum()} pit scouting rows without a team number")
+
+        raw = df[~skipped].rename(columns=PIT_COLUMNS)[list(PIT_DEFAULTS)]
+        raw.index = pd.Index(teams[~skipped].astype('int64'), name='Team Number')
+
+        # Blanks get the defaults, answers that aren't numbers ("52kg") stay NaN
+        # so the scoring reports those teams
+        weights = raw.apply(pd.to_numeric, errors='coerce')
+        not_numeric = weights.isna() & raw.notna()
+        weights = weights.fillna(PIT_DEFAULTS).mask(not_numeric).astype('float64')
+
+        # A team scouted twice keeps its latest response
+        return weights[~weights.index.duplicated(keep='last')]
+
     except Exception as e:
         print(f"Error loading subjective weights: {e}")
-        return {}
+        return pd.DataFrame(columns=list(PIT_DEFAULTS), index=pd.Index([], dtype='int64', name='Team Number'),
+                            dtype='float64')
 
-def analyze_data(blue_data, red_data, subjective_weights):
+def analyze_data(blue_data, red_data, subjective_weights, schema=None):
     try:
+        if schema is None:
+            schema = load_scoring_schema()
+        
         # Combine the data
         all_data = pd.concat([blue_data, red_data])
         
-        # Print basic info
-        print(f"Total number of records: {len(all_data)}")
-        print(f"Number of teams: {all_data['Team Number'].nunique()}")
-        
-        # Convert boolean columns to integers
-        bool_cols = all_data.select_dtypes(include=['bool']).columns
-        for col in bool_cols:
-            all_data[col] = all_data[col].astype(int)
-        
         # Calculate coral and algae scores
-        all_data['Coral_Score'] = all_data.iloc[:, 6] + all_data.iloc[:, 7] + all_data.iloc[:, 8] + \
-                                all_data.iloc[:, 12] + all_data.iloc[:, 13] + all_data.iloc[:, 14]
+        scores = match_scores(all_data, schema)
         
-        all_data['Algae_Score'] = all_data.iloc[:, 10] + all_data.iloc[:, 11] + \
-                                all_data.iloc[:, 16] + all_data.iloc[:, 17]
+        # Print basic info
+        print(f"Total number of records: {len(all_data)}")
+        print(f"Number of teams: {scores[schema['team']].nunique()}")
         
         # Group by team
-        team_stats = all_data.groupby('Team Number').agg({
+        team_stats = scores.groupby(schema['team']).agg({
             'Coral_Score': 'mean',
             'Algae_Score': 'mean',
             'Tipped': 'mean',
             'Died': 'mean'
         })
         
-        # Calculate stability
-        team_stats['Stability'] = 1 - (team_stats['Tipped'] + team_stats['Died'])/2
-        
-        # Add subjective weights and scores
-        team_stats['Predicted_Weights'] = team_stats.index.map(lambda x: calculate_subjective_score(x, team_stats, subjective_weights))
-        
-        # Add total weighted score
-        team_stats['Total_Weighted_Score'] = team_stats.apply(
-           lambda row: 
-           calculate_total_weighted_score(row.name, team_stats, subjective_weights), 
-            axis=1
-        )
-        # Sort by total weighted score
-        team_stats = team_stats.sort_values('Total_Weighted_Score', ascending=False)
-        
-        return team_stats
+        return rank_teams(team_stats, subjective_weights)
     
     except Exception as e:
         print(f"Error analyzing data: {e}")
         return None
 
-def calculate_total_weighted_score(team_number, team_stats, subjective_weights):
+def match_scores(data, schema):
     """
-    Calculate total weighted score based on:
-    - Coral and algae scoring with multipliers
-    - Penalties for tipping and dying
-    - Stability bonus
+    The team and the score components of every match row, from the columns named in the schema
     """
-    try:
-        # Get subjective weights for this team
-        weights = subjective_weights.get(team_number, {
-            'Coral_Confidence': 5,  # Default multiplier for coral
-            'Algae_Confidence': 4,  # Default multiplier for algae
-        })
-        
-        # Get team's performance metrics
-        coral_score = team_stats.loc[team_number, 'Coral_Score']
-        algae_score = team_stats.loc[team_number, 'Algae_Score']
-        tipped = team_stats.loc[team_number, 'Tipped']
-        died = team_stats.loc[team_number, 'Died']
-        stability = team_stats.loc[team_number, 'Stability']
-        
-        # Calculate weighted scoring
-        coral_weighted_score = coral_score * weights.get('Coral_Confidence', 5)
-        algae_weighted_score = algae_score * weights.get('Algae_Confidence', 4)
-        
-        # Calculate penalties and bonuses
-        tipping_penalty = tipped * -2  # Penalty for tipping
-        dying_penalty = died * -5     # Severe penalty for dying
-        stability_bonus = stability * 3  # Bonus for stability
-        
-        # Total weighted score
-        total_score = (
-            coral_weighted_score + 
-            algae_weighted_score + 
-            tipping_penalty + 
-            dying_penalty + 
-            stability_bonus
-        )
-        
-        return total_score
-    
-    except Exception as e:
-        print(f"Error calculating total score for team {team_number}: {e}")
-        return 0
-        
-def calculate_subjective_score(team_number, team_stats, subjective_weights):
+    scores = pd.DataFrame({schema['team']: schema_column(data, schema['team'])})
+    for name, columns in schema['components'].items():
+        total = None
+        for col, weight in columns.items():
+            values = schema_column(data, col)
+            # Convert boolean columns to integers
+            if values.dtype == bool:
+                values = values.astype(int)
+            values = values * weight
+            total = values if total is None else total + values
+        scores[name] = total
+    return scores
+
+def rank_teams(team_stats, subjective_weights):
     """
-    Calculate a score based on subjective weights and match performance
+    Score the per-team match averages and sort the teams best first
     """
-    try:
-        # Get subjective weights for this team
-        weights = subjective_weights.get(team_number, {
-            'Top_Heavy': -2,
-            'Coral_Confidence': 5,
-            'Algae_Confidence': 4,
-            'Auto_Align': 3
-        })
-        # Normalize performance metrics
-        max_coral = team_stats['Coral_Score'].max()
-        max_algae = team_stats['Algae_Score'].max()
-        
-        # Calculate normalized scores
-        coral_score = (team_stats.loc[team_number, 'Coral_Score'] / max_coral * 10) if max_coral > 0 else 0
-        algae_score = (team_stats.loc[team_number, 'Algae_Score'] / max_algae * 10) if max_algae > 0 else 0
-        stability = team_stats.loc[team_number, 'Stability'] * 10
-        
-        # Calculate weighted score
-        score = (
-            weights.get('Weight', 5) * 1 +
-            (10 - stability) * weights.get('Top_Heavy', 2) * -1 +
-            coral_score * weights.get('Coral_Confidence', 3) +
-            algae_score * weights.get('Algae_Confidence', 2) +
-            weights.get('Auto_Align', 3) * 3
-        )
-        return score
+    # Calculate stability
+    team_stats['Stability'] = 1 - (team_stats['Tipped'] + team_stats['Died'])/2
     
-    except Exception as e:
-        print(f"Error calculating score for team {team_number}: {e}")
-        return 0
-def calculate_total_weighted_score(team_number, team_stats, subjective_weights):
+    # Line up the subjective weights with the teams
+    weights = team_weights(team_stats, subjective_weights)
+    
+    # Add subjective weights and scores
+    team_stats['Predicted_Weights'] = calculate_subjective_scores(team_stats, weights)
+    
+    # Add total weighted score
+    team_stats['Total_Weighted_Score'] = calculate_total_weighted_scores(team_stats, weights)
+    # Sort by total weighted score
+    return team_stats.sort_values('Total_Weighted_Score', ascending=False)
+
+# Weights used for teams that have no pit scouting row
+DEFAULT_WEIGHTS = {
+    'Weight': 5,
+    'Top_Heavy': -2,
+    'Coral_Confidence': 5,
+    'Algae_Confidence': 4,
+    'Auto_Align': 3
+}
+
+def team_weights(team_stats, subjective_weights):
     """
-    Calculate total weighted score based on:
+    Line up the loaded subjective weights with the teams in team_stats,
+    using DEFAULT_WEIGHTS for teams that weren't pit scouted
+    """
+    weights = subjective_weights.reindex(index=team_stats.index, columns=list(DEFAULT_WEIGHTS))
+
+    # Teams missing from the pit data come back as all-NaN rows
+    missing = weights.isna().all(axis=1)
+    for col, default in DEFAULT_WEIGHTS.items():
+        weights[col] = weights[col].mask(missing, default)
+    return weights
+
+def calculate_total_weighted_scores(team_stats, weights):
+    """
+    Calculate total weighted score for every team based on:
     - Coral and algae scoring with multipliers
     - Penalties for tipping and dying
     - Stability bonus
     """
-    try:
-        # Get subjective weights for this team
-        weights = subjective_weights.get(team_number, {
-            'Coral_Confidence': 5,  # Default multiplier for coral
-            'Algae_Confidence': 4,  # Default multiplier for algae
-        })
-        
-        # Get team's performance metrics
-        coral_score = team_stats.loc[team_number, 'Coral_Score']
-        algae_score = team_stats.loc[team_number, 'Algae_Score']
-        tipped = team_stats.loc[team_number, 'Tipped']
-        died = team_stats.loc[team_number, 'Died']
-        stability = team_stats.loc[team_number, 'Stability']
-        
-        # Calculate weighted scoring
-        coral_weighted_score = coral_score * weights.get('Coral_Confidence', 5)
-        algae_weighted_score = algae_score * weights.get('Algae_Confidence', 4)
-        
-        # Calculate penalties and bonuses
-        tipping_penalty = tipped * -2  # Penalty for tipping
-        dying_penalty = died * -5     # Severe penalty for dying
-        stability_bonus = stability * 3  # Bonus for stability
-        
-        # Total weighted score
-        total_score = (
-            coral_weighted_score + 
-            algae_weighted_score + 
-            tipping_penalty + 
-            dying_penalty + 
-            stability_bonus
-        )
+    bad = weights[['Coral_Confidence', 'Algae_Confidence']].isna().any(axis=1)
+    if bad.any():
+        raise ValueError(f"Non-numeric coral/algae confidence for teams {list(team_stats.index[bad])}")
+    
+    # Calculate weighted scoring
+    coral_weighted_score = team_stats['Coral_Score'] * weights['Coral_Confidence']
+    algae_weighted_score = team_stats['Algae_Score'] * weights['Algae_Confidence']
+    
+    # Calculate penalties and bonuses
+    tipping_penalty = team_stats['Tipped'] * -2  # Penalty for tipping
+    dying_penalty = team_stats['Died'] * -5     # Severe penalty for dying
+    stability_bonus = team_stats['Stability'] * 3  # Bonus for stability
+    
+    # Total weighted score
+    return (
+        coral_weighted_score + 
+        algae_weighted_score + 
+        tipping_penalty + 
+        dying_penalty + 
+        stability_bonus
+    )
         
-        return total_score
+def calculate_subjective_scores(team_stats, weights):
+    """
+    Calculate a score for every team based on subjective weights and match performance
+    """
+    # Normalize performance metrics
+    max_coral = team_stats['Coral_Score'].max()
+    max_algae = team_stats['Algae_Score'].max()
     
-    except Exception as e:
-        print(f"Error calculating total score for team {team_number}: {e}")
-        return total_score
+    # Calculate normalized scores
+    coral_score = (team_stats['Coral_Score'] / max_coral * 10) if max_coral > 0 else 0
+    algae_score = (team_stats['Algae_Score'] / max_algae * 10) if max_algae > 0 else 0
+    stability = team_stats['Stability'] * 10
+    
+    # Calculate weighted score
+    score = (
+        weights['Weight'] * 1 +
+        (10 - stability) * weights['Top_Heavy'] * -1 +
+        coral_score * weights['Coral_Confidence'] +
+        algae_score * weights['Algae_Confidence'] +
+        weights['Auto_Align'] * 3
+    )
+    
+    # Teams with weights that aren't numbers get a score of 0
+    bad = weights.isna().any(axis=1)
+    for team in team_stats.index[bad]:
+        print(f"Error calculating score for team {team}: non-numeric subjective weight")
+    return score.mask(bad, 0)
     
+# During an event the match CSVs only grow, so watch mode (LiveAnalysis) reads just the rows
+# added since the last check and adds them to running per-team sums and counts
+WATCH_INTERVAL_MS = 500
+
+class CsvTail:
+    """
+    Reads the rows appended to a CSV since the last read
+    """
+    # Bytes just before the read position that are checked again on every read, if they changed
+    # the file was rewritten rather than appended to and it has to be read from the start
+    CHECK = 4096
+
+    def __init__(self, path, usecols=None):
+        self.path = path
+        self.usecols = usecols
+        self.reset()
+
+    def reset(self):
+        self.offset = 0
+        self.header = b''
+        self.tail = b''
+
+    def read_new(self):
+        """
+        Returns (rows, restarted), rows is a DataFrame of the new complete rows or None if there
+        aren't any, restarted means the file changed before the read position and rows is all of it
+        """
+        restarted = False
+        with open(self.path, 'rb') as file:
+            if self.offset:
+                size = os.fstat(file.fileno()).st_size
+                file.seek(self.offset - len(self.tail))
+                if size < self.offset or file.read(len(self.tail)) != self.tail:
+                    self.reset()
+                    restarted = True
+                    file.seek(0)
+            data = file.read()
+
+        # A row still being written is left for the next read
+        end = data.rfind(b'\n') + 1
+        if end == 0:
+            return None, restarted
+        header = self.header
+        body = data[:end]
+        if not self.offset:
+            header_end = body.find(b'\n') + 1
+            header, body = body[:header_end], body[header_end:]
+        rows = None
+        if body:
+            try:
+                rows = pd.read_csv(io.BytesIO(header + body), usecols=self.usecols)
+            except pd.errors.ParserError:
+                # Cut off inside a quoted comment, try again once the rest is written
+                return None, restarted
+
+        self.header = header
+        self.offset += end
+        self.tail = (self.tail + data[:end])[-self.CHECK:]
+        return rows, restarted
+
+class LiveAnalysis:
+    """
+    Keeps the team rankings for a growing pair of match CSVs up to date,
+    update() reads only what was appended since it last ran
+    """
+    def __init__(self, blue_file, red_file, subjective_file, schema=None):
+        self.schema = load_scoring_schema() if schema is None else schema
+        self.tails = [CsvTail(blue_file), CsvTail(red_file)]
+        # Each file's schema columns, worked out from its header before the first read
+        self.columns = [None, None]
+        self.subjective_file = subjective_file
+        self.subjective_stat = None
+        self.subjective_weights = None
+        self.sums = None
+        self.counts = None
+        self.rows = 0
+
+    def update(self):
+        """
+        The new rankings, or None when nothing changed since the last update
+        """
+        changed = self.reload_weights()
+        for i, tail in enumerate(self.tails):
+            if not tail.offset and not self.match_header(i):
+                continue
+            columns = self.columns[i]
+            try:
+                rows, restarted = tail.read_new()
+            except ValueError:
+                # The file was rewritten with other columns, raises if the schema doesn't fit them
+                self.match_header(i)
+                if self.columns[i] == columns:
+                    raise
+                restarted = True
+            if restarted:
+                # Rows we already counted changed, count everything again
+                self.restart()
+                return self.update()
+            if rows is not None and len(rows):
+                self.add_rows(select_columns(rows, columns))
+                changed = True
+        if not changed or self.sums is None:
+            return None
+        team_stats = (self.sums / self.counts)[COMPONENTS]
+        return rank_teams(team_stats, self.subjective_weights)
+
+    def match_header(self, i):
+        """
+        Set which columns tail i reads from its file's header, False while the file is empty
+        """
+        tail = self.tails[i]
+        try:
+            header = list(pd.read_csv(tail.path, nrows=0).columns)
+        except pd.errors.EmptyDataError:
+            return False
+        self.columns[i] = match_columns(self.schema, header, tail.path)
+        tail.usecols = list(dict.fromkeys(self.columns[i].values()))
+        return True
+
+    def restart(self):
+        for tail in self.tails:
+            tail.reset()
+        self.sums = None
+        self.counts = None
+        self.rows = 0
+
+    def reload_weights(self):
+        stat = os.stat(self.subjective_file)
+        key = (stat.st_size, stat.st_mtime_ns)
+        if key == self.subjective_stat:
+            return False
+        self.subjective_stat = key
+        self.subjective_weights = load_subjective_weights(self.subjective_file)
+        return True
+
+    def add_rows(self, rows):
+        grouped = match_scores(rows, self.schema).groupby(self.schema['team'])[COMPONENTS]
+        sums = grouped.sum()
+        counts = grouped.count()
+        if self.sums is None:
+            self.sums, self.counts = sums, counts
+        else:
+            self.sums = self.sums.add(sums, fill_value=0)
+            self.counts = self.counts.add(counts, fill_value=0)
+        self.rows += len(rows)
+
 def main():
     try:
         # File paths
@@ -227,19 +549,20 @@ def main():
         red_file = "2025 Colorado public - Red Robot Input.csv"
         subjective_weights_file = "pitscout.csv"
         
-        # Load subjective weights
+        # Load the scoring schema and subjective weights
+        schema = load_scoring_schema()
         print("Loading subjective weights...")
         subjective_weights = load_subjective_weights(subjective_weights_file)
         
         # Read data
         print("Reading CSV files...")
-        blue_data, red_data = read_csv_files(blue_file, red_file)
+        blue_data, red_data = read_csv_files(blue_file, red_file, schema)
         if blue_data is None or red_data is None:
             return
         
         # Analyze data
         print("\nAnalyzing data...")
-        team_stats = analyze_data(blue_data, red_data, subjective_weights)
+        team_stats = analyze_data(blue_data, red_data, subjective_weights, schema)
         if team_stats is None:
             return
         
@@ -289,9 +612,15 @@ class RobotScoutingApp:
         self.subjective_file_checkmark = tk.Label(file_frame, text="")
         self.subjective_file_checkmark.grid(row=2, column=3, padx=5)
 
-        # Analyze button
-        self.analyze_button = tk.Button(root, text="Analyze Data", command=self.analyze_data)
-        self.analyze_button.pack(pady=20)
+        # Analyze and watch buttons
+        button_frame = tk.Frame(root)
+        button_frame.pack(pady=20)
+        self.analyze_button = tk.Button(button_frame, text="Analyze Data", command=self.analyze_data)
+        self.analyze_button.grid(row=0, column=0, padx=5)
+        self.watch_button = tk.Button(button_frame, text="Watch Files", command=self.toggle_watch)
+        self.watch_button.grid(row=0, column=1, padx=5)
+        self.watch_status = tk.Label(root, text="")
+        self.watch_status.pack()
 
         # Results text area
         self.results_text = tk.Text(root, height=30, width=200)
@@ -302,6 +631,10 @@ class RobotScoutingApp:
         self.red_file_path = ""
         self.subjective_file_path = ""
 
+        # Watch mode state
+        self.live = None
+        self.watch_job = None
+
         # Create green checkmark
         try:
             self.checkmark_image = ImageTk.PhotoImage(Image.open("green_checkmark.png").resize((20, 20)))
@@ -343,15 +676,16 @@ class RobotScoutingApp:
             return
 
         try:
-            # Load subjective weights
+            # Load the scoring schema and subjective weights
+            schema = load_scoring_schema()
             subjective_weights = load_subjective_weights(self.subjective_file_path)
             
-            # Read data
-            blue_data = pd.read_csv(self.blue_file_path)
-            red_data = pd.read_csv(self.red_file_path)
+            # Read the columns the schema uses, unchanged files come from the cache
+            blue_data = read_match_csv(self.blue_file_path, schema)
+            red_data = read_match_csv(self.red_file_path, schema)
 
             # Analyze data
-            team_stats = analyze_data(blue_data, red_data, subjective_weights)
+            team_stats = analyze_data(blue_data, red_data, subjective_weights, schema)
 
             # Display results
             self.results_text.delete(1.0, tk.END)
@@ -360,6 +694,40 @@ class RobotScoutingApp:
         except Exception as e:
             messagebox.showerror("Analysis Error", str(e))
 
+    def toggle_watch(self):
+        if self.live is not None:
+            # Stop watching
+            self.root.after_cancel(self.watch_job)
+            self.live = None
+            self.watch_button.config(text="Watch Files")
+            self.watch_status.config(text="")
+            return
+
+        if not (self.blue_file_path and self.red_file_path and self.subjective_file_path):
+            messagebox.showerror("Error", "Please select all CSV files")
+            return
+        try:
+            self.live = LiveAnalysis(self.blue_file_path, self.red_file_path, self.subjective_file_path)
+        except Exception as e:
+            messagebox.showerror("Scoring Schema Error", str(e))
+            return
+        self.watch_button.config(text="Stop Watching")
+        self.poll_files()
+
+    def poll_files(self):
+        # Checks the files every WATCH_INTERVAL_MS and shows the new rankings when rows were added
+        try:
+            team_stats = self.live.update()
+            if team_stats is not None:
+                self.results_text.delete(1.0, tk.END)
+                self.results_text.insert(tk.END, str(team_stats))
+                self.watch_status.config(text=f"Watching: {self.live.rows} match rows, "
+                                              f"updated {time.strftime('%H:%M:%S')}")
+        except Exception as e:
+            # Probably a file in the middle of being saved, keep watching
+            self.watch_status.config(text=f"Watching: error reading files: {e}")
+        self.watch_job = self.root.after(WATCH_INTERVAL_MS, self.poll_files)
+
 def main():
     root = tk.Tk()
     app = RobotScoutingApp(root)
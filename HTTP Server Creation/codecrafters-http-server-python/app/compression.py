@@ -0,0 +1,61 @@
+import zlib
+
+
+#Accept-Encoding negotiation and gzip/deflate encoding of response bodies
+
+# wbits picks the container, 31 = gzip header, 15 = zlib (what HTTP calls deflate)
+WBITS = {"gzip": 31, "deflate": 15}
+LEVEL = 6
+BLOCK_SIZE = 64 * 1024
+
+
+def choose_encoding(accept_encoding):
+    # best encoding we support from the client's header, gzip wins ties, None means send it as is
+    if not accept_encoding:
+        return None
+    best = None
+    best_q = 0.0
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                continue
+        candidates = ("gzip", "deflate") if coding == "*" else (coding,)
+        for candidate in candidates:
+            if candidate in WBITS and (q > best_q or (q == best_q and candidate == "gzip")):
+                best, best_q = candidate, q
+    return best
+
+
+def compress(data, encoding):
+    compressor = zlib.compressobj(LEVEL, zlib.DEFLATED, WBITS[encoding])
+    return compressor.compress(data) + compressor.flush()
+
+
+def compress_stream(f, encoding):
+    # compress an open file a block at a time so memory stays flat no matter how big it is
+    with f:
+        compressor = zlib.compressobj(LEVEL, zlib.DEFLATED, WBITS[encoding])
+        while True:
+            block = f.read(BLOCK_SIZE)
+            if not block:
+                break
+            data = compressor.compress(block)
+            if data:
+                yield data
+        yield compressor.flush()
+
+
+def encode_body(request, body, min_size):
+    # returns (extra headers, body) for a small in-memory response like /echo/
+    if min_size is None or len(body) < min_size:
+        return [], body
+    encoding = choose_encoding(request.headers.get("accept-encoding"))
+    if encoding is None:
+        return [("Vary", "Accept-Encoding")], body
+    return [("Content-Encoding", encoding), ("Vary", "Accept-Encoding")], compress(body, encoding)
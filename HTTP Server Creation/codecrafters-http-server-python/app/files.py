@@ -0,0 +1,354 @@
+import os
+import re
+import stat
+import tempfile
+import threading
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+
+from app.compression import choose_encoding, compress, compress_stream
+
+
+#static file serving for /files/
+#the body is never read into python, the engines hand the open file to sendfile
+#so a multi GB file costs the same memory as a tiny one
+#small files are kept in FileCache so repeat hits skip the open and read
+#gzip/deflate versions are cached next to them, or picked up from a .gz file beside the original
+#files too big for the cache are compressed on the fly and sent chunked
+#POST uploads are written to a temp file as the body arrives and renamed into place at the end
+
+RANGE_RE = re.compile(r"bytes=(\d*)-(\d*)$")
+
+
+def current_umask():
+    # the only way to read the umask is to set it, done once at import before any threads start
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+# mkstemp makes the temp file 0600, an uploaded file gets the mode open() would have given it
+UPLOAD_MODE = 0o666 & ~current_umask()
+
+
+class FileBody:
+    # an open file plus the slice of it that should go out on the socket
+    __slots__ = ("file", "offset", "count")
+
+    def __init__(self, file, offset, count):
+        self.file = file
+        self.offset = offset
+        self.count = count
+
+    def close(self):
+        self.file.close()
+
+
+class ChunkedBody:
+    # a body of unknown length, sent with Transfer-Encoding: chunked
+    # file is closed here too since a generator that never started won't close it
+    __slots__ = ("chunks", "file")
+
+    def __init__(self, chunks, file=None):
+        self.chunks = chunks
+        self.file = file
+
+    def close(self):
+        self.chunks.close()
+        if self.file is not None:
+            self.file.close()
+
+
+class Upload:
+    # one POST /files/<name> in progress, the engine feeds it the body straight from the socket
+    def __init__(self, path, stream):
+        self.path = path
+        self.stream = stream
+        self.request = None  # set by the engine, with reply = (route, status, headers) to send when done
+        self.reply = None
+        # same directory as the target so the final rename can't cross filesystems
+        fd, self.tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".upload-")
+        self.file = open(fd, "wb")
+
+    def feed(self, data):
+        # None while more body is expected, then the bytes that followed the body
+        return self.stream.feed(data, self.file.write)
+
+    def commit(self):
+        # readers see the old file or the whole new one, never half an upload
+        try:
+            self.file.flush()
+            os.fchmod(self.file.fileno(), UPLOAD_MODE)
+            os.fsync(self.file.fileno())
+            self.file.close()
+            os.replace(self.tmp_path, self.path)
+        except OSError:
+            self.abort()
+            raise
+
+    def abort(self):
+        self.file.close()
+        try:
+            os.unlink(self.tmp_path)
+        except OSError:
+            pass
+
+
+def start_upload(root, name, request):
+    # returns an Upload to stream the body into, or (status, headers, body) to refuse it
+    if request.stream is None:
+        # no Content-Length and not chunked, there is no body we could find the end of
+        return 411, [], b""
+    path = resolve(root, name) if name else None
+    if path is None or not os.path.isdir(os.path.dirname(path)) or os.path.isdir(path):
+        return 404, [], b""
+    try:
+        return Upload(path, request.stream)
+    except OSError:
+        return 403, [], b""
+
+
+def resolve(root, name):
+    # map the url name onto a real file under root, None if it escapes root or isn't a file
+    root = os.path.realpath(root)
+    path = os.path.realpath(os.path.join(root, name))
+    if os.path.commonpath([root, path]) != root:
+        return None
+    return path
+
+
+def parse_range(header, size):
+    # returns (start, end) inclusive, None to ignore the header, or "unsatisfiable"
+    m = RANGE_RE.match(header.replace(" ", ""))
+    if not m:
+        # multiple ranges or some other unit, sending the whole file is allowed
+        return None
+    first, last = m.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # suffix range, the last N bytes
+        length = int(last)
+        if length == 0:
+            return "unsatisfiable"
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return "unsatisfiable"
+    return start, end
+
+
+def validators(st, encoding=None):
+    # strong etag from size + mtime in ns, same idea as nginx, no need to hash the contents
+    # each encoding is a different representation so it gets its own tag
+    suffix = f"-{encoding}" if encoding else ""
+    etag = f'"{st.st_size:x}-{st.st_mtime_ns:x}{suffix}"'
+    return [("ETag", etag), ("Last-Modified", formatdate(st.st_mtime, usegmt=True))]
+
+
+def not_modified(request, etag, mtime):
+    # If-None-Match wins over If-Modified-Since when a client sends both
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        # a weak W/ prefix still matches for GET
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return etag in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(mtime) <= since
+    return False
+
+
+class FileCache:
+    # byte bounded LRU of small file contents, keyed on path (or (path, encoding)
+    # for compressed copies) and checked against mtime + size so an edited file is never served stale
+    def __init__(self, max_bytes, max_file_size):
+        self.max_bytes = max_bytes
+        self.max_file_size = max_file_size
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def accepts(self, size):
+        return size <= self.max_file_size and size <= self.max_bytes
+
+    def get(self, key, st):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                mtime_ns, size, body = entry
+                if mtime_ns == st.st_mtime_ns and size == st.st_size:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return body
+                del self.entries[key]
+                self.size -= len(body)
+            self.misses += 1
+            return None
+
+    def put(self, key, st, body):
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old[2])
+            self.entries[key] = (st.st_mtime_ns, st.st_size, body)
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, (_, _, evicted) = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+                self.evictions += 1
+
+    def stats(self):
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self.entries),
+                "bytes": self.size,
+                "max_bytes": self.max_bytes,
+            }
+
+
+def read_file(path, st, cache):
+    # contents of a small file, from the cache when it is still fresh
+    # returns (st, body), st is refreshed if the file changed under us, body is None if it vanished
+    body = cache.get(path, st)
+    if body is not None:
+        return st, body
+    try:
+        with open(path, "rb") as f:
+            st = os.fstat(f.fileno())
+            body = f.read()
+    except OSError:
+        return st, None
+    if cache.accepts(st.st_size):
+        cache.put(path, st, body)
+    return st, body
+
+
+def gz_sibling(path, st):
+    # a foo.txt.gz at least as new as foo.txt can go out as is, no compressing at all
+    gz_path = path + ".gz"
+    try:
+        gz_st = os.stat(gz_path)
+    except OSError:
+        return None
+    if not stat.S_ISREG(gz_st.st_mode) or gz_st.st_mtime_ns < st.st_mtime_ns:
+        return None
+    return gz_path, gz_st
+
+
+def serve_file(root, name, request, cache=None, compress_min_size=None):
+    path = resolve(root, name)
+    if path is None:
+        return 404, [], b""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return 404, [], b""
+    if not stat.S_ISREG(st.st_mode):
+        return 404, [], b""
+
+    headers = [("Content-Type", "application/octet-stream"), ("Accept-Ranges", "bytes")]
+    encoding = None
+    # ranges are about the bytes on disk, so a range request always gets the plain file
+    if compress_min_size is not None and st.st_size >= compress_min_size and "range" not in request.headers:
+        headers.append(("Vary", "Accept-Encoding"))
+        encoding = choose_encoding(request.headers.get("accept-encoding"))
+
+    if encoding == "gzip":
+        sibling = gz_sibling(path, st)
+        if sibling is not None:
+            gz_path, gz_st = sibling
+            return send_file(gz_path, gz_st, request, cache, headers + [("Content-Encoding", "gzip")])
+    if encoding is not None:
+        if cache is not None and cache.accepts(st.st_size):
+            return send_compressed(path, st, request, cache, encoding, headers)
+        # HTTP/1.0 has no chunked encoding, and we can't know the compressed length up front
+        if request.version != "HTTP/1.0":
+            return stream_compressed(path, st, request, encoding, headers)
+    return send_file(path, st, request, cache, headers)
+
+
+def send_compressed(path, st, request, cache, encoding, headers):
+    tags = validators(st, encoding)
+    if not_modified(request, tags[0][1], st.st_mtime):
+        return 304, tags, b""
+
+    # compress once per file version, after that it's a dict lookup
+    body = cache.get((path, encoding), st)
+    if body is None:
+        st, plain = read_file(path, st, cache)
+        if plain is None:
+            return 404, [], b""
+        body = compress(plain, encoding)
+        cache.put((path, encoding), st, body)
+        tags = validators(st, encoding)
+    return 200, headers + tags + [("Content-Encoding", encoding)], body
+
+
+def stream_compressed(path, st, request, encoding, headers):
+    tags = validators(st, encoding)
+    if not_modified(request, tags[0][1], st.st_mtime):
+        return 304, tags, b""
+    try:
+        f = open(path, "rb")
+    except OSError:
+        return 404, [], b""
+    tags = validators(os.fstat(f.fileno()), encoding)
+    return 200, headers + tags + [("Content-Encoding", encoding)], ChunkedBody(compress_stream(f, encoding), f)
+
+
+def send_file(path, st, request, cache, headers):
+    tags = validators(st)
+    if not_modified(request, tags[0][1], st.st_mtime):
+        return 304, tags, b""
+
+    body = None
+    cacheable = cache is not None and cache.accepts(st.st_size)
+    if cacheable:
+        body = cache.get(path, st)
+    if body is None:
+        try:
+            f = open(path, "rb")
+        except OSError:
+            return 404, [], b""
+        # the file may have changed since the stat above, trust the open fd from here on
+        st = os.fstat(f.fileno())
+        tags = validators(st)
+        if cacheable and cache.accepts(st.st_size):
+            with f:
+                body = f.read()
+            cache.put(path, st, body)
+        else:
+            # too big for the cache, stream it
+            body = FileBody(f, 0, st.st_size)
+
+    size = st.st_size
+    headers = headers + tags
+
+    range_header = request.headers.get("range")
+    span = parse_range(range_header, size) if range_header else None
+    if span == "unsatisfiable":
+        if isinstance(body, FileBody):
+            body.close()
+        return 416, headers + [("Content-Range", f"bytes */{size}")], b""
+    if span is None:
+        return 200, headers, body
+
+    start, end = span
+    headers.append(("Content-Range", f"bytes {start}-{end}/{size}"))
+    if isinstance(body, FileBody):
+        return 206, headers, FileBody(body.file, start, end - start + 1)
+    return 206, headers, body[start:end + 1]
@@ -1,78 +1,643 @@
+import argparse
+import asyncio
+import json
+import os
+import signal
 import socket
 import threading
-import re
-from urllib.parse import urlparse
-import os
+import time
+
+from app.compression import encode_body
+from app.files import ChunkedBody, FileBody, FileCache, Upload, serve_file, start_upload
+from app.metrics import AccessLog, Metrics, stats_lines
+from app.pool import WorkerPool
+from app.request import ParseError, RequestParser
+from app.router import Router
+from app.workers import supervise
 
 
-#ok this is the version without the reuse socket because python is stupid and doesn't want to support it
-#to run this, use terminal in the same folder and just do python3 main.py
+#to run this, use terminal in the project folder (the one above app) and do python3 -m app.main
 #then you can execute commands using git bash
+#POST /files/<name> streams the body to disk, so uploads can be any size without using memory
+#uploads only work with --directory, so the server never writes into the folder it runs from
+#add --engine asyncio to serve everything from one event loop instead of the fixed-size thread pool
+#add --workers N to pre-fork N processes sharing the port with SO_REUSEPORT (linux/mac only)
+#SIGTERM or ctrl-c stops accepting, lets in-flight requests finish and then exits
+
+STATUS_TEXT = {
+    100: "Continue",
+    200: "OK",
+    201: "Created",
+    206: "Partial Content",
+    304: "Not Modified",
+    400: "Bad Request",
+    404: "Not Found",
+    403: "Forbidden",
+    405: "Method Not Allowed",
+    411: "Length Required",
+    413: "Content Too Large",
+    416: "Range Not Satisfiable",
+    431: "Request Header Fields Too Large",
+    500: "Internal Server Error",
+    501: "Not Implemented",
+    503: "Service Unavailable",
+}
+
+
+def render(status, headers=(), body=b"", connection=None):
+    # a FileBody or ChunkedBody is sent separately by send_all so only the head comes back for it
+    streamed = not isinstance(body, bytes)
+    lines = [f"HTTP/1.1 {status} {STATUS_TEXT[status]}"]
+    lines.extend(f"{name}: {value}" for name, value in headers)
+    # always send a length, a keep-alive client can't find the end of the body otherwise
+    # (304 has no body and its length would describe the file the client already has)
+    if isinstance(body, ChunkedBody):
+        lines.append("Transfer-Encoding: chunked")
+    elif status != 304:
+        lines.append(f"Content-Length: {body.count if streamed else len(body)}")
+    if connection is not None:
+        lines.append(f"Connection: {connection}")
+    head = ("\r\n".join(lines) + "\r\n\r\n").encode("ascii")
+    return head if streamed else head + body
+
+
+def index(request, config):
+    return 200, [], b""
+
+
+def user_agent(request, config):
+    value = request.headers.get("user-agent")
+    if value is None:
+        return 404, [], b""
+    return 200, [("Content-Type", "text/plain")], value.encode("latin-1")
+
+
+def echo(request, config, text):
+    extra, body = encode_body(request, text.encode("utf-8"), config.compress_min_size)
+    return 200, [("Content-Type", "text/plain")] + extra, body
+
+
+def files(request, config, name):
+    return serve_file(config.directory, name, request, config.file_cache, config.compress_min_size)
+
+
+def upload(request, config, name):
+    # the body is still on the wire here, the engine pumps it into the Upload and answers once it's in
+    if not config.uploads:
+        # no --directory given, we'd be writing into whatever folder the server was started from
+        return 403, [], b""
+    result = start_upload(config.directory, name, request)
+    if isinstance(result, Upload):
+        return 201, [], result
+    return result
+
+
+# the parser hands requests for this route out as soon as the head is in
+upload.streams_body = True
+
+
+def stats(request, config):
+    body = json.dumps({
+        "file_cache": config.file_cache.stats() if config.file_cache else None,
+        "pool": config.pool.stats() if config.pool else None,
+    }).encode("ascii")
+    return 200, [("Content-Type", "application/json")], body
+
+
+def metrics(request, config):
+    lines = config.metrics.prometheus()
+    if config.file_cache:
+        lines += stats_lines("http_file_cache", config.file_cache.stats(), {"hits", "misses", "evictions"})
+    if config.pool:
+        lines += stats_lines("http_pool", config.pool.stats(), {"completed", "rejected"})
+    if config.access_log:
+        lines += stats_lines("http_access_log", {"dropped": config.access_log.dropped}, {"dropped"})
+    body = ("\n".join(lines) + "\n").encode("utf-8")
+    return 200, [("Content-Type", "text/plain; version=0.0.4")], body
+
+
+def build_router():
+    router = Router()
+    router.add("GET", "/", index)
+    router.add("GET", "/user-agent", user_agent)
+    router.add("GET", "/stats", stats)
+    router.add("GET", "/metrics", metrics)
+    router.mount("/echo/", echo, param="text")
+    router.mount("/files/", files, param="name")
+    router.mount("/files/", upload, param="name", methods=("POST",))
+    return router
+
+
+def build_response(request, config):
+    # returns (route name for metrics, status, headers, body)
+    if request.route is None:
+        request.route = config.router.match(request.method, request.path)
+    handler, params, allowed = request.route
+    if handler is None:
+        if allowed:
+            return "unrouted", 405, [("Allow", ", ".join(allowed))], b""
+        return "unrouted", 404, [], b""
+    return (handler.__name__,) + handler(request, config, **params)
+
+
+def streams_body(request, config):
+    # called by the parser once a head with a body is in, routing now tells it whether
+    # to buffer the body or leave it on the socket for the handler to stream
+    request.route = config.router.match(request.method, request.path)
+    return getattr(request.route[0], "streams_body", False)
+
+
+def new_parser(config):
+    return RequestParser(config.max_header_size, config.max_body_size,
+                         stream_body=lambda request: streams_body(request, config))
+
+
+def answer(request, route, status, headers, body, served, config, busy, out, done):
+    # render one response onto out and done, returns whether to close after it
+    # while draining every connection closes after the response it is working on
+    # a streamed body we never read is still in the way of the next request, so that closes too
+    close = (not request.keep_alive or served >= config.max_requests
+             or config.draining.is_set() or busy or request.stream is not None)
+    if close:
+        connection = "close"
+    else:
+        # an HTTP/1.0 client only keeps the connection if we say so
+        connection = "keep-alive" if request.version == "HTTP/1.0" else None
+    data = render(status, headers, body, connection=connection)
+    out.append(data)
+    size = len(data)
+    if not isinstance(body, bytes):
+        out.append(body)
+        # chunked bodies only know their size once sent, count the head for those
+        if isinstance(body, FileBody):
+            size += body.count
+    done.append((route, request.method, request.target, status, size))
+    return close
+
+
+def respond(parser, served, config, busy=False):
+    # answers every complete request the parser has in order, returns
+    # (things to send, requests served so far, close after sending, what was answered, upload)
+    # things to send are bytes or FileBody/ChunkedBody objects for send_all to stream
+    # what was answered is (route, method, target, status, bytes) per request for finish()
+    # upload is an Upload whose body the engine has to pump in before calling finish_upload,
+    # requests after it stay in the parser until then
+    # busy means other clients are waiting for this thread, so don't keep the connection
+    out = []
+    done = []
+    try:
+        for request in parser:
+            served += 1
+            config.metrics.begin()
+            route, status, headers, body = build_response(request, config)
+            if isinstance(body, Upload):
+                body.request = request
+                body.reply = (route, status, headers)
+                return out, served, False, done, body
+            if answer(request, route, status, headers, body, served, config, busy, out, done):
+                return out, served, True, done, None
+    except ParseError as e:
+        data = render(e.status, connection="close")
+        out.append(data)
+        config.metrics.begin()
+        done.append(("invalid", None, None, e.status, len(data)))
+        return out, served, True, done, None
+    return out, served, False, done, None
+
+
+def commit_upload(upload):
+    # True once the upload is in place, False if writing it out failed
+    try:
+        upload.commit()
+    except OSError:
+        return False
+    return True
+
+
+def finish_upload(upload, error, served, config, busy=False, committed=None):
+    # the upload's body is in, or error is the status it failed with
+    # committed is commit_upload's result when the engine already ran it, otherwise it runs here
+    # returns (things to send, close after sending, what was answered) like respond
+    out = []
+    done = []
+    route, status, headers = upload.reply
+    request = upload.request
+    if error is None:
+        if committed is None:
+            committed = commit_upload(upload)
+        if not committed:
+            status, headers = 500, []
+        # the body has been read either way, the connection can carry on
+        request.stream = None
+    else:
+        upload.abort()
+        status, headers = error, []
+    close = answer(request, route, status, headers, b"", served, config, busy, out, done)
+    return out, close, done
+
+
+def wants_continue(request):
+    return request.headers.get("expect", "").lower() == "100-continue"
+
 
+def finish(config, done, started, peer):
+    # count the answered requests once their responses are out (or failed to go out)
+    seconds = time.monotonic() - started
+    for route, method, target, status, size in done:
+        config.metrics.record(route, status, seconds, size)
+        if config.access_log:
+            config.access_log.log(peer, method, target, status, size, seconds, route)
 
-def handle_connection(conn):
-    msg = conn.recv(1024).decode("ascii")
-    if not msg.strip():
+
+def close_files(out):
+    for item in out:
+        if not isinstance(item, bytes):
+            item.close()
+
+
+def frame_chunk(chunk):
+    return b"%x\r\n%s\r\n" % (len(chunk), chunk)
+
+
+def send_all(conn, out):
+    # small responses get batched into one send, files go straight from the fd via sendfile
+    pending = []
+    try:
+        for item in out:
+            if isinstance(item, bytes):
+                pending.append(item)
+                continue
+            if pending:
+                conn.sendall(b"".join(pending))
+                pending = []
+            if isinstance(item, ChunkedBody):
+                for chunk in item.chunks:
+                    if chunk:
+                        conn.sendall(frame_chunk(chunk))
+                pending.append(b"0\r\n\r\n")
+            elif item.count:
+                conn.sendfile(item.file, item.offset, item.count)
+        if pending:
+            conn.sendall(b"".join(pending))
+    finally:
+        close_files(out)
+
+
+async def send_all_async(loop, conn, out, timeout):
+    # timeout covers each write of buffered bytes, a long sendfile only costs us a task not a thread
+    pending = []
+    try:
+        for item in out:
+            if isinstance(item, bytes):
+                pending.append(item)
+                continue
+            if pending:
+                await asyncio.wait_for(loop.sock_sendall(conn, b"".join(pending)), timeout)
+                pending = []
+            if isinstance(item, ChunkedBody):
+                for chunk in item.chunks:
+                    if chunk:
+                        await asyncio.wait_for(loop.sock_sendall(conn, frame_chunk(chunk)), timeout)
+                pending.append(b"0\r\n\r\n")
+            elif item.count:
+                await loop.sock_sendfile(conn, item.file, item.offset, item.count)
+        if pending:
+            await asyncio.wait_for(loop.sock_sendall(conn, b"".join(pending)), timeout)
+    finally:
+        close_files(out)
+
+
+def peer_name(conn):
+    try:
+        return "%s:%s" % conn.getpeername()[:2]
+    except OSError:
+        return None
+
+
+def read_timeout(started, config):
+    # an idle keep-alive connection gets idle_timeout, but once a request starts arriving
+    # all of it has to be in within request_timeout so a slowloris can't trickle bytes forever
+    if started is None:
+        return config.idle_timeout
+    return max(started + config.request_timeout - time.monotonic(), 0.001)
+
+
+def receive_upload(conn, parser, upload, chunk, view, config):
+    # pump an upload's body off the socket into its temp file, returns None once it's all in
+    # or the status to fail it with, reads land in the connection's buffer and go to disk from there
+    try:
+        if wants_continue(upload.request):
+            conn.settimeout(config.write_timeout)
+            conn.sendall(b"HTTP/1.1 100 Continue\r\n\r\n")
+        leftover = upload.feed(parser.take_buffered())
+        # a big upload can take longer than request_timeout, it only has to keep moving
+        conn.settimeout(config.idle_timeout)
+        while leftover is None:
+            n = conn.recv_into(chunk)
+            if not n:
+                raise ConnectionResetError("client went away mid upload")
+            config.metrics.received(n)
+            leftover = upload.feed(view[:n])
+    except ParseError as e:
+        return e.status
+    except OSError:
+        upload.abort()
+        config.metrics.abandon()
+        raise
+    parser.resume(leftover)
+    return None
+
+
+def handle_connection(conn, config, pool=None):
+    peer = peer_name(conn)
+    parser = new_parser(config)
+    chunk = bytearray(65536)
+    view = memoryview(chunk)
+    served = 0
+    started = None  # when the request we are reading began to arrive
+
+    def send(out, done):
+        conn.settimeout(config.write_timeout)
+        try:
+            send_all(conn, out)
+        finally:
+            finish(config, done, started, peer)
+
+    try:
+        while True:
+            conn.settimeout(read_timeout(started, config))
+            n = conn.recv_into(chunk)
+            if not n:
+                break
+            if started is None:
+                started = time.monotonic()
+            config.metrics.received(n)
+            parser.feed(view[:n])
+            while True:
+                out, served, close, done, upload = respond(parser, served, config, busy=pool is not None and pool.busy())
+                if out:
+                    send(out, done)
+                if upload is None:
+                    break
+                # answer what came before the upload first, its own response waits for the body
+                error = receive_upload(conn, parser, upload, chunk, view, config)
+                out, close, done = finish_upload(upload, error, served, config, busy=pool is not None and pool.busy())
+                send(out, done)
+                if close:
+                    break
+                started = time.monotonic() if parser.pending else None
+            if close:
+                break
+            if out:
+                # whatever is left in the parser is the start of the next request
+                started = time.monotonic() if parser.pending else None
+    except OSError:
+        # timeout or the client went away
+        pass
+    finally:
         conn.close()
-        return
-        
-    # Match request line (GET, POST, etc.)
-    m = re.match(r"^(?:GET|POST|PUT|DELETE|HEAD|OPTIONS|PATCH)\s+(\S+)", msg)
-    if not m:
-        conn.send(b"HTTP/1.1 400 Bad Request\r\n\r\n")
+
+
+async def receive_upload_async(loop, conn, parser, upload, chunk, view, config):
+    # same as receive_upload, the file writes are small and buffered so they stay on the loop
+    try:
+        if wants_continue(upload.request):
+            await asyncio.wait_for(loop.sock_sendall(conn, b"HTTP/1.1 100 Continue\r\n\r\n"), config.write_timeout)
+        leftover = upload.feed(parser.take_buffered())
+        while leftover is None:
+            n = await asyncio.wait_for(loop.sock_recv_into(conn, chunk), config.idle_timeout)
+            if not n:
+                raise ConnectionResetError("client went away mid upload")
+            config.metrics.received(n)
+            leftover = upload.feed(view[:n])
+    except ParseError as e:
+        return e.status
+    except (OSError, asyncio.TimeoutError):
+        upload.abort()
+        config.metrics.abandon()
+        raise
+    parser.resume(leftover)
+    return None
+
+
+async def handle_client(conn, slots, config):
+    loop = asyncio.get_running_loop()
+    peer = peer_name(conn)
+    parser = new_parser(config)
+    chunk = bytearray(65536)
+    view = memoryview(chunk)
+    served = 0
+    started = None
+
+    async def send(out, done):
+        try:
+            await send_all_async(loop, conn, out, config.write_timeout)
+        finally:
+            finish(config, done, started, peer)
+
+    try:
+        while True:
+            n = await asyncio.wait_for(loop.sock_recv_into(conn, chunk), read_timeout(started, config))
+            if not n:
+                break
+            if started is None:
+                started = time.monotonic()
+            config.metrics.received(n)
+            parser.feed(view[:n])
+            while True:
+                out, served, close, done, upload = respond(parser, served, config)
+                if out:
+                    await send(out, done)
+                if upload is None:
+                    break
+                error = await receive_upload_async(loop, conn, parser, upload, chunk, view, config)
+                committed = None
+                if error is None:
+                    # fsync on a big upload takes a while, every other connection would wait for it
+                    committed = await loop.run_in_executor(None, commit_upload, upload)
+                out, close, done = finish_upload(upload, error, served, config, committed=committed)
+                await send(out, done)
+                if close:
+                    break
+                started = time.monotonic() if parser.pending else None
+            if close:
+                break
+            if out:
+                started = time.monotonic() if parser.pending else None
+    except (OSError, asyncio.TimeoutError):
+        pass
+    finally:
         conn.close()
-        return
-        
-    url = m.group(1)
-        
-        # Extract User-Agent header
-    user_agent = None
-    for line in msg.split("\r\n"):
-        if line.lower().startswith("user-agent:"):
-            user_agent = line[len("User-Agent:"):].strip()
-
-      # Handle /user-agent request
-    if url == "/user-agent" and user_agent is not None:
-        body = user_agent
-        count = len(body)
-        UAresponse = ("HTTP/1.1 200 OK\r\n" "Content-Type: text/plain\r\n" f"Content-Length: {count}\r\n" "\r\n" f"{body}")
-
-
-        conn.send(UAresponse.encode("ascii"))
-    elif url.startswith("/files/"):
-        file_path = urlparse(url).path
-        file_name = file_path.replace('/files/', '')
-        with open(file_name, "rb") as f:
-            file_contents = f.read()
-            file_size = os.path.getsize(file_path)
-
-            file_response = ("HTTP/1.1 200 OK\r\n" "Content-Type: application/octet-stream\r\n" f"Content-Length: {file_size}\r\n\r\n" f"{file_contents}")
-            conn.send(file_response.encode("ascii"))        
-
-        # Handle /echo/{text} request
-    elif url.startswith("/echo/"):
-        path = urlparse(url).path
-        echo_part = path.replace('/echo/', '')
-        body = echo_part
-        count = len(body)
-        response = ("HTTP/1.1 200 OK\r\n" "Content-Type: text/plain\r\n" f"Content-Length: {count}\r\n" "\r\n"f"{body}")
-        conn.send(response.encode("ascii"))
-    elif url == "/":
-        conn.send(b"HTTP/1.1 200 OK\r\n\r\n")
-    else:
-        conn.send(b"HTTP/1.1 404 Not Found\r\n\r\n")
-    
-   
-    conn.close()
+        slots.release()
 
-def main():
-    server_socket = socket.create_server(("localhost", 4221))
-    print("Server is listening on http://localhost:4221")
 
+async def accept_loop(server_socket, config, tasks):
+    # the semaphore stops us from accepting more than max_connections at once
+    # so extra clients wait in the listen backlog
+    loop = asyncio.get_running_loop()
+    slots = asyncio.Semaphore(config.max_connections)
     while True:
-        conn, _ = server_socket.accept()
-        # Handle each connection in a new thread to allow multiple concurrent connections
-        threading.Thread(target=handle_connection, args=(conn,)).start()
+        await slots.acquire()
+        conn, _ = await loop.sock_accept(server_socket)
+        conn.setblocking(False)
+        task = loop.create_task(handle_client(conn, slots, config))
+        # keep a reference so the task doesn't get garbage collected mid request
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+
+async def serve_asyncio(server_socket, config):
+    # one event loop for every client
+    loop = asyncio.get_running_loop()
+    server_socket.setblocking(False)
+    stop = asyncio.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(signum, stop.set)
+        except (NotImplementedError, RuntimeError):
+            # windows event loops can't do this, ctrl-c still gets us out via KeyboardInterrupt
+            pass
+
+    tasks = set()
+    accepting = loop.create_task(accept_loop(server_socket, config, tasks))
+    await stop.wait()
+
+    # drain: no new connections, let the open ones finish what they are doing
+    config.draining.set()
+    accepting.cancel()
+    server_socket.close()
+    if tasks:
+        await asyncio.wait(tasks, timeout=config.graceful_timeout)
+
+
+def serve_threaded(server_socket, config):
+    def drain(signum, frame):
+        config.draining.set()
+        # the blocked accept below fails once the socket is closed
+        server_socket.close()
+
+    signal.signal(signal.SIGTERM, drain)
+    signal.signal(signal.SIGINT, drain)
+
+    pool = config.pool
+    while not config.draining.is_set():
+        try:
+            conn, _ = server_socket.accept()
+        except OSError:
+            if config.draining.is_set():
+                break
+            raise
+        # Handle each connection on the pool, if it's full shed the connection right away
+        if not pool.submit(handle_connection, conn, config, pool):
+            reject(conn, config)
+
+    # wait for the connections in flight so a worker doesn't exit under them
+    pool.shutdown()
+
+
+def reject(conn, config):
+    # the accept loop must never block on a client, so one non-blocking send and done
+    try:
+        conn.setblocking(False)
+        conn.send(render(503, [("Retry-After", config.retry_after)], connection="close"))
+        conn.shutdown(socket.SHUT_WR)
+    except OSError:
+        pass
+    finally:
+        conn.close()
+
+
+def run_server(config):
+    # reuse_port lets every worker bind the same port, the kernel balances between them
+    server_socket = socket.create_server((config.host, config.port), backlog=config.backlog,
+                                         reuse_port=config.workers > 0)
+    # made here rather than in main so every worker gets its own log thread
+    config.metrics = Metrics()
+    config.access_log = AccessLog(config.access_log_path) if config.access_log_path else None
+    try:
+        if config.engine == "asyncio":
+            asyncio.run(serve_asyncio(server_socket, config))
+        else:
+            config.pool = WorkerPool(config.threads, config.queue_size)
+            serve_threaded(server_socket, config)
+    finally:
+        server_socket.close()
+        if config.access_log:
+            config.access_log.close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Tiny HTTP/1.1 server")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=4221)
+    parser.add_argument("--engine", choices=["threaded", "asyncio"], default="threaded",
+                        help="threaded = fixed-size thread pool (--threads, --queue-size), asyncio = single event loop")
+    parser.add_argument("--max-connections", type=int, default=10000,
+                        help="most connections the asyncio engine will serve at once")
+    parser.add_argument("--threads", type=int, default=64,
+                        help="size of the threaded engine's worker pool")
+    parser.add_argument("--queue-size", type=int, default=256,
+                        help="connections that may wait for a pool thread before we answer 503")
+    parser.add_argument("--retry-after", type=int, default=1,
+                        help="seconds sent in Retry-After when we shed load")
+    parser.add_argument("--backlog", type=int, default=1024,
+                        help="listen backlog for the server socket")
+    parser.add_argument("--idle-timeout", type=float, default=5.0,
+                        help="seconds a keep-alive connection may sit idle before we close it")
+    parser.add_argument("--request-timeout", type=float, default=10.0,
+                        help="seconds a client gets to send a whole request once it has started")
+    parser.add_argument("--write-timeout", type=float, default=30.0,
+                        help="seconds we wait for a slow client to take a response")
+    parser.add_argument("--max-requests", type=int, default=1000,
+                        help="requests served on one connection before we close it")
+    parser.add_argument("--directory",
+                        help="folder /files/ serves from and POST /files/ writes to, "
+                             "without it files are served from . and uploads are refused")
+    parser.add_argument("--cache-size", type=int, default=64 << 20,
+                        help="bytes of small file contents to keep in memory, 0 turns the cache off")
+    parser.add_argument("--cache-max-file", type=int, default=1 << 20,
+                        help="files bigger than this skip the cache and get streamed")
+    parser.add_argument("--compress-min-size", type=int, default=0,
+                        help="bodies smaller than this go out uncompressed, 0 compresses everything "
+                             "the client accepts gzip/deflate for (what the codecrafters tests expect)")
+    parser.add_argument("--no-compress", action="store_true",
+                        help="never compress responses")
+    parser.add_argument("--max-header-size", type=int, default=8192,
+                        help="largest request line + headers we accept, in bytes")
+    parser.add_argument("--max-body-size", type=int, default=1 << 20,
+                        help="largest request body we accept, in bytes")
+    parser.add_argument("--access-log", dest="access_log_path", metavar="PATH",
+                        help="write a JSON line per request here (- for stdout), off by default")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="pre-fork this many worker processes, 0 serves from this process")
+    parser.add_argument("--graceful-timeout", type=float, default=30.0,
+                        help="seconds to let in-flight requests finish on shutdown")
+    config = parser.parse_args(argv)
+    config.uploads = config.directory is not None
+    if config.directory is None:
+        config.directory = "."
+    if config.workers > 0 and not hasattr(os, "fork"):
+        parser.error("--workers needs fork and SO_REUSEPORT, use a single process on windows")
+    return config
+
+
+def main(argv=None):
+    config = parse_args(argv)
+    if config.no_compress:
+        config.compress_min_size = None
+    config.file_cache = FileCache(config.cache_size, config.cache_max_file) if config.cache_size > 0 else None
+    config.draining = threading.Event()
+    config.router = build_router()
+    config.pool = None
+    if config.workers > 0:
+        print(f"Server is listening on http://{config.host}:{config.port} ({config.engine}, {config.workers} workers)")
+        supervise(run_server, config)
+    else:
+        print(f"Server is listening on http://{config.host}:{config.port} ({config.engine})")
+        try:
+            run_server(config)
+        except KeyboardInterrupt:
+            pass
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,188 @@
+import json
+import queue
+import sys
+import threading
+import time
+from bisect import bisect_left
+
+
+#request metrics for /metrics plus the optional access log
+#every thread counts into its own Shard so the request path never takes a lock,
+#/metrics adds the shards up when someone scrapes it
+
+# upper bounds in seconds, anything slower lands in +Inf
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Shard:
+    __slots__ = ("requests", "latency", "in_flight", "bytes_in", "bytes_out")
+
+    def __init__(self):
+        self.requests = {}  # (route, status) -> count
+        self.latency = {}  # route -> [bucket counts..., +Inf count, sum of seconds]
+        self.in_flight = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+
+class Metrics:
+    def __init__(self):
+        self.local = threading.local()
+        self.shards = []
+        self.lock = threading.Lock()  # only taken the first time a thread counts something
+
+    def shard(self):
+        try:
+            return self.local.shard
+        except AttributeError:
+            shard = Shard()
+            with self.lock:
+                self.shards.append(shard)
+            self.local.shard = shard
+            return shard
+
+    def received(self, count):
+        self.shard().bytes_in += count
+
+    def begin(self, count=1):
+        self.shard().in_flight += count
+
+    def abandon(self):
+        # a request that will never get an answer, e.g. the client left mid upload
+        self.shard().in_flight -= 1
+
+    def record(self, route, status, seconds, size):
+        shard = self.shard()
+        shard.in_flight -= 1
+        shard.bytes_out += size
+        key = (route, status)
+        shard.requests[key] = shard.requests.get(key, 0) + 1
+        hist = shard.latency.get(route)
+        if hist is None:
+            hist = shard.latency[route] = [0] * (len(BUCKETS) + 2)
+        hist[bisect_left(BUCKETS, seconds)] += 1
+        hist[-1] += seconds
+
+    def totals(self):
+        requests = {}
+        latency = {}
+        in_flight = bytes_in = bytes_out = 0
+        with self.lock:
+            shards = list(self.shards)
+        for shard in shards:
+            in_flight += shard.in_flight
+            bytes_in += shard.bytes_in
+            bytes_out += shard.bytes_out
+            # copy first, the owning thread may add a key while we read
+            for key, count in list(shard.requests.items()):
+                requests[key] = requests.get(key, 0) + count
+            for route, hist in list(shard.latency.items()):
+                total = latency.setdefault(route, [0] * len(hist))
+                for i, value in enumerate(hist):
+                    total[i] += value
+        return requests, latency, in_flight, bytes_in, bytes_out
+
+    def prometheus(self):
+        requests, latency, in_flight, bytes_in, bytes_out = self.totals()
+        lines = [
+            "# HELP http_requests_total Requests answered, by route and status.",
+            "# TYPE http_requests_total counter",
+        ]
+        for (route, status), count in sorted(requests.items()):
+            lines.append(f'http_requests_total{{route="{route}",status="{status}"}} {count}')
+
+        lines += [
+            "# HELP http_request_duration_seconds Time from the first byte of a request to the last byte of its response.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for route, hist in sorted(latency.items()):
+            cumulative = 0
+            for bound, count in zip(BUCKETS + ("+Inf",), hist):
+                cumulative += count
+                lines.append(f'http_request_duration_seconds_bucket{{route="{route}",le="{bound}"}} {cumulative}')
+            lines.append(f'http_request_duration_seconds_sum{{route="{route}"}} {hist[-1]:.6f}')
+            lines.append(f'http_request_duration_seconds_count{{route="{route}"}} {cumulative}')
+
+        lines += [
+            "# HELP http_requests_in_flight Requests being handled right now.",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {in_flight}",
+            "# HELP http_received_bytes_total Bytes read from clients.",
+            "# TYPE http_received_bytes_total counter",
+            f"http_received_bytes_total {bytes_in}",
+            "# HELP http_sent_bytes_total Response bytes sent to clients.",
+            "# TYPE http_sent_bytes_total counter",
+            f"http_sent_bytes_total {bytes_out}",
+        ]
+        return lines
+
+
+def stats_lines(prefix, stats, counters):
+    # turn one of the stats() dicts (file cache, pool) into prometheus lines
+    lines = []
+    for key, value in stats.items():
+        kind = "counter" if key in counters else "gauge"
+        name = f"{prefix}_{key}_total" if kind == "counter" else f"{prefix}_{key}"
+        lines.append(f"# TYPE {name} {kind}")
+        lines.append(f"{name} {value}")
+    return lines
+
+
+class AccessLog:
+    # one JSON object per line, formatted and written by a background thread
+    # the request path only does a put_nowait, if the writer falls behind we drop lines instead of waiting
+    def __init__(self, path, max_queue=10000):
+        self.queue = queue.Queue(max_queue)
+        self.dropped = 0
+        if path == "-":
+            self.file = sys.stdout.buffer
+            self.owns_file = False
+        else:
+            # unbuffered append so each batch is one write, workers sharing the file won't split lines
+            self.file = open(path, "ab", buffering=0)
+            self.owns_file = True
+        self.thread = threading.Thread(target=self._run, name="access-log", daemon=True)
+        self.thread.start()
+
+    def log(self, peer, method, target, status, size, seconds, route):
+        try:
+            self.queue.put_nowait((time.time(), peer, method, target, status, size, seconds, route))
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            entries = [self.queue.get()]
+            # grab whatever else is waiting so a busy server writes in big batches
+            while len(entries) < 1000:
+                try:
+                    entries.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in entries
+            lines = []
+            for entry in entries:
+                if entry is None:
+                    continue
+                ts, peer, method, target, status, size, seconds, route = entry
+                lines.append(json.dumps({
+                    "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(ts)) + f".{int(ts % 1 * 1000):03d}Z",
+                    "client": peer,
+                    "method": method,
+                    "target": target,
+                    "status": status,
+                    "bytes": size,
+                    "duration_ms": round(seconds * 1000, 3),
+                    "route": route,
+                }))
+            if lines:
+                self.file.write(("\n".join(lines) + "\n").encode("utf-8"))
+                self.file.flush()
+            if stop:
+                return
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+        if self.owns_file:
+            self.file.close()
@@ -0,0 +1,61 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+#fixed size thread pool for the threaded engine
+#at most threads connections are being served and queue_size more wait their turn,
+#past that submit says no and the caller sheds the connection instead of piling up memory
+
+
+class WorkerPool:
+    def __init__(self, threads, queue_size):
+        self.threads = threads
+        self.queue_size = queue_size
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="http-worker")
+        self.slots = threading.BoundedSemaphore(threads + queue_size)
+        self.lock = threading.Lock()
+        self.queued = 0
+        self.active = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def submit(self, fn, *args):
+        # False when every thread is busy and the queue is full
+        if not self.slots.acquire(blocking=False):
+            with self.lock:
+                self.rejected += 1
+            return False
+        with self.lock:
+            self.queued += 1
+        self.executor.submit(self._run, fn, args)
+        return True
+
+    def _run(self, fn, args):
+        with self.lock:
+            self.queued -= 1
+            self.active += 1
+        try:
+            fn(*args)
+        finally:
+            with self.lock:
+                self.active -= 1
+                self.completed += 1
+            self.slots.release()
+
+    def busy(self):
+        # someone is waiting for a thread, keep-alive connections should hand theirs back
+        return self.queued > 0
+
+    def stats(self):
+        with self.lock:
+            return {
+                "threads": self.threads,
+                "active": self.active,
+                "queued": self.queued,
+                "queue_size": self.queue_size,
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
@@ -0,0 +1,302 @@
+from urllib.parse import unquote
+
+
+#incremental HTTP/1.1 request parser
+#feed it bytes as they come off the socket and iterate it to get every request
+#that is complete so far, partial requests just wait in the buffer for the next feed
+#requests picked by stream_body come out as soon as their head is parsed, with a
+#BodyStream to pull the body through instead of a buffered body
+
+HEAD, BODY, CHUNK_SIZE, CHUNK_DATA, CHUNK_END, TRAILER, STREAMING = range(7)
+
+
+class ParseError(Exception):
+    def __init__(self, status, reason):
+        super().__init__(reason)
+        self.status = status
+
+
+class Headers(dict):
+    # keys are stored lowercased so lookups don't care how the client spelled them
+    def __getitem__(self, name):
+        return dict.__getitem__(self, name.lower())
+
+    def __contains__(self, name):
+        return dict.__contains__(self, name.lower())
+
+    def get(self, name, default=None):
+        return dict.get(self, name.lower(), default)
+
+
+class Request:
+    __slots__ = ("method", "target", "path", "query", "version", "headers", "body", "stream", "route")
+
+    def __init__(self, method, target, version, headers, body=b""):
+        self.method = method
+        self.target = target
+        path, _, query = target.partition("?")
+        self.path = unquote(path) if "%" in path else path
+        self.query = query
+        self.version = version
+        self.headers = headers
+        self.body = body
+        self.stream = None  # BodyStream when the body is still on the wire
+        self.route = None  # router match, filled in by whoever routed it early
+
+    @property
+    def keep_alive(self):
+        # HTTP/1.1 stays open unless the client says close, HTTP/1.0 is the other way around
+        token = self.headers.get("connection", "").lower()
+        if self.version == "HTTP/1.0":
+            return token == "keep-alive"
+        return token != "close"
+
+    def __repr__(self):
+        return f"<Request {self.method} {self.target}>"
+
+
+class BodyStream:
+    # decodes a body (Content-Length or chunked) as it comes off the socket and hands
+    # each piece straight to write() without keeping any of it
+    def __init__(self, length=None, max_line=8192):
+        self.chunked = length is None
+        self.remaining = 0 if self.chunked else length
+        self.state = CHUNK_SIZE if self.chunked else BODY
+        self.line = bytearray()
+        self.max_line = max_line
+        self.received = 0
+
+    def feed(self, data, write):
+        # returns None while more body is expected, then the bytes that came after it
+        # (the start of the next pipelined request)
+        view = memoryview(data)
+        pos = 0
+        end = len(view)
+        while True:
+            if self.state == BODY or self.state == CHUNK_DATA:
+                take = min(self.remaining, end - pos)
+                if take:
+                    write(view[pos:pos + take])
+                    pos += take
+                    self.remaining -= take
+                    self.received += take
+                if self.remaining:
+                    return None
+                if self.state == BODY:
+                    return bytes(view[pos:])
+                self.state = CHUNK_END
+                continue
+
+            # the framing lines around chunks, they can be split across reads
+            if pos == end:
+                return None
+            window = bytes(view[pos:pos + 256])
+            newline = window.find(b"\n")
+            if newline == -1:
+                self.line += window
+                pos += len(window)
+                if len(self.line) > self.max_line:
+                    raise ParseError(400, "line too long")
+                continue
+            self.line += window[:newline + 1]
+            pos += newline + 1
+            line = bytes(self.line).rstrip(b"\r\n")
+            self.line.clear()
+
+            if self.state == CHUNK_SIZE:
+                try:
+                    self.remaining = int(line.split(b";", 1)[0].strip(), 16)
+                except ValueError:
+                    raise ParseError(400, "bad chunk size") from None
+                self.state = CHUNK_DATA if self.remaining else TRAILER
+            elif self.state == CHUNK_END:
+                if line:
+                    raise ParseError(400, "chunk not followed by CRLF")
+                self.state = CHUNK_SIZE
+            elif not line:
+                # blank line after the trailers, body done
+                self.state = BODY
+                return bytes(view[pos:])
+
+
+class RequestParser:
+    def __init__(self, max_header_size=8192, max_body_size=1 << 20, stream_body=None):
+        self.max_header_size = max_header_size
+        self.max_body_size = max_body_size
+        self.stream_body = stream_body  # request -> True to hand its body out as a BodyStream
+        self.buf = bytearray()
+        self.pos = 0  # start of the bytes we haven't consumed yet
+        self.scan_from = 0  # where to resume looking for the end of the head
+        self.state = HEAD
+        self.request = None
+        self.remaining = 0
+        self.body = None
+
+    def feed(self, data):
+        # drop what earlier requests used up before growing the buffer again
+        if self.pos:
+            del self.buf[:self.pos]
+            self.scan_from -= self.pos
+            self.pos = 0
+        self.buf += data
+
+    @property
+    def pending(self):
+        # part of a request has arrived but not all of it
+        return self.state != HEAD or self.pos < len(self.buf)
+
+    def take_buffered(self):
+        # the body bytes that arrived along with a streamed request's head
+        data = bytes(self.buf[self.pos:])
+        self.pos = len(self.buf)
+        return data
+
+    def resume(self, leftover):
+        # the streamed body is done, carry on parsing with whatever followed it
+        self.state = HEAD
+        self.feed(leftover)
+
+    def __iter__(self):
+        while True:
+            request = self.next_request()
+            if request is None:
+                return
+            yield request
+
+    def next_request(self):
+        # returns the next complete request or None if we need more bytes
+        while True:
+            if self.state == HEAD:
+                if not self._parse_head():
+                    return None
+            elif self.state == STREAMING:
+                # hand the request out once, then wait for resume()
+                request, self.request = self.request, None
+                return request
+            elif self.state == BODY:
+                if len(self.buf) - self.pos < self.remaining:
+                    return None
+                end = self.pos + self.remaining
+                self.request.body = bytes(self.buf[self.pos:end])
+                self.pos = end
+                return self._finish()
+            elif self.state == CHUNK_SIZE:
+                line = self._read_line()
+                if line is None:
+                    return None
+                size = line.split(b";", 1)[0].strip()
+                try:
+                    self.remaining = int(size, 16)
+                except ValueError:
+                    raise ParseError(400, "bad chunk size") from None
+                if len(self.body) + self.remaining > self.max_body_size:
+                    raise ParseError(413, "body too large")
+                self.state = CHUNK_DATA if self.remaining else TRAILER
+            elif self.state == CHUNK_DATA:
+                if len(self.buf) - self.pos < self.remaining:
+                    return None
+                end = self.pos + self.remaining
+                self.body += memoryview(self.buf)[self.pos:end]
+                self.pos = end
+                self.state = CHUNK_END
+            elif self.state == CHUNK_END:
+                line = self._read_line()
+                if line is None:
+                    return None
+                if line:
+                    raise ParseError(400, "chunk not followed by CRLF")
+                self.state = CHUNK_SIZE
+            elif self.state == TRAILER:
+                # trailers are allowed but we have no use for them
+                line = self._read_line()
+                if line is None:
+                    return None
+                if not line:
+                    self.request.body = bytes(self.body)
+                    return self._finish()
+
+    def _read_line(self):
+        end = self.buf.find(b"\r\n", self.pos)
+        if end == -1:
+            if len(self.buf) - self.pos > self.max_header_size:
+                raise ParseError(400, "line too long")
+            return None
+        line = bytes(self.buf[self.pos:end])
+        self.pos = end + 2
+        return line
+
+    def _parse_head(self):
+        # tolerate stray blank lines between pipelined requests
+        while self.buf.startswith(b"\r\n", self.pos):
+            self.pos += 2
+
+        end = self.buf.find(b"\r\n\r\n", max(self.pos, self.scan_from))
+        if end == -1:
+            if len(self.buf) - self.pos > self.max_header_size:
+                raise ParseError(431, "request head too large")
+            # the terminator may straddle this read and the next one
+            self.scan_from = max(self.pos, len(self.buf) - 3)
+            return False
+        if end - self.pos > self.max_header_size:
+            raise ParseError(431, "request head too large")
+
+        # decode the head once, every header lookup after this is a dict hit
+        lines = self.buf[self.pos:end].decode("latin-1").split("\r\n")
+        self.pos = end + 4
+        self.scan_from = self.pos
+
+        parts = lines[0].split(" ")
+        if len(parts) != 3 or not parts[0].isalpha() or not parts[2].startswith("HTTP/1."):
+            raise ParseError(400, "bad request line")
+        method, target, version = parts
+
+        fields = {}
+        for line in lines[1:]:
+            name, sep, value = line.partition(":")
+            # an empty name also lands here since "" is in every string
+            if not sep or name[-1:] in " \t":
+                raise ParseError(400, "bad header line")
+            name = name.lower()
+            if name in fields:
+                fields[name] += ", " + value.strip()
+            else:
+                fields[name] = value.strip()
+        headers = Headers(fields)
+
+        self.request = Request(method, target, version, headers)
+        transfer_encoding = headers.get("transfer-encoding")
+        content_length = headers.get("content-length")
+        if transfer_encoding is not None:
+            if content_length is not None:
+                raise ParseError(400, "both Content-Length and Transfer-Encoding")
+            if transfer_encoding.lower().rsplit(",", 1)[-1].strip() != "chunked":
+                raise ParseError(501, "unsupported transfer encoding")
+            if self.stream_body is not None and self.stream_body(self.request):
+                self.request.stream = BodyStream(None, self.max_header_size)
+                self.state = STREAMING
+                return True
+            self.body = bytearray()
+            self.state = CHUNK_SIZE
+        elif content_length is not None:
+            if not content_length.isdigit():
+                raise ParseError(400, "bad Content-Length")
+            self.remaining = int(content_length)
+            # streamed bodies go to disk, not memory, so the size limit doesn't apply to them
+            if self.stream_body is not None and self.stream_body(self.request):
+                self.request.stream = BodyStream(self.remaining, self.max_header_size)
+                self.state = STREAMING
+                return True
+            if self.remaining > self.max_body_size:
+                raise ParseError(413, "body too large")
+            self.state = BODY
+        else:
+            self.state = BODY
+            self.remaining = 0
+        return True
+
+    def _finish(self):
+        request = self.request
+        self.request = None
+        self.body = None
+        self.state = HEAD
+        return request
@@ -0,0 +1,98 @@
+#method + path dispatch for the server
+#static paths live in one dict so the common case is a single lookup,
+#{param} segments and prefix mounts live in a trie walked one segment at a time
+#everything is built as routes are added at startup, matching never scans a list of routes
+
+
+class Node:
+    __slots__ = ("children", "param", "handlers", "mounts")
+
+    def __init__(self):
+        self.children = {}  # literal segment -> Node
+        self.param = None  # (name, Node) for a {name} segment
+        self.handlers = {}  # method -> handler for a route ending here
+        self.mounts = {}  # method -> (handler, param name) for a prefix mount ending here
+
+
+def segments(pattern):
+    if not pattern.startswith("/"):
+        raise ValueError(f"route {pattern!r} must start with /")
+    return pattern.strip("/").split("/") if pattern.strip("/") else []
+
+
+class Router:
+    def __init__(self):
+        self.static = {}  # full path -> {method: handler}
+        self.root = Node()
+
+    def add(self, method, pattern, handler):
+        if "{" not in pattern:
+            self.static.setdefault(pattern, {})[method] = handler
+            return
+        node = self.root
+        for segment in segments(pattern):
+            if segment.startswith("{") and segment.endswith("}"):
+                name = segment[1:-1]
+                if node.param is None:
+                    node.param = (name, Node())
+                elif node.param[0] != name:
+                    raise ValueError(f"{pattern!r} names a segment {{{name}}}, another route calls it {{{node.param[0]}}}")
+                node = node.param[1]
+            else:
+                node = node.children.setdefault(segment, Node())
+        if method in node.handlers:
+            raise ValueError(f"{method} {pattern} is already routed")
+        node.handlers[method] = handler
+
+    def mount(self, prefix, handler, param="path", methods=("GET",)):
+        # everything under prefix (which must end in /) goes to handler,
+        # the rest of the path after the prefix is passed as param
+        if not prefix.endswith("/") or "{" in prefix:
+            raise ValueError(f"mount prefix {prefix!r} must be a literal path ending in /")
+        node = self.root
+        for segment in segments(prefix):
+            node = node.children.setdefault(segment, Node())
+        for method in methods:
+            node.mounts[method] = (handler, param)
+
+    def match(self, method, path):
+        # returns (handler, params, allowed methods)
+        # handler is None with allowed empty for 404, with allowed filled in for 405
+        handlers = self.static.get(path)
+        if handlers is not None:
+            params = {}
+        else:
+            handlers, params = self._walk(path)
+            if handlers is None:
+                return None, {}, ()
+        entry = handlers.get(method)
+        if entry is None:
+            return None, {}, tuple(sorted(handlers))
+        if isinstance(entry, tuple):
+            # a mount, hand over the rest of the path
+            handler, name = entry
+            params[name] = params.pop("__rest__")
+            return handler, params, ()
+        return entry, params, ()
+
+    def _walk(self, path):
+        node = self.root
+        params = {}
+        best = None, None
+        pos = 1  # where the segment we are about to consume starts in path
+        parts = path[1:].split("/")
+        for segment in parts:
+            if node.mounts:
+                # remember the deepest mount, it's the fallback if nothing more specific matches
+                best = node.mounts, {**params, "__rest__": path[pos:]}
+            child = node.children.get(segment)
+            if child is None:
+                if node.param is None or not segment:
+                    return best
+                name, child = node.param
+                params[name] = segment
+            node = child
+            pos += len(segment) + 1
+        if node.handlers:
+            return node.handlers, params
+        return best
@@ -0,0 +1,80 @@
+import os
+import signal
+import sys
+import time
+import traceback
+
+
+#pre-fork supervisor for --workers N
+#every worker opens its own listening socket with SO_REUSEPORT and the kernel
+#spreads new connections across them, so N workers get N cores instead of one GIL
+
+RESPAWN_BACKOFF = 1.0  # a worker that dies faster than this is crash looping, wait before the next one
+POLL_INTERVAL = 0.1
+
+
+def spawn(run_worker, config):
+    pid = os.fork()
+    if pid:
+        return pid
+    # child: the supervisor's signal handlers must not leak into the worker
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    code = 1
+    try:
+        run_worker(config)
+        code = 0
+    except BaseException:
+        traceback.print_exc()
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(code)
+
+
+def supervise(run_worker, config):
+    workers = {}  # pid -> when it was started
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        if stopping:
+            return
+        stopping = True
+        print(f"supervisor: got signal {signum}, draining {len(workers)} workers")
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for _ in range(config.workers):
+        workers[spawn(run_worker, config)] = time.monotonic()
+
+    deadline = None
+    while workers:
+        if stopping and deadline is None:
+            deadline = time.monotonic() + config.graceful_timeout
+        if deadline is not None and time.monotonic() > deadline:
+            for pid in list(workers):
+                print(f"supervisor: worker {pid} did not drain in time, killing it")
+                os.kill(pid, signal.SIGKILL)
+            deadline = float("inf")
+
+        pid, status = os.waitpid(-1, os.WNOHANG)
+        if pid == 0:
+            time.sleep(POLL_INTERVAL)
+            continue
+        started = workers.pop(pid, None)
+        if started is None or stopping:
+            continue
+
+        print(f"supervisor: worker {pid} exited with status {os.waitstatus_to_exitcode(status)}, restarting")
+        if time.monotonic() - started < RESPAWN_BACKOFF:
+            time.sleep(RESPAWN_BACKOFF)
+            if stopping:
+                continue
+        workers[spawn(run_worker, config)] = time.monotonic()
@@ -0,0 +1,270 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from multiprocessing import Pool
+
+
+#load generator and benchmark suite for the server, no external tools needed
+#starts app.main in each engine, drives every route at each concurrency with and without
+#keep-alive and prints req/s, p50/p95/p99 latency and error rate
+#run from this folder: python3 bench.py
+#   python3 bench.py --scenarios echo files --concurrency 1000 10000 --json after.json --compare before.json
+#save a run with --json and compare it against a later one (another engine, --workers, a new commit)
+#10k connections needs ulimit -n well above 20000 since both ends live on this machine
+
+# scenario name -> path it hammers, files gets a file written by the suite
+SCENARIOS = {
+    "index": "/",
+    "echo": "/echo/hello",
+    "user-agent": "/user-agent",
+    "files": "/files/bench.bin",
+}
+
+
+def wait_for_port(host, port, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"server on {host}:{port} never came up")
+
+
+def start_server(engine, host, port, workers=0, directory=".", extra=()):
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "app.main", "--engine", engine, "--host", host, "--port", str(port),
+         "--workers", str(workers), "--directory", directory, *extra],
+        stdout=subprocess.DEVNULL,
+    )
+    wait_for_port(host, port)
+    return proc
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))
+    return sorted_values[index]
+
+
+async def read_response(reader):
+    # returns (status, whether the server is closing the connection)
+    head = await reader.readuntil(b"\r\n\r\n")
+    length = 0
+    close = False
+    for line in head.split(b"\r\n"):
+        name, _, value = line.partition(b":")
+        name = name.lower()
+        if name == b"content-length":
+            length = int(value)
+        elif name == b"connection":
+            close = value.strip().lower() == b"close"
+    # read big bodies in pieces so a files run doesn't allocate the whole file per response
+    while length:
+        data = await reader.read(min(length, 1 << 20))
+        if not data:
+            raise asyncio.IncompleteReadError(b"", length)
+        length -= len(data)
+    return int(head.split(b" ", 2)[1]), close
+
+
+async def client(host, port, request, keep_alive, stop_at, latencies, statuses):
+    # keep_alive reuses one connection for every request, otherwise each
+    # request pays for its own connect and teardown
+    reader = writer = None
+    while time.monotonic() < stop_at:
+        start = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            writer.write(request)
+            await writer.drain()
+            status, closing = await read_response(reader)
+        except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            statuses["conn-error"] += 1
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+            await asyncio.sleep(0.01)
+            continue
+        statuses[status] += 1
+        # only successful responses go into the latency numbers, a fast 503 isn't a fast request
+        if status < 400:
+            latencies.append(time.perf_counter() - start)
+        if not keep_alive or closing:
+            writer.close()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def run_load(host, port, path, concurrency, duration, keep_alive):
+    # returns (latencies, statuses, seconds it took) for one process worth of clients
+    connection = "keep-alive" if keep_alive else "close"
+    request = (f"GET {path} HTTP/1.1\r\nHost: {host}\r\nUser-Agent: bench\r\n"
+               f"Connection: {connection}\r\n\r\n").encode("ascii")
+    latencies = []
+    statuses = Counter()
+    stop_at = time.monotonic() + duration
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, request, keep_alive, stop_at, latencies, statuses)
+                           for _ in range(concurrency)))
+    return latencies, statuses, time.perf_counter() - start
+
+
+def load_process(job):
+    # entry point for --procs, one event loop per process
+    return asyncio.run(run_load(*job))
+
+
+def measure(host, port, path, concurrency, duration, keep_alive, procs):
+    # a single python client tops out around one core, --procs spreads the clients
+    # over several processes so the load generator isn't what we end up measuring
+    procs = max(1, min(procs, concurrency))
+    if procs == 1:
+        parts = [asyncio.run(run_load(host, port, path, concurrency, duration, keep_alive))]
+    else:
+        shares = [concurrency // procs + (i < concurrency % procs) for i in range(procs)]
+        with Pool(procs) as pool:
+            parts = pool.map(load_process, [(host, port, path, n, duration, keep_alive) for n in shares])
+
+    latencies = []
+    statuses = Counter()
+    elapsed = 0.0
+    for part_latencies, part_statuses, part_elapsed in parts:
+        latencies += part_latencies
+        statuses.update(part_statuses)
+        elapsed = max(elapsed, part_elapsed)
+    latencies.sort()
+    total = sum(statuses.values())
+    errors = total - len(latencies)
+    return {
+        "requests": total,
+        "errors": errors,
+        "error_rate": errors / total if total else 0.0,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": (latencies[-1] if latencies else 0.0) * 1000,
+        "statuses": {str(status): count for status, count in sorted(statuses.items(), key=str)},
+    }
+
+
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        dirty = subprocess.run(["git", "status", "--porcelain", "--", "app"], capture_output=True, text=True)
+        return out.stdout.strip() + ("-dirty" if dirty.stdout.strip() else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def result_key(r):
+    return (r["engine"], r["workers"], r["scenario"], r["connection"], r["concurrency"])
+
+
+def print_header():
+    print(f"{'engine':<10} {'scenario':<11} {'connection':<11} {'conns':>6} {'reqs':>8} {'err%':>6} "
+          f"{'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+
+
+def print_row(r, baseline=None):
+    line = (f"{r['engine']:<10} {r['scenario']:<11} {r['connection']:<11} {r['concurrency']:>6} "
+            f"{r['requests']:>8} {r['error_rate'] * 100:>6.2f} {r['rps']:>9.0f} "
+            f"{r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f}")
+    if baseline is not None:
+        # positive is better for both: more req/s, less p99
+        rps = (r["rps"] / baseline["rps"] - 1) * 100 if baseline["rps"] else 0.0
+        p99 = (1 - r["p99_ms"] / baseline["p99_ms"]) * 100 if baseline["p99_ms"] else 0.0
+        line += f"   vs baseline: req/s {rps:+.1f}%  p99 {p99:+.1f}%"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the HTTP server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4321)
+    parser.add_argument("--engines", nargs="+", default=["threaded", "asyncio"])
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--duration", type=float, default=5.0,
+                        help="seconds of load per combination")
+    parser.add_argument("--connection", nargs="+", choices=["close", "keep-alive"],
+                        default=["close", "keep-alive"],
+                        help="close = new connection per request, keep-alive = reuse one per client")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="run the server with --workers N, 0 is a single process")
+    parser.add_argument("--procs", type=int, default=1,
+                        help="load generator processes, raise it once the client is the bottleneck")
+    parser.add_argument("--file-size", type=int, default=64 * 1024,
+                        help="bytes in the file the files scenario downloads")
+    parser.add_argument("--server-arg", action="append", default=[], metavar="ARG",
+                        help="extra argument for app.main, repeat for more (--server-arg=--threads=128)")
+    parser.add_argument("--json", metavar="PATH", help="save the results here")
+    parser.add_argument("--compare", metavar="PATH", help="an earlier --json file to show the change against")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = {result_key(r): r for r in json.load(f)["results"]}
+
+    directory = tempfile.mkdtemp(prefix="bench-files-")
+    with open(os.path.join(directory, "bench.bin"), "wb") as f:
+        f.write(os.urandom(args.file_size))
+
+    results = []
+    print_header()
+    try:
+        for engine in args.engines:
+            proc = start_server(engine, args.host, args.port, args.workers, directory, args.server_arg)
+            try:
+                for scenario in args.scenarios:
+                    for connection in args.connection:
+                        for concurrency in args.concurrency:
+                            r = measure(args.host, args.port, SCENARIOS[scenario], concurrency,
+                                        args.duration, connection == "keep-alive", args.procs)
+                            r = {"engine": engine, "workers": args.workers, "scenario": scenario,
+                                 "connection": connection, "concurrency": concurrency, **r}
+                            results.append(r)
+                            print_row(r, baseline.get(result_key(r)))
+            finally:
+                proc.terminate()
+                proc.wait()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    if args.json:
+        report = {
+            "commit": git_commit(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "settings": {
+                "duration": args.duration,
+                "procs": args.procs,
+                "file_size": args.file_size,
+                "server_args": args.server_arg,
+            },
+            "results": results,
+        }
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"saved {len(results)} results to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import argparse
+import re
+import time
+
+from app.request import RequestParser
+
+
+#micro benchmark for app/request.py, no sockets involved
+#run from this folder: python3 bench_parser.py
+
+SMALL = (b"GET /echo/hello HTTP/1.1\r\nHost: localhost:4221\r\n"
+         b"User-Agent: curl/8.4.0\r\nAccept: */*\r\n\r\n")
+
+BROWSER = (b"GET /files/report.txt HTTP/1.1\r\nHost: localhost:4221\r\n"
+           b"User-Agent: Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko)\r\n"
+           b"Accept: text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8\r\n"
+           b"Accept-Language: en-US,en;q=0.9\r\nAccept-Encoding: gzip, deflate, br\r\n"
+           b"Cookie: " + b"session=" + b"x" * 600 + b"\r\n"
+           b"Cache-Control: max-age=0\r\nConnection: keep-alive\r\n\r\n")
+
+CHUNKED = (b"POST /files/upload HTTP/1.1\r\nHost: localhost\r\nTransfer-Encoding: chunked\r\n\r\n"
+           + b"".join(b"400\r\n" + b"z" * 1024 + b"\r\n" for _ in range(8)) + b"0\r\n\r\n")
+
+
+def legacy_parse(msg):
+    # what main.py used to do per request: decode, regex, split every line
+    text = msg.decode("ascii")
+    m = re.match(r"^(?:GET|POST|PUT|DELETE|HEAD|OPTIONS|PATCH)\s+(\S+)", text)
+    user_agent = None
+    for line in text.split("\r\n"):
+        if line.lower().startswith("user-agent:"):
+            user_agent = line[len("User-Agent:"):].strip()
+    return m.group(1), user_agent
+
+
+def bench(name, fn, count):
+    start = time.perf_counter()
+    fn(count)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<34} {count / elapsed:>12,.0f} req/s {elapsed / count * 1e6:>8.2f} us/req")
+
+
+def whole(raw):
+    def run(count):
+        for _ in range(count):
+            parser = RequestParser()
+            parser.feed(raw)
+            parser.next_request().headers.get("user-agent")
+    return run
+
+
+def pipelined(raw, depth=32):
+    batch = raw * depth
+
+    def run(count):
+        parser = RequestParser()
+        for _ in range(count // depth):
+            parser.feed(batch)
+            for request in parser:
+                request.headers.get("user-agent")
+    return run
+
+
+def segmented(raw, size):
+    pieces = [raw[i:i + size] for i in range(0, len(raw), size)]
+
+    def run(count):
+        parser = RequestParser()
+        for _ in range(count):
+            for piece in pieces:
+                parser.feed(piece)
+                parser.next_request()
+    return run
+
+
+def legacy(raw):
+    def run(count):
+        for _ in range(count):
+            legacy_parse(raw)
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the request parser")
+    parser.add_argument("--count", type=int, default=100000)
+    args = parser.parse_args()
+
+    bench("legacy regex+split, small", legacy(SMALL), args.count)
+    bench("legacy regex+split, browser", legacy(BROWSER), args.count)
+    bench("parser, small", whole(SMALL), args.count)
+    bench("parser, browser", whole(BROWSER), args.count)
+    bench("parser, small pipelined x32", pipelined(SMALL), args.count)
+    bench("parser, browser in 64 byte reads", segmented(BROWSER, 64), args.count // 10)
+    bench("parser, 8 KB chunked body", whole(CHUNKED), args.count // 10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import argparse
+import random
+import time
+
+from app.router import Router
+
+
+#dispatch cost vs number of routes, the old if/elif chain against app/router.py
+#run from this folder: python3 bench_router.py --routes 10 100 1000
+
+
+def handler(request=None, config=None, **params):
+    return params
+
+
+def make_routes(count):
+    # a third each of static paths, {param} routes and prefix mounts, like a real api
+    routes = []
+    for i in range(count):
+        kind = i % 3
+        if kind == 0:
+            routes.append(("static", f"/api/v1/resource{i}", f"/api/v1/resource{i}"))
+        elif kind == 1:
+            routes.append(("param", f"/api/v1/items{i}/{{id}}", f"/api/v1/items{i}/42"))
+        else:
+            routes.append(("mount", f"/static{i}/", f"/static{i}/css/site.css"))
+    return routes
+
+
+def build_chain(routes):
+    # what handle_connection used to do: try every route in order with == / startswith
+    def dispatch(method, path):
+        for kind, pattern, _ in routes:
+            if kind == "static":
+                if path == pattern:
+                    return handler, {}
+            elif kind == "mount":
+                if path.startswith(pattern):
+                    return handler, {"path": path[len(pattern):]}
+            else:
+                prefix = pattern[:pattern.index("{")]
+                if path.startswith(prefix) and "/" not in path[len(prefix):]:
+                    return handler, {"id": path[len(prefix):]}
+        return None, {}
+    return dispatch
+
+
+def build_router(routes):
+    router = Router()
+    for kind, pattern, _ in routes:
+        if kind == "mount":
+            router.mount(pattern, handler)
+        else:
+            router.add("GET", pattern, handler)
+    return router.match
+
+
+def bench(dispatch, paths, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for path in paths:
+            dispatch("GET", path)
+    return (time.perf_counter() - start) / (rounds * len(paths)) * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark route dispatch")
+    parser.add_argument("--routes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--lookups", type=int, default=200000)
+    args = parser.parse_args()
+
+    print(f"{'routes':>7} {'chain ns':>10} {'router ns':>10} {'speedup':>8}")
+    for count in args.routes:
+        routes = make_routes(count)
+        rng = random.Random(count)
+        paths = [rng.choice(routes)[2] for _ in range(1000)] + ["/not/routed"] * 10
+        rounds = max(1, args.lookups // len(paths))
+        chain_ns = bench(build_chain(routes), paths, rounds)
+        router_ns = bench(build_router(routes), paths, rounds)
+        print(f"{count:>7} {chain_ns:>10.0f} {router_ns:>10.0f} {chain_ns / router_ns:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
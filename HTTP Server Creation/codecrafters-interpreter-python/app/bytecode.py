@@ -0,0 +1,46 @@
+#bytecode format for run --vm
+#every instruction is two ints in the function's code array, the opcode and its argument
+#(0 when it has none), so the VM reads both with two indexes and never decodes lengths
+#jump arguments are absolute positions in the code array
+#lines has one entry per instruction for runtime error messages
+#VERSION goes into every bytecode cache file, bump it whenever the opcodes or what the
+#compiler emits for something changes so old cache files get recompiled
+
+VERSION = 2
+
+OPCODES = (
+    "CONSTANT", "NIL", "TRUE", "FALSE", "POP",
+    "GET_LOCAL", "SET_LOCAL", "GET_GLOBAL", "DEFINE_GLOBAL", "SET_GLOBAL",
+    "GET_UPVALUE", "SET_UPVALUE", "CLOSE_UPVALUE",
+    "EQUAL", "NOT_EQUAL", "GREATER", "GREATER_EQUAL", "LESS", "LESS_EQUAL",
+    "ADD", "SUBTRACT", "MULTIPLY", "DIVIDE", "NOT", "NEGATE",
+    "PRINT", "JUMP", "POP_JUMP_IF_FALSE", "JUMP_IF_FALSE", "JUMP_IF_TRUE",
+    "CALL", "CLOSURE", "RETURN",
+    # only in code instrumented by the profiler, never emitted by the compiler or cached
+    "COUNT", "ENTER", "LEAVE",
+)
+
+(CONSTANT, NIL, TRUE, FALSE, POP,
+ GET_LOCAL, SET_LOCAL, GET_GLOBAL, DEFINE_GLOBAL, SET_GLOBAL,
+ GET_UPVALUE, SET_UPVALUE, CLOSE_UPVALUE,
+ EQUAL, NOT_EQUAL, GREATER, GREATER_EQUAL, LESS, LESS_EQUAL,
+ ADD, SUBTRACT, MULTIPLY, DIVIDE, NOT, NEGATE,
+ PRINT, JUMP, POP_JUMP_IF_FALSE, JUMP_IF_FALSE, JUMP_IF_TRUE,
+ CALL, CLOSURE, RETURN,
+ COUNT, ENTER, LEAVE) = range(len(OPCODES))
+
+
+class FunctionCode:
+    # what the compiler produces for one lox function (or the top level script)
+    __slots__ = ("name", "arity", "code", "constants", "lines", "upvalues")
+
+    def __init__(self, name, arity, code, constants, lines, upvalues):
+        self.name = name  # None for the script
+        self.arity = arity
+        self.code = code  # array("i") of opcode, argument pairs, a memoryview when loaded from the cache
+        self.constants = constants  # floats, strs and the FunctionCode of nested functions
+        self.lines = lines  # array("i"), line of every instruction
+        self.upvalues = upvalues  # (is_local, index) per captured variable, see CLOSURE
+
+    def __str__(self):
+        return "<script>" if self.name is None else f"<fn {self.name}>"
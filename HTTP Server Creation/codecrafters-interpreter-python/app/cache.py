@@ -0,0 +1,159 @@
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from app.bytecode import VERSION, FunctionCode
+
+
+#bytecode cache for run --vm, the way python keeps .pyc files in __pycache__
+#script.lox compiles to __loxcache__/script.lox.v<VERSION>.loxc next to it (.opt.loxc with --optimize)
+#the file starts with the sha256 of the source it came from, a cache file for different source
+#or an older VERSION is ignored and rewritten
+#loading maps the file and hands the VM memoryviews straight into the mapping for the code and
+#line arrays, so only the constants and names get copied out
+#
+#layout, all little endian except code and lines which are in the machine's own int format:
+#  header: magic, VERSION, int size, byte order, source hash, function count
+#  functions, nested ones before the function that makes closures of them, the script last:
+#    arity, name length (-1 for the script), instruction count, constant count, upvalue count
+#    name, padded to 4 bytes
+#    code, lines, upvalues as (is_local, index) int pairs
+#    constants: a tag byte then a double, a length and utf-8, or the index of a function
+#    padding to 4 bytes
+
+MAGIC = b"LOXC"
+HEADER = struct.Struct("<4sHBB32sI")
+FUNCTION = struct.Struct("<iiiii")
+TAG = struct.Struct("<B")
+NUMBER = struct.Struct("<d")
+INDEX = struct.Struct("<I")
+FLOAT, STRING, FUNCTION_INDEX = range(3)
+BYTE_ORDER = 0 if sys.byteorder == "little" else 1
+INT_SIZE = array("i").itemsize
+
+
+def source_hash(source):
+    return hashlib.sha256(source.encode()).digest()
+
+
+def cache_path(path, optimize):
+    folder = os.path.join(os.path.dirname(path), "__loxcache__")
+    return os.path.join(folder, f"{os.path.basename(path)}.v{VERSION}{'.opt' if optimize else ''}.loxc")
+
+
+def pad(data):
+    data.extend(bytes(-len(data) % 4))
+
+
+def dump(script, digest):
+    # the cache file's bytes for a compiled script
+    functions = []
+    todo = [script]
+    while todo:
+        function = todo.pop()
+        functions.append(function)
+        todo += (constant for constant in function.constants if constant.__class__ is FunctionCode)
+    # a function comes before everything nested in it, reversed every closure's code is loaded first
+    functions.reverse()
+    index = {id(function): i for i, function in enumerate(functions)}
+
+    data = bytearray(HEADER.pack(MAGIC, VERSION, INT_SIZE, BYTE_ORDER, digest, len(functions)))
+    for function in functions:
+        name = b"" if function.name is None else function.name.encode()
+        data += FUNCTION.pack(function.arity, -1 if function.name is None else len(name),
+                              len(function.lines), len(function.constants), len(function.upvalues))
+        data += name
+        pad(data)
+        data += array("i", function.code).tobytes()
+        data += array("i", function.lines).tobytes()
+        data += array("i", [int(n) for pair in function.upvalues for n in pair]).tobytes()
+        for constant in function.constants:
+            if constant.__class__ is float:
+                data += TAG.pack(FLOAT) + NUMBER.pack(constant)
+            elif constant.__class__ is str:
+                text = constant.encode()
+                data += TAG.pack(STRING) + INDEX.pack(len(text)) + text
+            else:
+                data += TAG.pack(FUNCTION_INDEX) + INDEX.pack(index[id(constant)])
+        pad(data)
+    return bytes(data)
+
+
+def load(path, digest):
+    # the cached script for source with this digest, None when there's no usable cache file
+    try:
+        with open(path, "rb") as file:
+            mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        # missing, unreadable or empty
+        return None
+    view = memoryview(mapping)
+    try:
+        magic, version, int_size, byte_order, source, count = HEADER.unpack_from(view)
+    except struct.error:
+        return None
+    if (magic, version, int_size, byte_order, source) != (MAGIC, VERSION, INT_SIZE, BYTE_ORDER, digest):
+        return None
+    try:
+        return read_functions(view, HEADER.size, count)
+    except (struct.error, IndexError, TypeError, UnicodeDecodeError):
+        # truncated or corrupt, recompile
+        return None
+
+
+def read_functions(view, at, count):
+    functions = []
+    for _ in range(count):
+        arity, name_length, instructions, constant_count, upvalue_count = FUNCTION.unpack_from(view, at)
+        at += FUNCTION.size
+        name = None
+        if name_length >= 0:
+            name = sys.intern(str(view[at:at + name_length], "utf-8"))
+            at += name_length + (-name_length % 4)
+        code = view[at:at + 2 * instructions * INT_SIZE].cast("i")
+        at += 2 * instructions * INT_SIZE
+        lines = view[at:at + instructions * INT_SIZE].cast("i")
+        at += instructions * INT_SIZE
+        pairs = view[at:at + 2 * upvalue_count * INT_SIZE].cast("i")
+        at += 2 * upvalue_count * INT_SIZE
+        upvalues = [(bool(pairs[i]), pairs[i + 1]) for i in range(0, len(pairs), 2)]
+        if len(code) != 2 * instructions or len(lines) != instructions or len(upvalues) != upvalue_count:
+            raise IndexError("truncated cache file")
+        constants = []
+        for _ in range(constant_count):
+            tag = view[at]
+            at += 1
+            if tag == FLOAT:
+                constants.append(NUMBER.unpack_from(view, at)[0])
+                at += NUMBER.size
+            elif tag == STRING:
+                length = INDEX.unpack_from(view, at)[0]
+                at += INDEX.size
+                # names get looked up in the globals dict, interned like the parser's
+                constants.append(sys.intern(str(view[at:at + length], "utf-8")))
+                at += length
+            else:
+                constants.append(functions[INDEX.unpack_from(view, at)[0]])
+                at += INDEX.size
+        at += -at % 4
+        functions.append(FunctionCode(name, arity, code, constants, lines, upvalues))
+    return functions[-1]
+
+
+def store(path, digest, script):
+    # written to a temp file and renamed, so a run that crashes halfway or a second run
+    # racing this one never sees half a file, and a folder we can't write to just means no cache
+    temp = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(temp, "wb") as file:
+            file.write(dump(script, digest))
+        os.replace(temp, path)
+    except OSError:
+        try:
+            os.remove(temp)
+        except OSError:
+            pass
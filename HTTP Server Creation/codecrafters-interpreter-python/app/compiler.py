@@ -0,0 +1,334 @@
+from array import array
+
+from app.bytecode import (ADD, CALL, CLOSE_UPVALUE, CLOSURE, CONSTANT, DEFINE_GLOBAL, DIVIDE, EQUAL, FALSE,
+                          GET_GLOBAL, GET_LOCAL, GET_UPVALUE, GREATER, GREATER_EQUAL, JUMP, JUMP_IF_FALSE,
+                          JUMP_IF_TRUE, LESS, LESS_EQUAL, MULTIPLY, NEGATE, NIL, NOT, NOT_EQUAL, POP,
+                          POP_JUMP_IF_FALSE, PRINT, RETURN, SET_GLOBAL, SET_LOCAL, SET_UPVALUE, SUBTRACT,
+                          TRUE, FunctionCode)
+from app.nodes import (Assign, Binary, Block, Expression, Function, Grouping, If, Literal, Print,
+                       Return, Unary, Var, Variable, While)
+from app.scanner import (AND, BANG, BANG_EQUAL, EQUAL_EQUAL, GREATER as T_GREATER,
+                         GREATER_EQUAL as T_GREATER_EQUAL, LESS as T_LESS, LESS_EQUAL as T_LESS_EQUAL,
+                         MINUS, OR, PLUS, SLASH, STAR)
+
+
+#compiles the AST into bytecode for the VM
+#locals live in stack slots picked here, globals are looked up by name at runtime
+#a local that some inner function captures is shared through an upvalue, which points at the
+#stack slot while the variable is in scope and takes the value with it when the scope ends
+#expressions are compiled with a work stack like the parser and tree walker use, statements recurse
+
+BINARY_OPS = {
+    PLUS: ADD, MINUS: SUBTRACT, STAR: MULTIPLY, SLASH: DIVIDE,
+    EQUAL_EQUAL: EQUAL, BANG_EQUAL: NOT_EQUAL,
+    T_GREATER: GREATER, T_GREATER_EQUAL: GREATER_EQUAL, T_LESS: LESS, T_LESS_EQUAL: LESS_EQUAL,
+}
+
+UNINITIALIZED = -1  # depth of a local whose initializer is still being compiled
+
+
+class CompileError(Exception):
+    def __init__(self, line, where, message):
+        super().__init__(f"[line {line}] Error at '{where}': {message}")
+
+
+class Local:
+    __slots__ = ("name", "depth", "captured")
+
+    def __init__(self, name, depth):
+        self.name = name
+        self.depth = depth
+        self.captured = False
+
+
+class FunctionState:
+    # compiler state for the function being compiled, enclosing is the one around it
+    def __init__(self, name, arity, enclosing):
+        self.name = name
+        self.arity = arity
+        self.enclosing = enclosing
+        self.code = array("i")
+        self.lines = array("i")
+        self.constants = []
+        self.constant_index = {}  # (type, value) -> index, so repeats share one slot
+        self.locals = [Local("", 0)]  # slot 0 holds the function being called
+        self.upvalues = []  # (is_local, index)
+        self.scope_depth = 0
+
+    def finish(self):
+        return FunctionCode(self.name, self.arity, self.code, self.constants, self.lines, self.upvalues)
+
+
+class Compiler:
+    def __init__(self, report):
+        self.report = report  # called with the message of every compile error
+        self.state = None
+        self.line = 0
+        self.executors = {
+            Expression: self.expression_statement,
+            Print: self.print_statement,
+            Var: self.var_statement,
+            Block: self.block,
+            If: self.if_statement,
+            While: self.while_statement,
+            Function: self.function_statement,
+            Return: self.return_statement,
+        }
+
+    def compile(self, statements):
+        self.state = FunctionState(None, 0, None)
+        for statement in statements:
+            self.statement(statement)
+        self.emit(NIL)
+        self.emit(RETURN)
+        return self.state.finish()
+
+    # emitting
+
+    def emit(self, op, arg=0):
+        code = self.state.code
+        code.append(op)
+        code.append(arg)
+        self.state.lines.append(self.line)
+        return len(code) - 2
+
+    def patch(self, at):
+        # point the jump emitted at `at` to the next instruction
+        self.state.code[at + 1] = len(self.state.code)
+
+    def constant(self, value):
+        state = self.state
+        key = (value.__class__, value)
+        index = state.constant_index.get(key)
+        if index is None:
+            index = state.constant_index[key] = len(state.constants)
+            state.constants.append(value)
+        return index
+
+    # variables
+
+    def declare(self, name, line):
+        # a new local in the current scope, returns False at the top level where it's a global
+        state = self.state
+        if state.scope_depth == 0:
+            return False
+        for local in reversed(state.locals):
+            if local.depth != UNINITIALIZED and local.depth < state.scope_depth:
+                break
+            if local.name == name:
+                self.error(line, name, "Already a variable with this name in this scope.")
+        state.locals.append(Local(name, UNINITIALIZED))
+        return True
+
+    def define(self, name, is_local):
+        if is_local:
+            self.state.locals[-1].depth = self.state.scope_depth
+        else:
+            self.emit(DEFINE_GLOBAL, self.constant(name))
+
+    def resolve_local(self, state, name, line):
+        for slot in range(len(state.locals) - 1, -1, -1):
+            local = state.locals[slot]
+            if local.name == name:
+                if local.depth == UNINITIALIZED:
+                    self.error(line, name, "Can't read local variable in its own initializer.")
+                return slot
+        return -1
+
+    def resolve_upvalue(self, state, name, line):
+        if state.enclosing is None:
+            return -1
+        slot = self.resolve_local(state.enclosing, name, line)
+        if slot != -1:
+            state.enclosing.locals[slot].captured = True
+            return self.add_upvalue(state, True, slot)
+        index = self.resolve_upvalue(state.enclosing, name, line)
+        if index != -1:
+            return self.add_upvalue(state, False, index)
+        return -1
+
+    def add_upvalue(self, state, is_local, index):
+        key = (is_local, index)
+        if key in state.upvalues:
+            return state.upvalues.index(key)
+        state.upvalues.append(key)
+        return len(state.upvalues) - 1
+
+    def load(self, name, line):
+        slot = self.resolve_local(self.state, name, line)
+        if slot != -1:
+            self.emit(GET_LOCAL, slot)
+            return
+        index = self.resolve_upvalue(self.state, name, line)
+        if index != -1:
+            self.emit(GET_UPVALUE, index)
+        else:
+            self.emit(GET_GLOBAL, self.constant(name))
+
+    def store(self, name, line):
+        slot = self.resolve_local(self.state, name, line)
+        if slot != -1:
+            self.emit(SET_LOCAL, slot)
+            return
+        index = self.resolve_upvalue(self.state, name, line)
+        if index != -1:
+            self.emit(SET_UPVALUE, index)
+        else:
+            self.emit(SET_GLOBAL, self.constant(name))
+
+    def error(self, line, where, message):
+        self.report(str(CompileError(line, where, message)))
+
+    # statements
+
+    def statement(self, statement):
+        self.executors[statement.__class__](statement)
+
+    def expression_statement(self, statement):
+        self.expression(statement.expression)
+        self.emit(POP)
+
+    def print_statement(self, statement):
+        self.expression(statement.expression)
+        self.emit(PRINT)
+
+    def var_statement(self, statement):
+        self.line = statement.line
+        is_local = self.declare(statement.name, statement.line)
+        if statement.initializer is None:
+            self.emit(NIL)
+        else:
+            self.expression(statement.initializer)
+        self.define(statement.name, is_local)
+
+    def block(self, statement):
+        self.begin_scope()
+        for inner in statement.statements:
+            self.statement(inner)
+        self.end_scope()
+
+    def begin_scope(self):
+        self.state.scope_depth += 1
+
+    def end_scope(self):
+        state = self.state
+        state.scope_depth -= 1
+        locals_ = state.locals
+        while len(locals_) > 1 and locals_[-1].depth > state.scope_depth:
+            self.emit(CLOSE_UPVALUE if locals_.pop().captured else POP)
+
+    def if_statement(self, statement):
+        self.expression(statement.condition)
+        skip_then = self.emit(POP_JUMP_IF_FALSE)
+        self.statement(statement.then_branch)
+        if statement.else_branch is None:
+            self.patch(skip_then)
+            return
+        skip_else = self.emit(JUMP)
+        self.patch(skip_then)
+        self.statement(statement.else_branch)
+        self.patch(skip_else)
+
+    def while_statement(self, statement):
+        start = len(self.state.code)
+        self.expression(statement.condition)
+        exit_jump = self.emit(POP_JUMP_IF_FALSE)
+        self.statement(statement.body)
+        self.emit(JUMP, start)
+        self.patch(exit_jump)
+
+    def function_statement(self, statement):
+        self.line = statement.line
+        is_local = self.declare(statement.name, statement.line)
+        if is_local:
+            # initialized straight away so the function can call itself
+            self.define(statement.name, True)
+        function = self.function(statement)
+        self.line = statement.line
+        self.emit(CLOSURE, self.constant(function))
+        if not is_local:
+            self.define(statement.name, False)
+
+    def function(self, statement):
+        enclosing = self.state
+        self.state = FunctionState(statement.name, len(statement.params), enclosing)
+        self.begin_scope()
+        for param in statement.params:
+            self.declare(param, statement.line)
+            self.define(param, True)
+        for inner in statement.body:
+            self.statement(inner)
+        self.emit(NIL)
+        self.emit(RETURN)
+        function = self.state.finish()
+        self.state = enclosing
+        return function
+
+    def return_statement(self, statement):
+        self.line = statement.line
+        if self.state.enclosing is None:
+            self.error(statement.line, "return", "Can't return from top-level code.")
+        if statement.value is None:
+            self.emit(NIL)
+        else:
+            self.expression(statement.value)
+        self.emit(RETURN)
+
+    # expressions
+
+    def expression(self, node):
+        # work items are nodes, or (emit function, args) to run once the nodes pushed after them are done
+        todo = [node]
+        while todo:
+            item = todo.pop()
+            kind = item.__class__
+            if kind is tuple:
+                item[0](*item[1:])
+            elif kind is Literal:
+                value = item.value
+                if value is None:
+                    self.emit(NIL)
+                elif value is True:
+                    self.emit(TRUE)
+                elif value is False:
+                    self.emit(FALSE)
+                else:
+                    self.emit(CONSTANT, self.constant(value))
+            elif kind is Variable:
+                self.line = item.line
+                self.load(item.name, item.line)
+            elif kind is Binary:
+                op = item.operator
+                if op == AND or op == OR:
+                    # the left value stays as the result if it decides, otherwise it's popped for the right
+                    jump = []
+                    todo += ((self.patch_later, jump), item.right, (self.emit_at, item.line, POP),
+                             (self.jump_later, jump, item.line, JUMP_IF_FALSE if op == AND else JUMP_IF_TRUE),
+                             item.left)
+                else:
+                    todo += ((self.emit_at, item.line, BINARY_OPS[op]), item.right, item.left)
+            elif kind is Grouping:
+                todo.append(item.expression)
+            elif kind is Unary:
+                todo += ((self.emit_at, item.line, NOT if item.operator == BANG else NEGATE), item.right)
+            elif kind is Assign:
+                todo += ((self.store_at, item.name, item.line), item.value)
+            else:
+                todo.append((self.emit_at, item.line, CALL, len(item.arguments)))
+                todo += reversed(item.arguments)
+                todo.append(item.callee)
+
+    def emit_at(self, line, op, arg=0):
+        self.line = line
+        self.emit(op, arg)
+
+    def store_at(self, name, line):
+        self.line = line
+        self.store(name, line)
+
+    def jump_later(self, holder, line, op):
+        self.line = line
+        holder.append(self.emit(op))
+
+    def patch_later(self, holder):
+        self.patch(holder[0])
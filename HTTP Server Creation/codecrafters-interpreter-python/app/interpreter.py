@@ -0,0 +1,276 @@
+from app.nodes import (CELL, GLOBAL, LOCAL, Assign, Binary, Block, Expression, Function, Grouping, If,
+                       Literal, Print, Return, Unary, Var, Variable, While)
+from app.runtime import (MAX_CALL_DEPTH, NATIVES, LoxRuntimeError, NativeFunction, divide, is_equal,
+                         is_truthy, stringify)
+from app.scanner import (AND, BANG, BANG_EQUAL, EQUAL_EQUAL, GREATER, GREATER_EQUAL, LESS, LESS_EQUAL,
+                         MINUS, OR, PLUS, SLASH, STAR)
+
+
+#tree walking interpreter, the engine behind evaluate and run without --vm
+#expects the program to have been through the resolver, which says where each variable lives:
+#a slot in the running call's frame list, a cell the closure captured, or the globals dict
+#expressions are evaluated with an explicit work stack instead of recursing, so nesting depth
+#is free, statements and lox function calls do recurse
+#a return statement makes execute() hand back a 1-tuple holding the value, which every enclosing
+#block and loop passes straight up, cheaper than unwinding with an exception
+
+
+class LoxFunction:
+    __slots__ = ("declaration", "cells")
+
+    def __init__(self, declaration, cells):
+        self.declaration = declaration
+        self.cells = cells  # the cells of the enclosing variables it uses, see Function.upvalues
+
+    @property
+    def arity(self):
+        return len(self.declaration.params)
+
+    def __str__(self):
+        return f"<fn {self.declaration.name}>"
+
+
+# operators that want two numbers
+ARITHMETIC = {
+    MINUS: lambda a, b: a - b,
+    STAR: lambda a, b: a * b,
+    SLASH: divide,
+    GREATER: lambda a, b: a > b,
+    GREATER_EQUAL: lambda a, b: a >= b,
+    LESS: lambda a, b: a < b,
+    LESS_EQUAL: lambda a, b: a <= b,
+}
+
+APPLY = object()  # marks "children are done, combine them" on the work stack
+SHORT_CIRCUIT = object()  # left side of and/or is done, decide whether to evaluate the right
+
+
+def binary(node, a, b):
+    op = node.operator
+    if op == PLUS:
+        if a.__class__ is float and b.__class__ is float:
+            return a + b
+        if a.__class__ is str and b.__class__ is str:
+            return a + b
+        raise LoxRuntimeError(node.line, "Operands must be two numbers or two strings.")
+    if op == EQUAL_EQUAL:
+        return is_equal(a, b)
+    if op == BANG_EQUAL:
+        return not is_equal(a, b)
+    if a.__class__ is not float or b.__class__ is not float:
+        raise LoxRuntimeError(node.line, "Operands must be numbers.")
+    return ARITHMETIC[op](a, b)
+
+
+def unary(node, value):
+    if node.operator == BANG:
+        return not is_truthy(value)
+    if value.__class__ is not float:
+        raise LoxRuntimeError(node.line, "Operand must be a number.")
+    return -value
+
+
+class Interpreter:
+    def __init__(self, out=None):
+        self.out = out
+        self.globals = dict(NATIVES)
+        self.frame = []  # the running call's locals
+        self.cells = ()  # the running closure's captured cells
+        self.depth = 0
+        self.executors = {
+            Expression: self.execute_expression,
+            Print: self.execute_print,
+            Var: self.execute_var,
+            Block: self.execute_block,
+            If: self.execute_if,
+            While: self.execute_while,
+            Function: self.execute_function,
+            Return: self.execute_return,
+        }
+
+    def run(self, script):
+        # script is the Function the resolver wraps the program in
+        self.frame = [None] * script.frame_size
+        self.run_statements(script.body)
+
+    # statements, each returns None or (value,) when a return statement ran
+
+    def execute(self, statement):
+        return self.executors[statement.__class__](statement)
+
+    def execute_expression(self, statement):
+        self.evaluate(statement.expression)
+
+    def execute_print(self, statement):
+        self.out.write(stringify(self.evaluate(statement.expression)) + "\n")
+
+    def execute_var(self, statement):
+        value = None if statement.initializer is None else self.evaluate(statement.initializer)
+        self.define(statement, value)
+
+    def define(self, statement, value):
+        kind = statement.kind
+        if kind == LOCAL:
+            self.frame[statement.index] = value
+        elif kind == CELL:
+            # a fresh cell every time, closures made in earlier loop iterations keep the old one
+            self.frame[statement.index] = [value]
+        else:
+            self.globals[statement.name] = value
+
+    def execute_block(self, statement):
+        return self.run_statements(statement.statements)
+
+    def run_statements(self, statements):
+        executors = self.executors
+        for statement in statements:
+            result = executors[statement.__class__](statement)
+            if result is not None:
+                return result
+        return None
+
+    def execute_if(self, statement):
+        if is_truthy(self.evaluate(statement.condition)):
+            return self.execute(statement.then_branch)
+        if statement.else_branch is not None:
+            return self.execute(statement.else_branch)
+        return None
+
+    def execute_while(self, statement):
+        condition = statement.condition
+        body = statement.body
+        run = self.executors[body.__class__]
+        while is_truthy(self.evaluate(condition)):
+            result = run(body)
+            if result is not None:
+                return result
+        return None
+
+    def execute_function(self, statement):
+        if statement.kind == CELL:
+            # the function may capture itself, so its cell has to exist first
+            cell = self.frame[statement.index] = [None]
+            cell[0] = self.closure(statement)
+        else:
+            self.define(statement, self.closure(statement))
+
+    def closure(self, declaration):
+        frame = self.frame
+        cells = self.cells
+        return LoxFunction(declaration, tuple(frame[index] if from_frame else cells[index]
+                                              for from_frame, index in declaration.upvalues))
+
+    def execute_return(self, statement):
+        return (None if statement.value is None else self.evaluate(statement.value),)
+
+    # calls
+
+    def call(self, callee, arguments, line):
+        if callee.__class__ is NativeFunction:
+            if len(arguments) != callee.arity:
+                raise LoxRuntimeError(line, f"Expected {callee.arity} arguments but got {len(arguments)}.")
+            return callee.fn(*arguments)
+        if callee.__class__ is not LoxFunction:
+            raise LoxRuntimeError(line, "Can only call functions and classes.")
+        declaration = callee.declaration
+        if len(arguments) != len(declaration.params):
+            raise LoxRuntimeError(line, f"Expected {len(declaration.params)} arguments but got {len(arguments)}.")
+        if self.depth >= MAX_CALL_DEPTH:
+            raise LoxRuntimeError(line, "Stack overflow.")
+        frame = arguments  # a fresh list from evaluate, it becomes the call's frame
+        if len(frame) < declaration.frame_size:
+            frame += [None] * (declaration.frame_size - len(frame))
+        for index in declaration.cells:
+            frame[index] = [frame[index]]
+        previous = self.frame, self.cells
+        self.frame = frame
+        self.cells = callee.cells
+        self.depth += 1
+        try:
+            result = self.run_statements(declaration.body)
+        except RecursionError:
+            # each lox call costs a python frame per nested statement, so deep recursion through
+            # nested blocks runs out of python stack before MAX_CALL_DEPTH
+            raise LoxRuntimeError(line, "Stack overflow.") from None
+        finally:
+            self.depth -= 1
+            self.frame, self.cells = previous
+        return None if result is None else result[0]
+
+    # expressions
+
+    def evaluate(self, node):
+        values = []
+        todo = [node]
+        frame = self.frame
+        cells = self.cells
+        globals_ = self.globals
+        while todo:
+            item = todo.pop()
+            kind = item.__class__
+            if kind is Literal:
+                values.append(item.value)
+            elif kind is Variable:
+                where = item.kind
+                if where == LOCAL:
+                    values.append(frame[item.index])
+                elif where == GLOBAL:
+                    try:
+                        values.append(globals_[item.name])
+                    except KeyError:
+                        raise LoxRuntimeError(item.line, f"Undefined variable '{item.name}'.") from None
+                elif where == CELL:
+                    values.append(frame[item.index][0])
+                else:
+                    values.append(cells[item.index][0])
+            elif kind is tuple:
+                marker, item = item
+                kind = item.__class__
+                if marker is SHORT_CIRCUIT:
+                    # and/or: the left value is the answer unless it says to look at the right
+                    if is_truthy(values[-1]) == (item.operator == AND):
+                        values.pop()
+                        todo.append(item.right)
+                elif kind is Binary:
+                    right = values.pop()
+                    values.append(binary(item, values.pop(), right))
+                elif kind is Unary:
+                    values.append(unary(item, values.pop()))
+                elif kind is Assign:
+                    where = item.kind
+                    if where == LOCAL:
+                        frame[item.index] = values[-1]
+                    elif where == GLOBAL:
+                        if item.name not in globals_:
+                            raise LoxRuntimeError(item.line, f"Undefined variable '{item.name}'.")
+                        globals_[item.name] = values[-1]
+                    elif where == CELL:
+                        frame[item.index][0] = values[-1]
+                    else:
+                        cells[item.index][0] = values[-1]
+                else:
+                    count = len(item.arguments)
+                    arguments = values[len(values) - count:]
+                    del values[len(values) - count:]
+                    values.append(self.call(values.pop(), arguments, item.line))
+            elif kind is Binary:
+                if item.operator == AND or item.operator == OR:
+                    todo += ((SHORT_CIRCUIT, item), item.left)
+                else:
+                    todo += ((APPLY, item), item.right, item.left)
+            elif kind is Grouping:
+                todo.append(item.expression)
+            elif kind is Unary:
+                todo += ((APPLY, item), item.right)
+            elif kind is Assign:
+                todo += ((APPLY, item), item.value)
+            else:
+                todo.append((APPLY, item))
+                todo += reversed(item.arguments)
+                todo.append(item.callee)
+        return values[0]
+
+
+def evaluate(node):
+    # a lone expression with no variables around, what the evaluate command does
+    return Interpreter().evaluate(node)
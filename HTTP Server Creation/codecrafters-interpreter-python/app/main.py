@@ -1,33 +1,254 @@
+import gc
 import sys
 
+from app import cache
+from app.compiler import Compiler
+from app.interpreter import Interpreter, evaluate
+from app.nodes import dump, dump_program, format_number
+from app.optimizer import Optimizer
+from app.parser import ParseError, Parser
+from app.profiler import Profiler
+from app.resolver import Resolver
+from app.runtime import LoxRuntimeError, stringify
+from app.scanner import FIXED, NAMES, NUMBER, STRING, report, scan
+from app.vm import VM
+
+
+#to run this, use terminal in the project folder (the one above app) and do
+#python3 -m app.main <command> <filename> [--vm] [--optimize] [--dump-ast] [--no-cache] [--profile]
+#                    [--profile-stacks=<file>]
+#tokenize prints the tokens, parse prints the expression's tree, evaluate prints its value,
+#run runs a whole program on the tree walker, or compiled to bytecode on the VM with --vm
+#--optimize folds constants and drops dead code before running, --dump-ast prints the program's
+#tree (after optimizing, with --optimize) instead of running it
+#run --vm keeps the compiled bytecode in __loxcache__ next to the script and reuses it while the
+#source is unchanged, --no-cache always compiles and writes nothing
+#--profile runs on the VM counting instructions and timing calls, and prints the hot functions
+#and lines on stderr afterwards, --profile-stacks=<file> writes collapsed stacks for a flamegraph
+#exit code 65 means the source had errors in it, 70 means it failed while running
+
+COMMANDS = ("tokenize", "parse", "evaluate", "run")
+FLAGS = ("--vm", "--optimize", "--dump-ast", "--no-cache", "--profile", "--profile-stacks=<file>")
+
+# whole output line for the token types that always print the same thing
+FIXED_LINES = [None if text is None else f"{NAMES[type]} {text} null\n" for type, text in enumerate(FIXED)]
+BATCH = 4096  # lines joined into one write
+# statements recurse in the parser, resolver, optimizer, compiler and tree walker
+RECURSION_LIMIT = 100000
+
+
+def open_output():
+    # one big buffer in front of stdout instead of a print() per token
+    return open(sys.stdout.fileno(), "w", buffering=1 << 16, closefd=False)
+
+
+class ErrorFlag:
+    # passed to the scanner as its error callback, remembers that something was reported
+    def __init__(self):
+        self.seen = False
+
+    def __call__(self, line, message):
+        self.seen = True
+        report(line, message)
+
+    def message(self, message):
+        # the parser and compiler hand over the whole formatted line
+        self.seen = True
+        print(message, file=sys.stderr)
+
+
+def tokenize(source, out):
+    error = ErrorFlag()
+    fixed = FIXED_LINES
+    lines = []
+    for token in scan(source, error):
+        line = fixed[token.type]
+        if line is None:
+            lexeme = source[token.start:token.start + token.length]
+            if token.type == NUMBER:
+                line = f"NUMBER {lexeme} {format_number(float(lexeme))}\n"
+            elif token.type == STRING:
+                line = f"STRING {lexeme} {lexeme[1:-1]}\n"
+            else:
+                line = f"IDENTIFIER {lexeme} null\n"
+        lines.append(line)
+        if len(lines) >= BATCH:
+            out.write("".join(lines))
+            lines.clear()
+    out.write("".join(lines))
+    out.flush()
+    return 65 if error.seen else 0
+
+
+def parse(source):
+    # returns the expression's tree, or None once the errors have been reported
+    error = ErrorFlag()
+    # the tree has no cycles for the collector to find, and rescanning it as it grows
+    # makes big parses slower than linear
+    gc.disable()
+    try:
+        expr = Parser(source, scan(source, error)).parse_expression()
+    except ParseError as e:
+        print(e, file=sys.stderr)
+        return None
+    finally:
+        gc.enable()
+    return None if error.seen else expr
+
+
+def parse_program(source, optimize=False):
+    # the program's statements, None once the errors have been reported
+    error = ErrorFlag()
+    parser = Parser(source, scan(source, error))
+    gc.disable()
+    try:
+        program = parser.parse_program(error.message)
+    except RecursionError:
+        error.message(f"[line {parser.current.line}] Error: Too much nesting.")
+        return None
+    finally:
+        gc.enable()
+    if optimize and not error.seen:
+        # check first so errors in code the optimizer throws away still get reported
+        gc.disable()
+        try:
+            Resolver(error.message).resolve(program)
+            if not error.seen:
+                program = Optimizer().optimize(program)
+        except RecursionError:
+            error.message("Error: Too much nesting.")
+        finally:
+            gc.enable()
+    return None if error.seen else program
+
+
+def compile_program(source, vm, optimize=False):
+    # the resolved script for the tree walker or its FunctionCode for the VM, None on errors
+    program = parse_program(source, optimize)
+    if program is None:
+        return None
+    error = ErrorFlag()
+    try:
+        if vm:
+            program = Compiler(error.message).compile(program)
+        else:
+            program = Resolver(error.message).resolve(program)
+    except RecursionError:
+        error.message("Error: Too much nesting.")
+    return None if error.seen else program
+
+
+def load_program(source, path, optimize):
+    # the script's FunctionCode from the cache file when it matches the source, otherwise
+    # compiled and cached for next time
+    digest = cache.source_hash(source)
+    target = cache.cache_path(path, optimize)
+    script = cache.load(target, digest)
+    if script is None:
+        script = compile_program(source, True, optimize)
+        if script is not None:
+            cache.store(target, digest, script)
+    return script
+
+
+def run(source, out, flags, path=None):
+    # flags maps each option given to its value, True for the ones without one
+    profiler = Profiler() if "--profile" in flags or "--profile-stacks" in flags else None
+    # only the VM has a line for every instruction to count against
+    vm = "--vm" in flags or profiler is not None
+    optimize = "--optimize" in flags
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), RECURSION_LIMIT))
+    if "--dump-ast" in flags:
+        program = parse_program(source, optimize)
+        if program is None:
+            return 65
+        out.write(dump_program(program) + "\n")
+        return 0
+    if vm and path is not None and "--no-cache" not in flags:
+        program = load_program(source, path, optimize)
+    else:
+        program = compile_program(source, vm, optimize)
+    if program is None:
+        return 65
+    try:
+        if vm:
+            VM(out, profiler).run(program)
+        else:
+            Interpreter(out).run(program)
+    except LoxRuntimeError as e:
+        out.flush()
+        print(f"{e}\n[line {e.line}]", file=sys.stderr)
+        return 70
+    finally:
+        if profiler is not None:
+            write_profile(profiler, source, out, flags)
+    return 0
+
+
+def write_profile(profiler, source, out, flags):
+    out.flush()
+    if "--profile" in flags:
+        profiler.report(sys.stderr, source)
+    if "--profile-stacks" in flags:
+        with open(flags["--profile-stacks"], "w") as file:
+            profiler.collapsed(file)
+
+
+def run_command(command, source, out, flags=(), path=None):
+    if command == "tokenize":
+        return tokenize(source, out)
+    if command == "run":
+        return run(source, out, flags, path)
+    expr = parse(source)
+    if expr is None:
+        return 65
+    if command == "parse":
+        out.write(dump(expr) + "\n")
+        return 0
+    try:
+        out.write(stringify(evaluate(expr)) + "\n")
+    except LoxRuntimeError as e:
+        out.flush()
+        print(f"{e}\n[line {e.line}]", file=sys.stderr)
+        return 70
+    return 0
+
+
+def parse_flags(args):
+    # {"--vm": True, "--profile-stacks": "out.txt"} from ["--vm", "--profile-stacks=out.txt"]
+    flags = {}
+    for arg in args:
+        name, equals, value = arg.partition("=")
+        if name in FLAGS and not equals:
+            flags[name] = True
+        elif f"{name}=<file>" in FLAGS and value:
+            flags[name] = value
+        else:
+            print(f"Unknown option: {arg}", file=sys.stderr)
+            exit(1)
+    return flags
+
 
 def main():
     if len(sys.argv) < 3:
-        print("Usage: ./your_program.sh tokenize <filename>", file=sys.stderr)
+        options = " ".join(f"[{flag}]" for flag in FLAGS)
+        print(f"Usage: ./your_program.sh [{'|'.join(COMMANDS)}] <filename> {options}", file=sys.stderr)
         exit(1)
 
     command = sys.argv[1]
     filename = sys.argv[2]
+    flags = parse_flags(sys.argv[3:])
 
-    if command != "tokenize":
+    if command not in COMMANDS:
         print(f"Unknown command: {command}", file=sys.stderr)
         exit(1)
 
     with open(filename) as file:
         file_contents = file.read()
 
-    # You can use print statements as follows for debugging, they'll be visible when running tests.
-    print("Logs from your program will appear here!", file=sys.stderr)
-
-    if file_contents:
-         raise NotImplementedError("Scanner not implemented")
-    else:
-        for c in file_contents:
-            if c == "(":
-                print("LEFT_PAREN ( null")
-            elif c == ")":
-                print("RIGHT_PAREN ) null")
-        print("EOF  null")
+    with open_output() as out:
+        code = run_command(command, file_contents, out, flags, filename)
+    exit(code)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,241 @@
+from app.scanner import FIXED
+
+
+#AST node classes plus dump() which prints an expression the way the parse command shows it
+#operators are kept as token types, line is there for runtime error messages
+#variable names are interned strings so the dict lookups on them are pointer compares
+#kind and index on the nodes that name a variable are filled in by the resolver, see STORAGE
+
+# where a variable lives at runtime
+# GLOBAL: the globals dict, by name (index unused)
+# LOCAL: frame[index] of the running function
+# CELL: frame[index] holds a one item list, because some closure captured the variable
+# UPVALUE: the running closure's cells[index], a cell it captured when it was created
+STORAGE = (GLOBAL, LOCAL, CELL, UPVALUE) = range(4)
+
+
+class Literal:
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value  # float, str, True, False or None for nil
+
+
+class Grouping:
+    __slots__ = ("expression",)
+
+    def __init__(self, expression):
+        self.expression = expression
+
+
+class Unary:
+    __slots__ = ("operator", "right", "line")
+
+    def __init__(self, operator, right, line):
+        self.operator = operator
+        self.right = right
+        self.line = line
+
+
+class Binary:
+    __slots__ = ("left", "operator", "right", "line")
+
+    def __init__(self, left, operator, right, line):
+        self.left = left
+        self.operator = operator
+        self.right = right
+        self.line = line
+
+
+class Variable:
+    __slots__ = ("name", "line", "kind", "index")
+
+    def __init__(self, name, line):
+        self.name = name
+        self.line = line
+        self.kind = GLOBAL
+        self.index = 0
+
+
+class Assign:
+    __slots__ = ("name", "value", "line", "kind", "index")
+
+    def __init__(self, name, value, line):
+        self.name = name
+        self.value = value
+        self.line = line
+        self.kind = GLOBAL
+        self.index = 0
+
+
+class Call:
+    __slots__ = ("callee", "arguments", "line")
+
+    def __init__(self, callee, arguments, line):
+        self.callee = callee
+        self.arguments = arguments
+        self.line = line
+
+
+# statements
+
+
+class Expression:
+    __slots__ = ("expression",)
+
+    def __init__(self, expression):
+        self.expression = expression
+
+
+class Print:
+    __slots__ = ("expression",)
+
+    def __init__(self, expression):
+        self.expression = expression
+
+
+class Var:
+    __slots__ = ("name", "initializer", "line", "kind", "index")
+
+    def __init__(self, name, initializer, line):
+        self.name = name
+        self.initializer = initializer  # None for var x;
+        self.line = line
+        self.kind = GLOBAL
+        self.index = 0
+
+
+class Block:
+    __slots__ = ("statements",)
+
+    def __init__(self, statements):
+        self.statements = statements
+
+
+class If:
+    __slots__ = ("condition", "then_branch", "else_branch")
+
+    def __init__(self, condition, then_branch, else_branch):
+        self.condition = condition
+        self.then_branch = then_branch
+        self.else_branch = else_branch  # None without an else
+
+
+class While:
+    __slots__ = ("condition", "body")
+
+    def __init__(self, condition, body):
+        self.condition = condition
+        self.body = body
+
+
+class Function:
+    __slots__ = ("name", "params", "body", "line", "kind", "index", "frame_size", "cells", "upvalues")
+
+    def __init__(self, name, params, body, line):
+        self.name = name
+        self.params = params  # list of names
+        self.body = body  # list of statements
+        self.line = line
+        self.kind = GLOBAL  # where the function's own name is stored
+        self.index = 0
+        self.frame_size = len(params)  # slots a call needs, params first
+        self.cells = ()  # indexes of the params that closures capture
+        self.upvalues = ()  # (from frame, index) per captured variable, see LoxFunction
+
+
+class Return:
+    __slots__ = ("value", "line")
+
+    def __init__(self, value, line):
+        self.value = value  # None for a bare return;
+        self.line = line
+
+
+def format_number(value):
+    # lox prints whole numbers with one decimal in tokens and trees, 42 -> 42.0
+    return f"{int(value)}.0" if value.is_integer() else repr(value)
+
+
+def format_literal(value):
+    if value is None:
+        return "nil"
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    if isinstance(value, float):
+        return format_number(value)
+    return value
+
+
+def dump(node):
+    # (+ 1.0 (group 2.0)) style text, walked with an explicit stack so a deeply nested
+    # tree can't hit the recursion limit, and built as a list of parts to stay linear
+    parts = []
+    todo = [node]
+    while todo:
+        item = todo.pop()
+        if isinstance(item, str):
+            parts.append(item)
+        elif item.__class__ is Literal:
+            parts.append(format_literal(item.value))
+        elif item.__class__ is Grouping:
+            parts.append("(group ")
+            todo += (")", item.expression)
+        elif item.__class__ is Unary:
+            parts.append(f"({FIXED[item.operator]} ")
+            todo += (")", item.right)
+        elif item.__class__ is Variable:
+            parts.append(item.name)
+        elif item.__class__ is Assign:
+            parts.append(f"(= {item.name} ")
+            todo += (")", item.value)
+        elif item.__class__ is Call:
+            parts.append("(call ")
+            todo.append(")")
+            for argument in reversed(item.arguments):
+                todo += (argument, " ")
+            todo.append(item.callee)
+        else:
+            parts.append(f"({FIXED[item.operator]} ")
+            todo += (")", item.right, " ", item.left)
+    return "".join(parts)
+
+
+def dump_program(statements):
+    # one statement per line, nested statements indented under the one they belong to
+    lines = []
+    todo = [(statement, 0) for statement in reversed(statements)]
+    while todo:
+        item, depth = todo.pop()
+        indent = "  " * depth
+        kind = item.__class__
+        children = ()
+        if kind is str:
+            lines.append(indent + item)
+        elif kind is Expression:
+            lines.append(f"{indent}(; {dump(item.expression)})")
+        elif kind is Print:
+            lines.append(f"{indent}(print {dump(item.expression)})")
+        elif kind is Var:
+            initializer = "" if item.initializer is None else " " + dump(item.initializer)
+            lines.append(f"{indent}(var {item.name}{initializer})")
+        elif kind is Block:
+            lines.append(f"{indent}(block)")
+            children = item.statements
+        elif kind is If:
+            lines.append(f"{indent}(if {dump(item.condition)})")
+            if item.else_branch is not None:
+                todo += ((item.else_branch, depth + 1), ("(else)", depth))
+            children = (item.then_branch,)
+        elif kind is While:
+            lines.append(f"{indent}(while {dump(item.condition)})")
+            children = [item.body]
+        elif kind is Function:
+            lines.append(f"{indent}(fun {item.name} ({' '.join(item.params)}))")
+            children = item.body
+        else:
+            lines.append(f"{indent}(return{'' if item.value is None else ' ' + dump(item.value)})")
+        todo += ((child, depth + 1) for child in reversed(children))
+    return "\n".join(lines)
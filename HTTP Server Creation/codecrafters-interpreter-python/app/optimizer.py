@@ -0,0 +1,181 @@
+from app.nodes import (Assign, Binary, Block, Expression, Function, Grouping, If, Literal, Print,
+                       Return, Unary, Var, Variable, While)
+from app.runtime import divide, is_equal, is_truthy
+from app.scanner import (AND, BANG, BANG_EQUAL, EQUAL_EQUAL, GREATER, GREATER_EQUAL, LESS, LESS_EQUAL,
+                         MINUS, OR, PLUS, SLASH, STAR)
+
+
+#run --optimize, rewrites the parsed program before it's resolved or compiled
+#folds operators whose operands are all literals, so constant work inside a loop is done once
+#here instead of on every iteration, drops the branch of an if or the loop a constant condition
+#rules out, and drops statements after a return
+#only folds what can't fail at runtime, 1 + "a" is left alone so it still errors on the right line
+#lox has no static types, so expressions that read variables are never moved or folded
+
+# operators that want two numbers
+NUMERIC = {
+    MINUS: lambda a, b: a - b,
+    STAR: lambda a, b: a * b,
+    SLASH: divide,
+    GREATER: lambda a, b: a > b,
+    GREATER_EQUAL: lambda a, b: a >= b,
+    LESS: lambda a, b: a < b,
+    LESS_EQUAL: lambda a, b: a <= b,
+}
+
+APPLY = object()  # children are folded, now fold the node itself
+
+
+def fold_binary(node, left, right):
+    # the folded node, or node itself with its new operands when it can't be folded
+    op = node.operator
+    if left.__class__ is Literal and (op == AND or op == OR):
+        # the left value decides or hands over to the right, whatever the right is
+        return left if is_truthy(left.value) == (op == OR) else right
+    node.left = left
+    node.right = right
+    if left.__class__ is not Literal or right.__class__ is not Literal:
+        return node
+    a = left.value
+    b = right.value
+    if op == EQUAL_EQUAL:
+        return Literal(is_equal(a, b))
+    if op == BANG_EQUAL:
+        return Literal(not is_equal(a, b))
+    if op == PLUS:
+        if (a.__class__ is float and b.__class__ is float) or (a.__class__ is str and b.__class__ is str):
+            return Literal(a + b)
+        return node
+    if a.__class__ is float and b.__class__ is float:
+        return Literal(NUMERIC[op](a, b))
+    return node
+
+
+def fold_unary(node, right):
+    node.right = right
+    if right.__class__ is not Literal:
+        return node
+    if node.operator == BANG:
+        return Literal(not is_truthy(right.value))
+    if right.value.__class__ is float:
+        return Literal(-right.value)
+    return node
+
+
+def fold(node):
+    # the expression with every constant part folded, iterative like the interpreter's evaluate
+    values = []
+    todo = [node]
+    while todo:
+        item = todo.pop()
+        kind = item.__class__
+        if kind is tuple:
+            item = item[1]
+            kind = item.__class__
+            if kind is Binary:
+                right = values.pop()
+                values.append(fold_binary(item, values.pop(), right))
+            elif kind is Unary:
+                values.append(fold_unary(item, values.pop()))
+            elif kind is Assign:
+                item.value = values.pop()
+                values.append(item)
+            else:
+                count = len(item.arguments)
+                item.arguments = values[len(values) - count:]
+                del values[len(values) - count:]
+                item.callee = values.pop()
+                values.append(item)
+        elif kind is Literal or kind is Variable:
+            values.append(item)
+        elif kind is Binary:
+            todo += ((APPLY, item), item.right, item.left)
+        elif kind is Grouping:
+            # a group only matters to the parse command's output, not to evaluation
+            todo.append(item.expression)
+        elif kind is Unary:
+            todo += ((APPLY, item), item.right)
+        elif kind is Assign:
+            todo += ((APPLY, item), item.value)
+        else:
+            todo.append((APPLY, item))
+            todo += reversed(item.arguments)
+            todo.append(item.callee)
+    return values[0]
+
+
+class Optimizer:
+    def __init__(self):
+        self.optimizers = {
+            Expression: self.optimize_expression_statement,
+            Print: self.optimize_expression_statement,
+            Var: self.optimize_var,
+            Block: self.optimize_block,
+            If: self.optimize_if,
+            While: self.optimize_while,
+            Function: self.optimize_function,
+            Return: self.optimize_return,
+        }
+
+    def optimize(self, statements):
+        return self.statements(statements)
+
+    def statements(self, statements):
+        result = []
+        for statement in statements:
+            statement = self.statement(statement)
+            if statement is not None:
+                result.append(statement)
+                if statement.__class__ is Return:
+                    # nothing after a return can run
+                    break
+        return result
+
+    def statement(self, statement):
+        # the optimized statement, or None when it does nothing
+        return self.optimizers[statement.__class__](statement)
+
+    def optimize_expression_statement(self, statement):
+        statement.expression = fold(statement.expression)
+        if statement.__class__ is Expression and statement.expression.__class__ is Literal:
+            # evaluating it has no effect
+            return None
+        return statement
+
+    def optimize_var(self, statement):
+        if statement.initializer is not None:
+            statement.initializer = fold(statement.initializer)
+        return statement
+
+    def optimize_block(self, statement):
+        statement.statements = self.statements(statement.statements)
+        return statement if statement.statements else None
+
+    def optimize_if(self, statement):
+        condition = fold(statement.condition)
+        then_branch = self.statement(statement.then_branch)
+        else_branch = None if statement.else_branch is None else self.statement(statement.else_branch)
+        if condition.__class__ is Literal:
+            return then_branch if is_truthy(condition.value) else else_branch
+        statement.condition = condition
+        statement.then_branch = Block([]) if then_branch is None else then_branch
+        statement.else_branch = else_branch
+        return statement
+
+    def optimize_while(self, statement):
+        condition = fold(statement.condition)
+        if condition.__class__ is Literal and not is_truthy(condition.value):
+            return None
+        body = self.statement(statement.body)
+        statement.condition = condition
+        statement.body = Block([]) if body is None else body
+        return statement
+
+    def optimize_function(self, statement):
+        statement.body = self.statements(statement.body)
+        return statement
+
+    def optimize_return(self, statement):
+        if statement.value is not None:
+            statement.value = fold(statement.value)
+        return statement
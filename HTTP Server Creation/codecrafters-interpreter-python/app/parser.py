@@ -0,0 +1,316 @@
+import sys
+
+from app.nodes import (Assign, Binary, Block, Call, Expression, Function, Grouping, If, Literal, Print,
+                       Return, Unary, Var, Variable, While)
+from app.scanner import (AND, BANG, BANG_EQUAL, CLASS, COMMA, ELSE, EOF, EQUAL, EQUAL_EQUAL, FALSE, FOR,
+                         FUN, GREATER, GREATER_EQUAL, IDENTIFIER, IF, LEFT_BRACE, LEFT_PAREN, LESS,
+                         LESS_EQUAL, MINUS, NIL, NUMBER, OR, PLUS, PRINT, RETURN, RIGHT_BRACE,
+                         RIGHT_PAREN, SEMICOLON, SLASH, STAR, STRING, TRUE, VAR, WHILE)
+
+
+#parser for Lox, it pulls tokens from the scanner one at a time so the token list is never built
+#statements are plain recursive descent
+#expressions are precedence climbing that keeps pending operators, open parens and calls on
+#its own stack instead of recursing, so how deeply an expression nests only costs list
+#entries, never python stack frames, and every token is pushed and popped at most once
+#which keeps it linear in the input
+
+MAX_ARGS = 255
+
+# binding power, higher binds tighter
+GROUP = 0  # an open ( or call on the operator stack, nothing reduces past it
+ASSIGNMENT = 1  # the only right associative one
+INFIX = {
+    EQUAL: ASSIGNMENT,
+    OR: 2,
+    AND: 3,
+    EQUAL_EQUAL: 4, BANG_EQUAL: 4,
+    GREATER: 5, GREATER_EQUAL: 5, LESS: 5, LESS_EQUAL: 5,
+    MINUS: 6, PLUS: 6,
+    SLASH: 7, STAR: 7,
+}
+PREFIX = 8  # ! and - bind tighter than any infix operator
+
+LITERALS = {TRUE: True, FALSE: False, NIL: None}
+
+# tokens that start a statement, where error recovery picks up again
+STATEMENT_START = {CLASS, FUN, VAR, FOR, IF, WHILE, PRINT, RETURN}
+
+
+class ParseError(Exception):
+    def __init__(self, token, message, source):
+        where = "end" if token.type == EOF else f"'{token.lexeme(source)}'"
+        super().__init__(f"[line {token.line}] Error at {where}: {message}")
+        self.token = token
+
+
+class Parser:
+    def __init__(self, source, tokens):
+        self.source = source
+        self.tokens = iter(tokens)
+        self.previous = None
+        self.current = next(self.tokens)
+
+    def advance(self):
+        token = self.previous = self.current
+        self.current = next(self.tokens)
+        return token
+
+    def check(self, kind):
+        return self.current.type == kind
+
+    def match(self, kind):
+        if self.current.type == kind:
+            self.advance()
+            return True
+        return False
+
+    def consume(self, kind, message):
+        if self.current.type != kind:
+            raise self.error(message)
+        return self.advance()
+
+    def error(self, message, token=None):
+        return ParseError(token or self.current, message, self.source)
+
+    def name(self, token):
+        return sys.intern(token.lexeme(self.source))
+
+    def parse_expression(self):
+        # a whole input that must be exactly one expression, what parse/evaluate take
+        expr = self.expression()
+        if self.current.type != EOF:
+            raise self.error("Expect end of expression.")
+        return expr
+
+    def parse_program(self, report):
+        # every declaration up to EOF, report(message) is called for each syntax error and
+        # parsing carries on from the next statement so they all get reported
+        statements = []
+        while self.current.type != EOF:
+            try:
+                statements.append(self.declaration())
+            except ParseError as e:
+                report(str(e))
+                self.synchronize()
+        return statements
+
+    def synchronize(self):
+        # skip the token the error was at first, stopping on it could raise the same error forever
+        if self.current.type != EOF:
+            self.advance()
+        while self.current.type != EOF:
+            if self.previous is not None and self.previous.type == SEMICOLON:
+                return
+            if self.current.type in STATEMENT_START:
+                return
+            self.advance()
+
+    # statements
+
+    def declaration(self):
+        if self.match(FUN):
+            return self.function()
+        if self.match(VAR):
+            return self.var_declaration()
+        return self.statement()
+
+    def function(self):
+        line = self.current.line
+        name = self.name(self.consume(IDENTIFIER, "Expect function name."))
+        self.consume(LEFT_PAREN, "Expect '(' after function name.")
+        params = []
+        if not self.check(RIGHT_PAREN):
+            while True:
+                if len(params) >= MAX_ARGS:
+                    raise self.error(f"Can't have more than {MAX_ARGS} parameters.")
+                params.append(self.name(self.consume(IDENTIFIER, "Expect parameter name.")))
+                if not self.match(COMMA):
+                    break
+        self.consume(RIGHT_PAREN, "Expect ')' after parameters.")
+        self.consume(LEFT_BRACE, "Expect '{' before function body.")
+        return Function(name, params, self.block(), line)
+
+    def var_declaration(self):
+        token = self.consume(IDENTIFIER, "Expect variable name.")
+        initializer = self.expression() if self.match(EQUAL) else None
+        self.consume(SEMICOLON, "Expect ';' after variable declaration.")
+        return Var(self.name(token), initializer, token.line)
+
+    def statement(self):
+        kind = self.current.type
+        if kind == PRINT:
+            self.advance()
+            value = self.expression()
+            self.consume(SEMICOLON, "Expect ';' after value.")
+            return Print(value)
+        if kind == LEFT_BRACE:
+            self.advance()
+            return Block(self.block())
+        if kind == IF:
+            return self.if_statement()
+        if kind == WHILE:
+            return self.while_statement()
+        if kind == FOR:
+            return self.for_statement()
+        if kind == RETURN:
+            keyword = self.advance()
+            value = None if self.check(SEMICOLON) else self.expression()
+            self.consume(SEMICOLON, "Expect ';' after return value.")
+            return Return(value, keyword.line)
+        expr = self.expression()
+        self.consume(SEMICOLON, "Expect ';' after expression.")
+        return Expression(expr)
+
+    def block(self):
+        # the statements up to the closing }, the { is already consumed
+        statements = []
+        while not self.check(RIGHT_BRACE) and not self.check(EOF):
+            statements.append(self.declaration())
+        self.consume(RIGHT_BRACE, "Expect '}' after block.")
+        return statements
+
+    def if_statement(self):
+        self.advance()
+        self.consume(LEFT_PAREN, "Expect '(' after 'if'.")
+        condition = self.expression()
+        self.consume(RIGHT_PAREN, "Expect ')' after if condition.")
+        then_branch = self.statement()
+        else_branch = self.statement() if self.match(ELSE) else None
+        return If(condition, then_branch, else_branch)
+
+    def while_statement(self):
+        self.advance()
+        self.consume(LEFT_PAREN, "Expect '(' after 'while'.")
+        condition = self.expression()
+        self.consume(RIGHT_PAREN, "Expect ')' after condition.")
+        return While(condition, self.statement())
+
+    def for_statement(self):
+        # no node of its own, it turns into { initializer; while (condition) { body; increment; } }
+        self.advance()
+        self.consume(LEFT_PAREN, "Expect '(' after 'for'.")
+        if self.match(SEMICOLON):
+            initializer = None
+        elif self.match(VAR):
+            initializer = self.var_declaration()
+        else:
+            expr = self.expression()
+            self.consume(SEMICOLON, "Expect ';' after expression.")
+            initializer = Expression(expr)
+        condition = Literal(True) if self.check(SEMICOLON) else self.expression()
+        self.consume(SEMICOLON, "Expect ';' after loop condition.")
+        increment = None if self.check(RIGHT_PAREN) else self.expression()
+        self.consume(RIGHT_PAREN, "Expect ')' after for clauses.")
+
+        body = self.statement()
+        if increment is not None:
+            body = Block([body, Expression(increment)])
+        body = While(condition, body)
+        if initializer is not None:
+            body = Block([initializer, body])
+        return body
+
+    # expressions
+
+    def expression(self):
+        operands = []
+        # (binding power, token, call) for operators waiting on their right operand, call is
+        # [callee, arguments so far] for the ( of a call and None for everything else
+        operators = []
+        groups = []  # the call entry (or None for a plain paren) of every ( still open
+
+        def reduce():
+            power, token, _ = operators.pop()
+            right = operands.pop()
+            if power == PREFIX:
+                operands.append(Unary(token.type, right, token.line))
+            elif power == ASSIGNMENT:
+                operands.append(Assign(operands.pop().name, right, token.line))
+            else:
+                operands.append(Binary(operands.pop(), token.type, right, token.line))
+
+        while True:
+            # prefix position: any number of ! - ( before an operand
+            while True:
+                kind = self.current.type
+                if kind == BANG or kind == MINUS:
+                    operators.append((PREFIX, self.advance(), None))
+                elif kind == LEFT_PAREN:
+                    operators.append((GROUP, self.advance(), None))
+                    groups.append(None)
+                else:
+                    break
+            operands.append(self.primary())
+
+            # infix position: calls and closing parens, then an operator or the end of the expression
+            while True:
+                kind = self.current.type
+                power = INFIX.get(kind)
+                if power is not None:
+                    break
+                if kind == LEFT_PAREN:
+                    paren = self.advance()
+                    if self.check(RIGHT_PAREN):
+                        operands.append(Call(operands.pop(), [], self.advance().line))
+                        continue
+                    call = [operands.pop(), []]
+                    operators.append((GROUP, paren, call))
+                    groups.append(call)
+                    break
+                if groups and (kind == RIGHT_PAREN or (kind == COMMA and groups[-1] is not None)):
+                    while operators[-1][0] != GROUP:
+                        reduce()
+                    call = groups[-1]
+                    if call is None:
+                        operators.pop()
+                        groups.pop()
+                        operands.append(Grouping(operands.pop()))
+                        self.advance()
+                        continue
+                    if len(call[1]) >= MAX_ARGS:
+                        raise self.error(f"Can't have more than {MAX_ARGS} arguments.")
+                    call[1].append(operands.pop())
+                    if kind == COMMA:
+                        self.advance()
+                        break
+                    operators.pop()
+                    groups.pop()
+                    operands.append(Call(call[0], call[1], self.advance().line))
+                    continue
+                # end of the expression, a ( still open means its ) is missing
+                if groups:
+                    raise self.error("Expect ')' after arguments." if groups[-1] is not None
+                                     else "Expect ')' after expression.")
+                while operators:
+                    reduce()
+                return operands[0]
+
+            if power is None:
+                # just opened a call or moved past a comma, the next argument starts here
+                continue
+            if power == ASSIGNMENT:
+                # right associative, and only something like a plain variable can be assigned to
+                while operators and operators[-1][0] > ASSIGNMENT:
+                    reduce()
+                if operands[-1].__class__ is not Variable:
+                    raise self.error("Invalid assignment target.")
+            else:
+                # everything on the stack that binds at least as tight is complete now
+                while operators and operators[-1][0] >= power:
+                    reduce()
+            operators.append((power, self.advance(), None))
+
+    def primary(self):
+        token = self.current
+        kind = token.type
+        if kind == NUMBER or kind == STRING:
+            self.advance()
+            return Literal(token.literal(self.source))
+        if kind == IDENTIFIER:
+            self.advance()
+            return Variable(self.name(token), token.line)
+        if kind in LITERALS:
+            self.advance()
+            return Literal(LITERALS[kind])
+        raise self.error("Expect expression.")
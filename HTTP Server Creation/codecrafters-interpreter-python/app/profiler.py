@@ -0,0 +1,140 @@
+import time
+from array import array
+
+from app.bytecode import (COUNT, ENTER, JUMP, JUMP_IF_FALSE, JUMP_IF_TRUE, LEAVE, POP_JUMP_IF_FALSE, RETURN,
+                          FunctionCode)
+
+
+#run --profile, counts every bytecode instruction the VM executes and times every lox call
+#instead of the VM checking a flag on each instruction, the profiler hands it a copy of the
+#script with a COUNT before every instruction, ENTER at the start of every function and LEAVE
+#before every RETURN, so the normal dispatch loop pays nothing when profiling is off
+#report() prints the hot functions and lines, collapsed() writes one "script;outer;inner <usec>"
+#line per call stack with the time spent in its last function, what flamegraph.pl and
+#speedscope read
+
+JUMPS = (JUMP, POP_JUMP_IF_FALSE, JUMP_IF_FALSE, JUMP_IF_TRUE)
+
+
+class FunctionStats:
+    __slots__ = ("name", "line", "calls", "total", "own", "active")
+
+    def __init__(self, name, line):
+        self.name = name
+        self.line = line
+        self.calls = 0
+        self.total = 0.0  # seconds inside the function, outermost call of a recursion only
+        self.own = 0.0  # seconds not spent in the lox functions it called
+        self.active = 0  # calls of it currently running
+
+
+class Profiler:
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.functions = []  # FunctionStats, ENTER's argument indexes it
+        self.sites = array("i")  # function index of every counted instruction
+        self.site_lines = array("i")
+        self.counts = []  # COUNT's argument indexes it, bumped by the VM
+        self.calls = []  # [function, start, seconds in callees, stack] per running call
+        self.stacks = {}  # tuple of function indexes -> own seconds
+
+    def instrument(self, script):
+        # the instrumented copy of script, nested functions included
+        return self.copy(script)
+
+    def copy(self, function):
+        index = len(self.functions)
+        code = function.code
+        lines = function.lines
+        first = lines[0] if len(lines) else 0
+        self.functions.append(FunctionStats(function.name or "<script>", first))
+
+        new_code = array("i", (ENTER, index))
+        new_lines = array("i", (first,))
+        starts = []  # new position of every old instruction, its COUNT
+        for ip in range(0, len(code), 2):
+            op = code[ip]
+            line = lines[ip // 2]
+            starts.append(len(new_code))
+            new_code += array("i", (COUNT, len(self.counts)))
+            new_lines.append(line)
+            self.counts.append(0)
+            self.sites.append(index)
+            self.site_lines.append(line)
+            if op == RETURN:
+                new_code += array("i", (LEAVE, 0))
+                new_lines.append(line)
+            new_code += array("i", (op, code[ip + 1]))
+            new_lines.append(line)
+        starts.append(len(new_code))
+        for ip in range(0, len(new_code), 2):
+            if new_code[ip] in JUMPS:
+                new_code[ip + 1] = starts[new_code[ip + 1] // 2]
+
+        constants = [self.copy(constant) if constant.__class__ is FunctionCode else constant
+                     for constant in function.constants]
+        return FunctionCode(function.name, function.arity, new_code, constants, new_lines, function.upvalues)
+
+    # called by the VM
+
+    def enter(self, index):
+        stats = self.functions[index]
+        stats.calls += 1
+        stats.active += 1
+        stack = (self.calls[-1][3] if self.calls else ()) + (index,)
+        self.calls.append([index, self.clock(), 0.0, stack])
+
+    def leave(self, now=None):
+        index, start, inner, stack = self.calls.pop()
+        elapsed = (self.clock() if now is None else now) - start
+        stats = self.functions[index]
+        stats.active -= 1
+        if stats.active == 0:
+            stats.total += elapsed
+        stats.own += elapsed - inner
+        self.stacks[stack] = self.stacks.get(stack, 0.0) + elapsed - inner
+        if self.calls:
+            self.calls[-1][2] += elapsed
+
+    def finish(self):
+        # a runtime error stopped the program with calls still running, end them now
+        now = self.clock()
+        while self.calls:
+            self.leave(now)
+
+    # output
+
+    def report(self, out, source, top=20):
+        self.finish()
+        total = sum(self.counts) or 1
+        per_function = [0] * len(self.functions)
+        per_line = {}
+        for site, count in enumerate(self.counts):
+            if count:
+                per_function[self.sites[site]] += count
+                line = self.site_lines[site]
+                per_line[line] = per_line.get(line, 0) + count
+        text = source.splitlines()
+
+        out.write(f"== profile: {sum(self.counts)} instructions ==\n")
+        out.write(f"{'function':<24} {'line':>5} {'calls':>9} {'total s':>9} {'own s':>9} "
+                  f"{'instructions':>13} {'%':>6}\n")
+        order = sorted(range(len(self.functions)), key=lambda i: (-self.functions[i].own, -per_function[i]))
+        for index in order[:top]:
+            stats = self.functions[index]
+            count = per_function[index]
+            out.write(f"{stats.name:<24} {stats.line:>5} {stats.calls:>9} {stats.total:>9.4f} {stats.own:>9.4f} "
+                      f"{count:>13} {100 * count / total:>5.1f}%\n")
+
+        out.write(f"\n{'line':>5} {'instructions':>13} {'%':>6}  source\n")
+        for line, count in sorted(per_line.items(), key=lambda item: -item[1])[:top]:
+            code = text[line - 1].strip() if 0 < line <= len(text) else ""
+            out.write(f"{line:>5} {count:>13} {100 * count / total:>5.1f}%  {code[:60]}\n")
+
+    def collapsed(self, out):
+        self.finish()
+        names = [stats.name for stats in self.functions]
+        for stack, seconds in sorted(self.stacks.items()):
+            micros = round(seconds * 1e6)
+            if micros:
+                out.write(f"{';'.join(names[index] for index in stack)} {micros}\n")
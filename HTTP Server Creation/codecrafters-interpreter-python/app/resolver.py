@@ -0,0 +1,223 @@
+from app.nodes import (CELL, GLOBAL, LOCAL, UPVALUE, Assign, Binary, Block, Call, Expression, Function,
+                       Grouping, If, Literal, Print, Return, Unary, Var, Variable, While)
+
+
+#static pass the tree walker runs before executing, fills in kind and index on every node that
+#names a variable (see STORAGE in nodes) so the interpreter indexes lists instead of walking
+#a chain of dicts
+#every function call gets one flat frame list, block scopes inside it just take the next slots
+#and give them back when they end, so entering a block costs nothing at runtime
+#a local only goes in a cell when an inner function uses it, and a closure only keeps the cells
+#it uses rather than the whole environment it was created in
+#top level variables stay globals looked up by name, lox lets functions use globals that are
+#defined after them
+
+
+class Local:
+    __slots__ = ("name", "slot", "ready", "captured", "nodes")
+
+    def __init__(self, name, slot):
+        self.name = name
+        self.slot = slot
+        self.ready = False  # false while its initializer is being resolved
+        self.captured = False
+        self.nodes = []  # nodes that read or write it, their kind is set once we know if it's captured
+
+
+class FunctionScope:
+    def __init__(self, function, enclosing):
+        self.function = function
+        self.enclosing = enclosing
+        self.scopes = []  # one {name: Local} per open block
+        self.next_slot = 0
+        self.upvalues = []  # (from frame, index) like Function.upvalues
+        self.upvalue_index = {}
+
+
+class Resolver:
+    def __init__(self, report):
+        self.report = report  # called with the message of every static error
+        self.function = None
+        self.resolvers = {
+            Expression: self.resolve_expression_statement,
+            Print: self.resolve_expression_statement,
+            Var: self.resolve_var,
+            Block: self.resolve_block,
+            If: self.resolve_if,
+            While: self.resolve_while,
+            Function: self.resolve_function_statement,
+            Return: self.resolve_return,
+        }
+
+    def resolve(self, statements):
+        # returns the script as a nameless Function, so the interpreter knows its frame size
+        script = Function(None, [], statements, 0)
+        self.function = FunctionScope(script, None)
+        for statement in statements:
+            self.statement(statement)
+        script.frame_size = max(script.frame_size, self.function.next_slot)
+        return script
+
+    def error(self, line, where, message):
+        self.report(f"[line {line}] Error at '{where}': {message}")
+
+    # scopes
+
+    def begin_scope(self):
+        self.function.scopes.append({})
+
+    def end_scope(self):
+        function = self.function
+        for local in function.scopes.pop().values():
+            finish(local)
+            function.next_slot -= 1
+
+    def declare(self, node):
+        # a new variable for a Var or Function node, globals when no block is open
+        function = self.function
+        if not function.scopes:
+            node.kind = GLOBAL
+            return None
+        scope = function.scopes[-1]
+        if node.name in scope:
+            self.error(node.line, node.name, "Already a variable with this name in this scope.")
+        local = scope[node.name] = Local(node.name, function.next_slot)
+        function.next_slot += 1
+        code = function.function
+        code.frame_size = max(code.frame_size, function.next_slot)
+        local.nodes.append(node)
+        return local
+
+    def reference(self, node):
+        # a Variable or Assign node
+        local = self.find(self.function, node.name)
+        if local is not None:
+            if not local.ready:
+                self.error(node.line, node.name, "Can't read local variable in its own initializer.")
+            local.nodes.append(node)
+            return
+        index = self.upvalue(self.function, node.name)
+        if index is None:
+            node.kind = GLOBAL
+        else:
+            node.kind = UPVALUE
+            node.index = index
+
+    def find(self, function, name):
+        for scope in reversed(function.scopes):
+            local = scope.get(name)
+            if local is not None:
+                return local
+        return None
+
+    def upvalue(self, function, name):
+        # index of name in function's upvalues, adding it (and to every function in between)
+        # when it's a local of some enclosing function, None when it's a global
+        enclosing = function.enclosing
+        if enclosing is None:
+            return None
+        local = self.find(enclosing, name)
+        if local is not None:
+            local.captured = True
+            key = (True, local.slot)
+        else:
+            index = self.upvalue(enclosing, name)
+            if index is None:
+                return None
+            key = (False, index)
+        index = function.upvalue_index.get(key)
+        if index is None:
+            index = function.upvalue_index[key] = len(function.upvalues)
+            function.upvalues.append(key)
+        return index
+
+    # statements
+
+    def statement(self, statement):
+        self.resolvers[statement.__class__](statement)
+
+    def resolve_expression_statement(self, statement):
+        self.expression(statement.expression)
+
+    def resolve_var(self, statement):
+        local = self.declare(statement)
+        if statement.initializer is not None:
+            self.expression(statement.initializer)
+        if local is not None:
+            local.ready = True
+
+    def resolve_block(self, statement):
+        self.begin_scope()
+        for inner in statement.statements:
+            self.statement(inner)
+        self.end_scope()
+
+    def resolve_if(self, statement):
+        self.expression(statement.condition)
+        self.statement(statement.then_branch)
+        if statement.else_branch is not None:
+            self.statement(statement.else_branch)
+
+    def resolve_while(self, statement):
+        self.expression(statement.condition)
+        self.statement(statement.body)
+
+    def resolve_function_statement(self, statement):
+        local = self.declare(statement)
+        if local is not None:
+            # ready straight away so the function can call itself
+            local.ready = True
+        self.resolve_function(statement)
+
+    def resolve_function(self, declaration):
+        self.function = FunctionScope(declaration, self.function)
+        self.begin_scope()
+        params = []
+        for param in declaration.params:
+            local = self.declare(Var(param, None, declaration.line))
+            local.ready = True
+            params.append(local)
+        for statement in declaration.body:
+            self.statement(statement)
+        declaration.cells = tuple(local.slot for local in params if local.captured)
+        declaration.upvalues = tuple(self.function.upvalues)
+        self.end_scope()
+        self.function = self.function.enclosing
+
+    def resolve_return(self, statement):
+        if self.function.enclosing is None:
+            self.error(statement.line, "return", "Can't return from top-level code.")
+        if statement.value is not None:
+            self.expression(statement.value)
+
+    # expressions
+
+    def expression(self, node):
+        todo = [node]
+        while todo:
+            item = todo.pop()
+            kind = item.__class__
+            if kind is Variable:
+                self.reference(item)
+            elif kind is Binary:
+                todo += (item.right, item.left)
+            elif kind is Grouping:
+                todo.append(item.expression)
+            elif kind is Unary:
+                todo.append(item.right)
+            elif kind is Assign:
+                self.reference(item)
+                todo.append(item.value)
+            elif kind is Call:
+                todo += reversed(item.arguments)
+                todo.append(item.callee)
+            elif kind is not Literal:
+                raise TypeError(f"can't resolve {kind.__name__}")
+
+
+def finish(local):
+    # the variable's scope is over so its nodes can be told where it lives
+    kind = CELL if local.captured else LOCAL
+    for node in local.nodes:
+        node.kind = kind
+        node.index = local.slot
@@ -0,0 +1,65 @@
+import time
+
+
+#values and rules both engines share: truthiness, equality, printing, runtime errors and
+#the native functions
+#lox values are python floats, strs, True/False and None for nil, plus the engines' own
+#function objects which print themselves through __str__
+
+
+class LoxRuntimeError(Exception):
+    def __init__(self, line, message):
+        super().__init__(message)
+        self.line = line
+
+
+class NativeFunction:
+    __slots__ = ("name", "arity", "fn")
+
+    def __init__(self, name, arity, fn):
+        self.name = name
+        self.arity = arity
+        self.fn = fn
+
+    def __str__(self):
+        return "<native fn>"
+
+
+NATIVES = {
+    "clock": NativeFunction("clock", 0, time.time),
+}
+
+MAX_CALL_DEPTH = 10000  # lox calls deeper than this are a stack overflow
+
+
+def is_truthy(value):
+    return value is not None and value is not False
+
+
+def is_equal(a, b):
+    # python says True == 1.0, lox doesn't mix types
+    return a.__class__ is b.__class__ and a == b
+
+
+def stringify(value):
+    if value is None:
+        return "nil"
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    if value.__class__ is float:
+        if value != value:
+            return "NaN"
+        if value in (float("inf"), float("-inf")):
+            return "Infinity" if value > 0 else "-Infinity"
+        # whole numbers print without the .0 when evaluated
+        return str(int(value)) if value.is_integer() else repr(value)
+    return str(value)
+
+
+def divide(a, b):
+    if b == 0:
+        # lox numbers are doubles, dividing by zero gives infinity rather than an error
+        return float("nan") if a == 0 or a != a else float("inf") if a > 0 else float("-inf")
+    return a / b
@@ -0,0 +1,157 @@
+import re
+import sys
+
+
+#Lox scanner, walks the source once by index and yields tokens as it finds them
+#single character tokens and the one-or-two character operators come from lookup tables,
+#identifiers, numbers and blanks are matched as a whole run starting at the current index
+#so we never loop over them a character at a time in python
+#tokens only hold offsets into the source, the text is sliced out when someone asks for it
+
+NAMES = (
+    "LEFT_PAREN", "RIGHT_PAREN", "LEFT_BRACE", "RIGHT_BRACE",
+    "COMMA", "DOT", "MINUS", "PLUS", "SEMICOLON", "SLASH", "STAR",
+    "BANG", "BANG_EQUAL", "EQUAL", "EQUAL_EQUAL",
+    "GREATER", "GREATER_EQUAL", "LESS", "LESS_EQUAL",
+    "IDENTIFIER", "STRING", "NUMBER",
+    "AND", "CLASS", "ELSE", "FALSE", "FUN", "FOR", "IF", "NIL", "OR",
+    "PRINT", "RETURN", "SUPER", "THIS", "TRUE", "VAR", "WHILE",
+    "EOF",
+)
+
+# token types are small ints, NAMES[type] is what tokenize prints
+(LEFT_PAREN, RIGHT_PAREN, LEFT_BRACE, RIGHT_BRACE,
+ COMMA, DOT, MINUS, PLUS, SEMICOLON, SLASH, STAR,
+ BANG, BANG_EQUAL, EQUAL, EQUAL_EQUAL,
+ GREATER, GREATER_EQUAL, LESS, LESS_EQUAL,
+ IDENTIFIER, STRING, NUMBER,
+ AND, CLASS, ELSE, FALSE, FUN, FOR, IF, NIL, OR,
+ PRINT, RETURN, SUPER, THIS, TRUE, VAR, WHILE,
+ EOF) = range(len(NAMES))
+
+KEYWORDS = {name.lower(): NAMES.index(name) for name in NAMES[AND:EOF]}
+
+SINGLE = {
+    "(": LEFT_PAREN, ")": RIGHT_PAREN, "{": LEFT_BRACE, "}": RIGHT_BRACE,
+    ",": COMMA, ".": DOT, "-": MINUS, "+": PLUS, ";": SEMICOLON, "*": STAR,
+}
+
+# char -> (type on its own, type when followed by =)
+DOUBLE = {
+    "!": (BANG, BANG_EQUAL),
+    "=": (EQUAL, EQUAL_EQUAL),
+    ">": (GREATER, GREATER_EQUAL),
+    "<": (LESS, LESS_EQUAL),
+}
+
+# the lexeme of every token type that always looks the same, None for IDENTIFIER, STRING and NUMBER
+FIXED = [None] * len(NAMES)
+for _text, _type in {**SINGLE, **KEYWORDS, "/": SLASH, "": EOF}.items():
+    FIXED[_type] = _text
+for _text, (_alone, _with_equal) in DOUBLE.items():
+    FIXED[_alone] = _text
+    FIXED[_with_equal] = _text + "="
+
+# one lookup per token decides what to do with the character at pos:
+# a token type for single character tokens, or one of these for everything else
+OPERATOR, BLANK, NEWLINE, WORD, DIGIT, QUOTE, SLASH_OR_COMMENT = range(100, 107)
+DISPATCH = dict(SINGLE)
+DISPATCH.update(dict.fromkeys(DOUBLE, OPERATOR))
+DISPATCH.update({" ": BLANK, "\t": BLANK, "\r": BLANK, "\n": NEWLINE, '"': QUOTE, "/": SLASH_OR_COMMENT})
+DISPATCH.update(dict.fromkeys("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ_", WORD))
+DISPATCH.update(dict.fromkeys("0123456789", DIGIT))
+
+WORD_RUN = re.compile(r"[A-Za-z0-9_]*")
+NUMBER_RUN = re.compile(r"[0-9]+(?:\.[0-9]+)?")
+
+
+class Token:
+    # source[start:start + length] is the lexeme, nothing is copied out of the source while scanning
+    # (length rather than end because small ints are shared, an end offset would be one more object)
+    __slots__ = ("type", "start", "length", "line")
+
+    def __init__(self, type, start, length, line):
+        self.type = type
+        self.start = start
+        self.length = length
+        self.line = line
+
+    def lexeme(self, source):
+        return source[self.start:self.start + self.length]
+
+    def literal(self, source):
+        # float for NUMBER, str for STRING, None otherwise
+        if self.type == NUMBER:
+            return float(self.lexeme(source))
+        if self.type == STRING:
+            return source[self.start + 1:self.start + self.length - 1]
+        return None
+
+    def __repr__(self):
+        return f"<Token {NAMES[self.type]} at {self.start}+{self.length} line {self.line}>"
+
+
+def report(line, message):
+    print(f"[line {line}] Error: {message}", file=sys.stderr)
+
+
+def scan(source, error=report):
+    # generator of Tokens ending with EOF, error(line, message) is called for every
+    # lexical error and scanning carries on after it so they all get reported
+    # branches are ordered by how often they come up in real code
+    pos = 0
+    line = 1
+    end = len(source)
+    dispatch = DISPATCH
+    keywords = KEYWORDS
+    word_run = WORD_RUN.match
+    number_run = NUMBER_RUN.match
+    while pos < end:
+        c = source[pos]
+        kind = dispatch.get(c, -1)
+        if kind < OPERATOR:
+            if kind < 0:
+                error(line, f"Unexpected character: {c}")
+            else:
+                yield Token(kind, pos, 1, line)
+            pos += 1
+        elif kind == BLANK:
+            pos += 1
+        elif kind == WORD:
+            stop = word_run(source, pos).end()
+            yield Token(keywords.get(source[pos:stop], IDENTIFIER), pos, stop - pos, line)
+            pos = stop
+        elif kind == NEWLINE:
+            line += 1
+            pos += 1
+        elif kind == OPERATOR:
+            alone, with_equal = DOUBLE[c]
+            if source.startswith("=", pos + 1):
+                yield Token(with_equal, pos, 2, line)
+                pos += 2
+            else:
+                yield Token(alone, pos, 1, line)
+                pos += 1
+        elif kind == DIGIT:
+            stop = number_run(source, pos).end()
+            yield Token(NUMBER, pos, stop - pos, line)
+            pos = stop
+        elif kind == QUOTE:
+            close = source.find('"', pos + 1)
+            if close == -1:
+                line += source.count("\n", pos, end)
+                error(line, "Unterminated string.")
+                break
+            # strings may span lines, the token gets the line it ends on
+            line += source.count("\n", pos, close)
+            yield Token(STRING, pos, close + 1 - pos, line)
+            pos = close + 1
+        elif source.startswith("/", pos + 1):
+            # comment, skip to the newline and let the NEWLINE branch count it
+            pos = source.find("\n", pos)
+            if pos == -1:
+                pos = end
+        else:
+            yield Token(SLASH, pos, 1, line)
+            pos += 1
+    yield Token(EOF, end, 0, line)
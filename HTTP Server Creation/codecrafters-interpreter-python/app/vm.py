@@ -0,0 +1,251 @@
+from app.bytecode import (ADD, CALL, CLOSE_UPVALUE, CLOSURE, CONSTANT, DEFINE_GLOBAL, DIVIDE, EQUAL, FALSE,
+                          GET_GLOBAL, GET_LOCAL, GET_UPVALUE, GREATER, GREATER_EQUAL, JUMP, JUMP_IF_FALSE,
+                          JUMP_IF_TRUE, LESS, LESS_EQUAL, MULTIPLY, NEGATE, NIL, NOT, NOT_EQUAL, POP,
+                          POP_JUMP_IF_FALSE, PRINT, RETURN, SET_GLOBAL, SET_LOCAL, SET_UPVALUE, SUBTRACT,
+                          TRUE, COUNT, ENTER, LEAVE)
+from app.runtime import MAX_CALL_DEPTH, NATIVES, LoxRuntimeError, NativeFunction, divide, stringify
+
+
+#stack VM for run --vm
+#one flat value stack shared by every call, a frame's locals are the slots from its base up
+#the dispatch loop keeps the running function's code, constants and base in locals and
+#tests the opcodes most programs spend their time in first
+#lox calls push a frame onto a list instead of recursing in python, so recursion depth is
+#only limited by MAX_CALL_DEPTH
+#the profiler's COUNT/ENTER/LEAVE come last in the chain, so normal code never tests for them
+
+
+class Closure:
+    __slots__ = ("function", "upvalues")
+
+    def __init__(self, function, upvalues):
+        self.function = function
+        self.upvalues = upvalues
+
+    def __str__(self):
+        return str(self.function)
+
+
+class Upvalue:
+    # cells[index] is the variable: the VM stack and a slot while it's in scope,
+    # then a one item list of its own once the scope has ended
+    __slots__ = ("cells", "index")
+
+    def __init__(self, cells, index):
+        self.cells = cells
+        self.index = index
+
+
+class VM:
+    def __init__(self, out, profiler=None):
+        self.out = out
+        self.globals = dict(NATIVES)
+        self.profiler = profiler  # runs the profiler's instrumented copy of the script when set
+
+    def run(self, script):
+        profiler = self.profiler
+        if profiler is not None:
+            script = profiler.instrument(script)
+            counts = profiler.counts
+        stack = [Closure(script, [])]
+        frames = []  # (function, code, constants, ip, base, upvalues) of every caller
+        open_upvalues = {}  # stack slot -> Upvalue still pointing at it
+        globals_ = self.globals
+        write = self.out.write
+        push = stack.append
+        pop = stack.pop
+
+        function = script
+        code = function.code
+        constants = function.constants
+        upvalues = []
+        ip = 0
+        base = 0
+        try:
+            while True:
+                op = code[ip]
+                arg = code[ip + 1]
+                ip += 2
+                if op == GET_LOCAL:
+                    push(stack[base + arg])
+                elif op == CONSTANT:
+                    push(constants[arg])
+                elif op == ADD:
+                    b = pop()
+                    a = stack[-1]
+                    if (a.__class__ is float and b.__class__ is float) or (a.__class__ is str and b.__class__ is str):
+                        stack[-1] = a + b
+                    else:
+                        raise LoxRuntimeError(None, "Operands must be two numbers or two strings.")
+                elif op == POP_JUMP_IF_FALSE:
+                    value = pop()
+                    if value is None or value is False:
+                        ip = arg
+                elif op == LESS:
+                    b = pop()
+                    a = stack[-1]
+                    if a.__class__ is not float or b.__class__ is not float:
+                        raise LoxRuntimeError(None, "Operands must be numbers.")
+                    stack[-1] = a < b
+                elif op == SET_LOCAL:
+                    stack[base + arg] = stack[-1]
+                elif op == POP:
+                    pop()
+                elif op == JUMP:
+                    ip = arg
+                elif op == GET_GLOBAL:
+                    try:
+                        push(globals_[constants[arg]])
+                    except KeyError:
+                        raise LoxRuntimeError(None, f"Undefined variable '{constants[arg]}'.") from None
+                elif op == SUBTRACT:
+                    b = pop()
+                    a = stack[-1]
+                    if a.__class__ is not float or b.__class__ is not float:
+                        raise LoxRuntimeError(None, "Operands must be numbers.")
+                    stack[-1] = a - b
+                elif op == CALL:
+                    callee = stack[-1 - arg]
+                    if callee.__class__ is Closure:
+                        target = callee.function
+                        if arg != target.arity:
+                            raise LoxRuntimeError(None, f"Expected {target.arity} arguments but got {arg}.")
+                        if len(frames) >= MAX_CALL_DEPTH:
+                            raise LoxRuntimeError(None, "Stack overflow.")
+                        frames.append((function, code, constants, ip, base, upvalues))
+                        function = target
+                        code = target.code
+                        constants = target.constants
+                        upvalues = callee.upvalues
+                        ip = 0
+                        base = len(stack) - arg - 1
+                    elif callee.__class__ is NativeFunction:
+                        if arg != callee.arity:
+                            raise LoxRuntimeError(None, f"Expected {callee.arity} arguments but got {arg}.")
+                        result = callee.fn(*stack[len(stack) - arg:])
+                        del stack[len(stack) - arg - 1:]
+                        push(result)
+                    else:
+                        raise LoxRuntimeError(None, "Can only call functions and classes.")
+                elif op == RETURN:
+                    result = pop()
+                    if open_upvalues:
+                        self.close_upvalues(open_upvalues, stack, base)
+                    if not frames:
+                        return
+                    del stack[base:]
+                    push(result)
+                    function, code, constants, ip, base, upvalues = frames.pop()
+                elif op == GET_UPVALUE:
+                    upvalue = upvalues[arg]
+                    push(upvalue.cells[upvalue.index])
+                elif op == SET_UPVALUE:
+                    upvalue = upvalues[arg]
+                    upvalue.cells[upvalue.index] = stack[-1]
+                elif op == MULTIPLY:
+                    b = pop()
+                    a = stack[-1]
+                    if a.__class__ is not float or b.__class__ is not float:
+                        raise LoxRuntimeError(None, "Operands must be numbers.")
+                    stack[-1] = a * b
+                elif op == GREATER:
+                    b = pop()
+                    a = stack[-1]
+                    if a.__class__ is not float or b.__class__ is not float:
+                        raise LoxRuntimeError(None, "Operands must be numbers.")
+                    stack[-1] = a > b
+                elif op == LESS_EQUAL:
+                    b = pop()
+                    a = stack[-1]
+                    if a.__class__ is not float or b.__class__ is not float:
+                        raise LoxRuntimeError(None, "Operands must be numbers.")
+                    stack[-1] = a <= b
+                elif op == GREATER_EQUAL:
+                    b = pop()
+                    a = stack[-1]
+                    if a.__class__ is not float or b.__class__ is not float:
+                        raise LoxRuntimeError(None, "Operands must be numbers.")
+                    stack[-1] = a >= b
+                elif op == EQUAL:
+                    b = pop()
+                    a = stack[-1]
+                    stack[-1] = a.__class__ is b.__class__ and a == b
+                elif op == NOT_EQUAL:
+                    b = pop()
+                    a = stack[-1]
+                    stack[-1] = not (a.__class__ is b.__class__ and a == b)
+                elif op == DIVIDE:
+                    b = pop()
+                    a = stack[-1]
+                    if a.__class__ is not float or b.__class__ is not float:
+                        raise LoxRuntimeError(None, "Operands must be numbers.")
+                    stack[-1] = divide(a, b)
+                elif op == NOT:
+                    value = stack[-1]
+                    stack[-1] = value is None or value is False
+                elif op == NEGATE:
+                    value = stack[-1]
+                    if value.__class__ is not float:
+                        raise LoxRuntimeError(None, "Operand must be a number.")
+                    stack[-1] = -value
+                elif op == NIL:
+                    push(None)
+                elif op == TRUE:
+                    push(True)
+                elif op == FALSE:
+                    push(False)
+                elif op == JUMP_IF_FALSE:
+                    value = stack[-1]
+                    if value is None or value is False:
+                        ip = arg
+                elif op == JUMP_IF_TRUE:
+                    value = stack[-1]
+                    if value is not None and value is not False:
+                        ip = arg
+                elif op == SET_GLOBAL:
+                    name = constants[arg]
+                    if name not in globals_:
+                        raise LoxRuntimeError(None, f"Undefined variable '{name}'.")
+                    globals_[name] = stack[-1]
+                elif op == DEFINE_GLOBAL:
+                    globals_[constants[arg]] = pop()
+                elif op == PRINT:
+                    write(stringify(pop()) + "\n")
+                elif op == CLOSURE:
+                    target = constants[arg]
+                    captured = []
+                    for is_local, index in target.upvalues:
+                        if is_local:
+                            slot = base + index
+                            upvalue = open_upvalues.get(slot)
+                            if upvalue is None:
+                                upvalue = open_upvalues[slot] = Upvalue(stack, slot)
+                            captured.append(upvalue)
+                        else:
+                            captured.append(upvalues[index])
+                    push(Closure(target, captured))
+                elif op == CLOSE_UPVALUE:
+                    upvalue = open_upvalues.pop(len(stack) - 1, None)
+                    if upvalue is not None:
+                        upvalue.cells = [stack[upvalue.index]]
+                        upvalue.index = 0
+                    pop()
+                elif op == COUNT:
+                    counts[arg] += 1
+                elif op == ENTER:
+                    profiler.enter(arg)
+                elif op == LEAVE:
+                    profiler.leave()
+                else:
+                    raise RuntimeError(f"unknown opcode {op}")
+        except LoxRuntimeError as e:
+            if e.line is None:
+                e.line = function.lines[(ip - 2) // 2]
+            raise
+
+    def close_upvalues(self, open_upvalues, stack, base):
+        # the frame from base up is going away, its captured slots take their values with them
+        for slot in [slot for slot in open_upvalues if slot >= base]:
+            upvalue = open_upvalues.pop(slot)
+            upvalue.cells = [stack[slot]]
+            upvalue.index = 0
@@ -0,0 +1,82 @@
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from app import cache
+from app.main import compile_program
+
+
+#startup time of run --vm on a big script, compiling from source against loading __loxcache__
+#run from this folder: python3 bench_cache.py --functions 5000
+#the generated script defines lots of functions and calls one, so nearly all the time is the
+#front end (or the cache load) and process startup, not running lox
+#"in process" times just compile_program() against cache.load(), "end to end" times the whole
+#python3 -m app.main run, cold meaning --no-cache
+
+FUNCTION = """
+fun f{n}(a, b) {{
+  var total = 0;
+  for (var i = 0; i < a; i = i + 1) {{
+    if (i * 2 > b and !(i == 3)) total = total + i / 2;
+    else total = total - {n};
+  }}
+  fun inner(x) {{ return x + a * {n}; }}
+  return inner(total);
+}}
+"""
+
+
+def generate(functions):
+    return "".join(FUNCTION.format(n=n) for n in range(functions)) + "print f0(0, 0);\n"
+
+
+def timed(command, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the bytecode cache against compiling from source")
+    parser.add_argument("--functions", type=int, default=5000, help="functions in the generated script")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    folder = tempfile.mkdtemp(prefix="loxcache-bench-")
+    try:
+        path = os.path.join(folder, "big.lox")
+        source = generate(args.functions)
+        with open(path, "w") as file:
+            file.write(source)
+        print(f"script: {len(source) / 1e6:.1f} MB, {source.count(chr(10))} lines, {args.functions} functions")
+
+        start = time.perf_counter()
+        script = compile_program(source, vm=True)
+        compiled = time.perf_counter() - start
+        digest = cache.source_hash(source)
+        target = cache.cache_path(path, optimize=False)
+        cache.store(target, digest, script)
+        start = time.perf_counter()
+        assert cache.load(target, digest) is not None
+        loaded = time.perf_counter() - start
+        print(f"cache file: {os.path.getsize(target) / 1e6:.1f} MB")
+        print(f"in process   compile {compiled:.3f}s   load {loaded:.3f}s   {compiled / loaded:.1f}x")
+
+        command = [sys.executable, "-m", "app.main", "run", path, "--vm"]
+        cold = timed(command + ["--no-cache"], args.repeat)
+        warm = timed(command, args.repeat)
+        print(f"end to end   cold {cold:.3f}s   cached {warm:.3f}s   {cold / warm:.1f}x")
+    finally:
+        shutil.rmtree(folder)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import argparse
+import io
+import sys
+import time
+
+from app.interpreter import Interpreter
+from app.main import compile_program
+from app.vm import VM
+
+
+#runs the same lox programs on the tree walker and the bytecode VM and compares them
+#run from this folder: python3 bench_engines.py --repeat 3
+#the walker and vm columns are the best of --repeat runs, compile time is not included
+#each program prints a checksum and both engines have to agree on it
+#--optimize adds columns for both engines running the program after the --optimize pass
+
+PROGRAMS = {
+    "fib": """
+        fun fib(n) {
+          if (n < 2) return n;
+          return fib(n - 2) + fib(n - 1);
+        }
+        print fib(%(fib)d);
+    """,
+    "scopes": """
+        fun walk(depth, acc) {
+          var here = depth * 2;
+          {
+            var left = here + 1;
+            {
+              var right = left + 1;
+              if (depth > 0) {
+                acc = walk(depth - 1, acc + left) + walk(depth - 1, right - here);
+              }
+            }
+          }
+          return acc;
+        }
+        print walk(%(scopes)d, 0);
+    """,
+    "loops": """
+        var total = 0;
+        for (var i = 0; i < %(loops)d; i = i + 1) {
+          var j = 0;
+          while (j < 10) {
+            total = total + j * 2 - 1;
+            j = j + 1;
+          }
+        }
+        print total;
+    """,
+    "concat": """
+        var s = "";
+        for (var i = 0; i < %(concat)d; i = i + 1) {
+          s = s + "ab";
+          if (s == "never") print "unreachable";
+        }
+        print s == s + "";
+    """,
+    "closures": """
+        fun counter() {
+          var n = 0;
+          fun step(by) {
+            n = n + by;
+            return n;
+          }
+          return step;
+        }
+        var total = 0;
+        for (var i = 0; i < %(closures)d; i = i + 1) {
+          var c = counter();
+          c(1);
+          total = total + c(i);
+        }
+        print total;
+    """,
+    "constants": """
+        var seconds = 0;
+        for (var day = 0; day < %(constants)d; day = day + 1) {
+          seconds = seconds + 60 * 60 * 24 - (2 * 30 + 1) * 0;
+          if (1 > 2) print "never";
+          var label = "day" + " " + "of" + " " + "year";
+        }
+        print seconds;
+    """,
+}
+
+SIZES = {"fib": 22, "scopes": 14, "loops": 20000, "concat": 20000, "closures": 20000, "constants": 50000}
+
+
+def run(engine, program):
+    out = io.StringIO()
+    start = time.perf_counter()
+    if engine == "vm":
+        VM(out).run(program)
+    else:
+        Interpreter(out).run(program)
+    return time.perf_counter() - start, out.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the tree walker against the bytecode VM")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", nargs="+", choices=list(PROGRAMS), default=list(PROGRAMS))
+    parser.add_argument("--optimize", action="store_true", help="also time both engines after --optimize")
+    for name, size in SIZES.items():
+        parser.add_argument(f"--{name}", type=int, default=size, help=f"size of the {name} program")
+    args = parser.parse_args()
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 100000))
+
+    engines = [("walker", False), ("vm", False)]
+    if args.optimize:
+        engines += [("walker", True), ("vm", True)]
+    columns = [engine + (" opt" if optimize else "") for engine, optimize in engines]
+    print(f"{'program':<9} " + " ".join(f"{column + ' s':>12}" for column in columns) + f" {'vm speedup':>10}")
+    for name in args.only:
+        source = PROGRAMS[name] % vars(args)
+        times = []
+        outputs = set()
+        for engine, optimize in engines:
+            program = compile_program(source, vm=engine == "vm", optimize=optimize)
+            results = [run(engine, program) for _ in range(args.repeat)]
+            times.append(min(seconds for seconds, _ in results))
+            outputs.add(results[0][1])
+        if len(outputs) != 1:
+            sys.exit(f"{name}: engines disagree, {sorted(outputs)!r}")
+        print(f"{name:<9} " + " ".join(f"{seconds:>12.3f}" for seconds in times) + f" {times[0] / times[1]:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
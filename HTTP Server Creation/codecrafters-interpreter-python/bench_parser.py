@@ -0,0 +1,44 @@
+import argparse
+import sys
+import time
+
+from app.interpreter import evaluate
+from app.main import parse
+from app.nodes import dump
+
+
+#checks that parse and evaluate stay linear and never recurse, on generated expressions
+#run from this folder: python3 bench_parser.py --sizes 10000 100000 400000
+#nested = ((((1 + 1) + 1) + 1)...), flat = 1 * 2 + 1 * 2 + ..., unary = ----...1
+#the time per operator column should stay about the same as the size grows
+
+SHAPES = {
+    "nested": lambda n: "(" * n + "1" + " + 1)" * n,
+    "flat": lambda n: " + ".join(["1 * 2"] * n),
+    "unary": lambda n: "-" * n + "1",
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Lox expression parser")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 400000])
+    args = parser.parse_args()
+
+    print(f"recursion limit is {sys.getrecursionlimit()}, the deepest tree below is {max(args.sizes)} levels")
+    print(f"{'shape':<7} {'size':>8} {'parse s':>8} {'ns/op':>7} {'eval s':>8} {'dump s':>8}")
+    for shape, make in SHAPES.items():
+        for n in args.sizes:
+            source = make(n)
+            start = time.perf_counter()
+            expr = parse(source)
+            parsed = time.perf_counter()
+            evaluate(expr)
+            evaluated = time.perf_counter()
+            dump(expr)
+            dumped = time.perf_counter()
+            print(f"{shape:<7} {n:>8} {parsed - start:>8.3f} {(parsed - start) / n * 1e9:>7.0f} "
+                  f"{evaluated - parsed:>8.3f} {dumped - evaluated:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
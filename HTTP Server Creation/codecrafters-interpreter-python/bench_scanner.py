@@ -0,0 +1,152 @@
+import argparse
+import os
+import time
+import tracemalloc
+from array import array
+
+from app.main import tokenize
+from app.nodes import format_number
+from app.scanner import NAMES, NUMBER, STRING, scan
+
+
+#benchmark for app/scanner.py and the tokenize command on a generated source file
+#run from this folder: python3 bench_scanner.py --size-mb 1 5 --tokenize-mb 10
+#scan = just the scanner, tokenize = scanner plus formatting and writing every line to /dev/null
+
+SNIPPET = '''// compute some things
+var total_{n} = 0;
+fun step_{n}(a, b) {
+    if (a >= b and !(a == 0)) { return a * 2.5 - b / 4; }
+    else { return "value " + "of step"; }
+}
+for (var i = 0; i < 100; i = i + 1) {
+    total_{n} = total_{n} + step_{n}(i, 17.25);
+    print total_{n} != nil or false;
+}
+'''
+
+
+class LegacyToken:
+    # what tokens used to carry, a copied lexeme and a parsed literal each
+    __slots__ = ("type", "lexeme", "literal", "line")
+
+    def __init__(self, type, lexeme, literal, line):
+        self.type = type
+        self.lexeme = lexeme
+        self.literal = literal
+        self.line = line
+
+
+class TokenArray:
+    # every token of a file as parallel arrays, about 13 bytes a token against ~100 for
+    # a list of Token objects, the cheapest way to keep them all instead of streaming
+    def __init__(self, source, tokens=()):
+        self.source = source
+        self.types = array("B")
+        self.starts = array("I")
+        self.lengths = array("I")
+        self.lines = array("I")
+        for token in tokens:
+            self.types.append(token.type)
+            self.starts.append(token.start)
+            self.lengths.append(token.length)
+            self.lines.append(token.line)
+
+    def __len__(self):
+        return len(self.types)
+
+
+def make_source(size):
+    parts = []
+    length = 0
+    n = 0
+    while length < size:
+        part = SNIPPET.replace("{n}", str(n))
+        parts.append(part)
+        length += len(part)
+        n += 1
+    return "".join(parts)
+
+
+def lex_all(source):
+    count = 0
+    for _ in scan(source):
+        count += 1
+    return count
+
+
+def legacy_tokens(source):
+    for token in scan(source):
+        yield LegacyToken(token.type, token.lexeme(source), token.literal(source), token.line)
+
+
+def legacy_tokenize(source, out):
+    # one print() per token, like the loop tokenize started out with
+    for token in legacy_tokens(source):
+        if token.type == NUMBER:
+            literal = format_number(token.literal)
+        elif token.type == STRING:
+            literal = token.literal
+        else:
+            literal = "null"
+        print(f"{NAMES[token.type]} {token.lexeme} {literal}", file=out)
+
+
+def bytes_per_token(make_tokens, source):
+    # memory holding every token costs, the source itself is not counted
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    tokens = make_tokens(source)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / len(tokens)
+
+
+def best_of(repeat, fn, *args):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Lox scanner")
+    parser.add_argument("--size-mb", type=float, nargs="+", default=[1, 5])
+    parser.add_argument("--tokenize-mb", type=float, default=10,
+                        help="size of the input for the end to end tokenize timing")
+    parser.add_argument("--repeat", type=int, default=3, help="best of this many runs is reported")
+    args = parser.parse_args()
+
+    print("scan")
+    print(f"{'size MB':>8} {'tokens':>10} {'seconds':>8} {'MB/s':>7} {'Mtok/s':>7}")
+    for size_mb in args.size_mb:
+        source = make_source(int(size_mb * 1024 * 1024))
+        best = float("inf")
+        count = 0
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            count = lex_all(source)
+            best = min(best, time.perf_counter() - start)
+        mb = len(source) / (1024 * 1024)
+        print(f"{mb:>8.1f} {count:>10} {best:>8.3f} {mb / best:>7.1f} {count / best / 1e6:>7.2f}")
+
+    source = make_source(1024 * 1024)
+    print("\nmemory per token, every token in 1 MB of source kept")
+    print(f"  TokenArray               {bytes_per_token(lambda s: TokenArray(s, scan(s)), source):>6.1f} bytes")
+    print(f"  list of Token offsets    {bytes_per_token(lambda s: list(scan(s)), source):>6.1f} bytes")
+    print(f"  copied lexeme + literal  {bytes_per_token(lambda s: list(legacy_tokens(s)), source):>6.1f} bytes")
+
+    source = make_source(int(args.tokenize_mb * 1024 * 1024))
+    print(f"\ntokenize {len(source) / (1024 * 1024):.1f} MB to /dev/null")
+    with open(os.devnull, "w", buffering=1 << 16) as out:
+        new = best_of(args.repeat, tokenize, source, out)
+    with open(os.devnull, "w") as out:
+        old = best_of(args.repeat, legacy_tokenize, source, out)
+    print(f"  buffered writer          {new:>6.2f} s")
+    print(f"  print() per token        {old:>6.2f} s")
+
+
+if __name__ == "__main__":
+    main()